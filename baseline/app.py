@@ -1,17 +1,24 @@
 import streamlit as st
 from pipeline import Pipeline
-from metrics.recall_evaluator import compute_recall_at_k, compute_precision_recall_f1_at_k, compute_f1_at_k
+from metrics.recall_evaluator import BENCHMARK_DATA, compute_recall_at_k, compute_precision_recall_f1_at_k, compute_f1_at_k
 from metrics.latency_benchmark import benchmark_latency
 import os
-import time 
+import uuid
 
-# Initialize pipeline (load or build index)
+# Initialize pipeline (load or build index); models load on a background
+# thread so the page renders before they are ready, and files added to
+# ./data are indexed in the background
 @st.cache_resource
 def load_pipeline():
-    return Pipeline()
+    return Pipeline(warm_up=True, watch=True)
 
 pipe = load_pipeline()
 
+# The pipeline is shared by every browser session; conversation memory is
+# kept per session id.
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
+
 # App title
 st.title("📄 RAG Question Answering + Metrics Dashboard")
 
@@ -32,14 +39,20 @@ if mode == "Ask a Question":
         os.makedirs(save_dir, exist_ok=True)
         for file in uploaded_files:
             file_path = os.path.join(save_dir, file.name)
+            data = bytes(file.getbuffer())
+            # Streamlit re-runs this on every interaction; rewriting an
+            # identical file would only make the watcher look at it again
+            if os.path.exists(file_path) and os.path.getsize(file_path) == len(data):
+                with open(file_path, "rb") as f:
+                    if f.read() == data:
+                        continue
             with open(file_path, "wb") as f:
-                f.write(file.getbuffer())
+                f.write(data)
             st.sidebar.success(f"Saved: {file.name}")
-        # Rebuild index
-        st.sidebar.info("Rebuilding index with new documents...")
-        pipe.retriever.add_documents([os.path.join(save_dir, f.name) for f in uploaded_files])
-        pipe.retriever.save(pipe.embeddings_dir)
-        st.sidebar.success("Index updated!")
+        # The watcher indexes new/changed files in the background and swaps
+        # the updated index in; questions keep using the current one meanwhile
+        pipe.watcher.poll_now()
+        st.sidebar.info("New documents are indexed in the background.")
 
     # --- QUESTION INPUT ---
     question = st.text_input("Enter your question:", "")
@@ -51,34 +64,21 @@ if mode == "Ask a Question":
     # --- RUN ---
     if st.button("Get Answer") and question.strip():
         with st.spinner("Retrieving and generating..."):
-            retrieved = pipe.retriever.query(
+            retrieved = pipe.retrieve(
                 question,
-                top_k=5,
                 filter_source_type=filter_source_type if filter_source_type else None,
                 filter_date_after=filter_date_after if filter_date_after else None
             )
 
-            chunks = [text for _, text in retrieved]
-            metas  = [str(meta) for meta, _ in retrieved]
-
-            prompt = pipe.generator.build_prompt(chunks, metas, question, pipe.memory)
-
-            # Live token display
+            # Live token display: render deltas as the LLM streams them
             st.markdown("### 💬 Answer")
             answer_placeholder = st.empty()
             full_answer = ""
-            
-            answer = pipe.generator.generate_answer(prompt)
-            sleep_time = st.sidebar.slider("Token stream speed (seconds)", 0.01, 0.2, 0.05, 0.01)
 
-            for token in answer.split():
-                full_answer += token + " "
-                answer_placeholder.markdown(full_answer)
-                time.sleep(sleep_time)
-
-            pipe.memory.append((question, answer))
-            ids = [meta.get("source") for meta, _ in retrieved]
-            pipe.logger.log(question, ids, prompt, answer)
+            for delta in pipe.run_stream(question, retrieved=retrieved, session_id=st.session_state.session_id):
+                full_answer += delta
+                answer_placeholder.markdown(full_answer + "▌")
+            answer_placeholder.markdown(full_answer)
 
             # Show retrieved chunks
             st.markdown("### 📑 Retrieved Context Chunks")
@@ -89,28 +89,7 @@ if mode == "Ask a Question":
 
 elif mode == "Metrics Dashboard":
     st.header("📊 Recall@k Evaluation")
-    benchmark_data = [
-    (
-        "What is the role of cyber security in information technology?",
-        ["A_Study_Of_Cyber_Security_Challenges_And_Its_Emerg_chunk0"]
-    ),
-    (
-        "What are the major challenges faced by cyber security today?",
-        ["A_Study_Of_Cyber_Security_Challenges_And_Its_Emerg_chunk0"]
-    ),
-    (
-        "What is the first thing that comes to mind when thinking about cyber security?",
-        ["A_Study_Of_Cyber_Security_Challenges_And_Its_Emerg_chunk0"]
-    ),
-    (
-        "How are governments and companies trying to prevent cyber crimes?",
-        ["A_Study_Of_Cyber_Security_Challenges_And_Its_Emerg_chunk0"]
-    ),
-    (
-        "What does this paper focus on regarding cyber security?",
-        ["A_Study_Of_Cyber_Security_Challenges_And_Its_Emerg_chunk0"]
-    )
-]
+    benchmark_data = BENCHMARK_DATA
 
     k = st.slider("Select k", 1, 10, 5)
     if st.button("Run Recall@k"):
@@ -137,6 +116,18 @@ elif mode == "Metrics Dashboard":
 
 # --- SIDEBAR INFO ---
 st.sidebar.markdown("### ℹ️ Info")
+if pipe.ready:
+    st.sidebar.success(f"Models loaded (startup {pipe.startup.get('total', 0):.1f}s)")
+else:
+    st.sidebar.info("Loading models in the background; the first answer may take longer.")
+if pipe.watcher is not None:
+    watch = pipe.watcher.stats()
+    if watch["pending_files"]:
+        st.sidebar.info(f"Indexing {watch['pending_files']} file(s) (waiting {watch['pending_lag_s']:.0f}s)")
+    elif watch["last_lag_s"] is not None:
+        st.sidebar.caption(f"Index up to date (last indexing lag {watch['last_lag_s']:.1f}s)")
+    if watch["last_error"]:
+        st.sidebar.error(f"Background indexing failed: {watch['last_error']}")
 st.sidebar.markdown(
 """
 This app uses:
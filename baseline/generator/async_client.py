@@ -0,0 +1,238 @@
+import json
+import time
+import queue
+import random
+import asyncio
+import threading
+from typing import AsyncIterator, Dict, Iterator, Optional, Tuple
+
+from generator.backends import LLMBackend
+from metrics.tracing import tracer
+
+
+class _LoopThread:
+    """One asyncio event loop on a daemon thread, shared by every client."""
+
+    _instance: Optional["_LoopThread"] = None
+    _lock = threading.Lock()
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="llm-client-loop", daemon=True)
+        self.thread.start()
+
+    @classmethod
+    def get(cls) -> "_LoopThread":
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+
+class AsyncLLMClient:
+    """
+    asyncio chat-completion client used by Generator.
+
+    Requests go to an LLMBackend (see generator/backends.py). One client per
+    backend key (e.g. Cerebras API key) is shared process-wide (see
+    ``shared``), so all Generators reuse one pooled HTTP connection set and one
+    event loop running on a background thread. Each request:
+
+    - waits for one of ``max_in_flight`` slots (an asyncio.Semaphore),
+    - is retried on transient errors with exponential backoff and full jitter
+      (``backoff_base * 2**attempt``, capped at ``backoff_max``), up to
+      ``max_retries`` times,
+    - must finish within its deadline (``timeout`` seconds, retries and
+      waiting included) or raises TimeoutError,
+    - is coalesced with an identical in-flight request (same model, messages
+      and max_tokens): later callers await the first caller's result.
+
+    Synchronous callers use ``run``; async code can await ``complete`` directly
+    on the client's loop.
+    """
+
+    _shared: Dict[Tuple, "AsyncLLMClient"] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, backend: LLMBackend, max_in_flight: int = 8, max_retries: int = 3,
+                 timeout: Optional[float] = 60.0, backoff_base: float = 0.5, backoff_max: float = 8.0):
+        self.backend = backend
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._loop = _LoopThread.get().loop
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.coalesced = 0
+        self.retries = 0
+
+    @classmethod
+    def shared(cls, backend: LLMBackend, **kwargs) -> "AsyncLLMClient":
+        """
+        Return the process-wide client for this backend and settings, creating
+        it once. Cerebras backends are keyed by API key, others by identity.
+        """
+        backend_key = (backend.name, getattr(backend, "api_key", id(backend)))
+        key = (backend_key, tuple(sorted(kwargs.items())))
+        with cls._shared_lock:
+            client = cls._shared.get(key)
+            if client is None:
+                client = cls._shared[key] = cls(backend, **kwargs)
+            return client
+
+    def run(self, coro):
+        """Run a coroutine on the client loop and block until it finishes."""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def _deadline(self, timeout: Optional[float]) -> Optional[float]:
+        timeout = self.timeout if timeout is None else timeout
+        return None if timeout is None else self._loop.time() + timeout
+
+    def _remaining(self, deadline: Optional[float]) -> Optional[float]:
+        if deadline is None:
+            return None
+        remaining = deadline - self._loop.time()
+        if remaining <= 0:
+            raise TimeoutError("LLM request deadline exceeded")
+        return remaining
+
+    async def _backoff(self, attempt: int, deadline: Optional[float]):
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        if deadline is not None and self._loop.time() + delay >= deadline:
+            raise TimeoutError("LLM request deadline exceeded while backing off")
+        self.retries += 1
+        await asyncio.sleep(delay)
+
+    async def _create(self, model: str, messages: list, max_tokens: int, deadline: Optional[float]) -> str:
+        attempt = 0
+        while True:
+            try:
+                with tracer.span("llm.queue"):
+                    await self._semaphore.acquire()
+                try:
+                    with tracer.span("llm.request"):
+                        return await asyncio.wait_for(
+                            self.backend.complete(model, messages, max_tokens),
+                            self._remaining(deadline),
+                        )
+                finally:
+                    self._semaphore.release()
+            except asyncio.TimeoutError:
+                raise TimeoutError("LLM request deadline exceeded") from None
+            except Exception as e:
+                if attempt >= self.max_retries or not self.backend.is_transient(e):
+                    raise
+            await self._backoff(attempt, deadline)
+            attempt += 1
+
+    def _finished(self, key: str, task: asyncio.Task):
+        self._inflight.pop(key, None)
+        if not task.cancelled():
+            task.exception()  # mark retrieved even if every waiter timed out
+
+    async def complete(self, model: str, messages: list, max_tokens: int = 1024,
+                       timeout: Optional[float] = None) -> str:
+        """Return the assistant reply for ``messages``; must be awaited on the client loop."""
+        deadline = self._deadline(timeout)
+        key = json.dumps([model, max_tokens, messages], sort_keys=True)
+        task = self._inflight.get(key)
+        if task is None:
+            task = self._loop.create_task(self._create(model, messages, max_tokens, deadline))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._finished(key, t))
+        else:
+            self.coalesced += 1
+        # shield: a caller timing out must not cancel the request for the others
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), self._remaining(deadline))
+        except asyncio.TimeoutError:
+            raise TimeoutError("LLM request deadline exceeded") from None
+
+    async def stream(self, model: str, messages: list, max_tokens: int = 1024,
+                     timeout: Optional[float] = None) -> AsyncIterator[str]:
+        """
+        Yield content deltas. Opening the stream is retried like ``complete``;
+        once tokens flow, errors are raised to the caller. Streams are not
+        coalesced.
+        """
+        deadline = self._deadline(timeout)
+        attempt = 0
+        async with self._semaphore:
+            while True:
+                try:
+                    stream = await asyncio.wait_for(
+                        self.backend.open_stream(model, messages, max_tokens),
+                        self._remaining(deadline),
+                    )
+                    break
+                except asyncio.TimeoutError:
+                    raise TimeoutError("LLM request deadline exceeded") from None
+                except Exception as e:
+                    if attempt >= self.max_retries or not self.backend.is_transient(e):
+                        raise
+                await self._backoff(attempt, deadline)
+                attempt += 1
+            # Bound every delta by the deadline, so a stream that opens and
+            # then stalls still times out
+            deltas = stream.__aiter__()
+            try:
+                while True:
+                    try:
+                        delta = await asyncio.wait_for(deltas.__anext__(), self._remaining(deadline))
+                    except StopAsyncIteration:
+                        break
+                    except asyncio.TimeoutError:
+                        raise TimeoutError("LLM request deadline exceeded") from None
+                    yield delta
+            finally:
+                aclose = getattr(stream, "aclose", None)
+                if aclose is not None:
+                    await aclose()
+
+    def iter_stream(self, model: str, messages: list, max_tokens: int = 1024,
+                    timeout: Optional[float] = None) -> Iterator[str]:
+        """
+        Synchronous view of ``stream`` for threaded callers such as Streamlit.
+        Closing the iterator early (or abandoning it) cancels the request and
+        frees its slot.
+        """
+        deltas: "queue.Queue" = queue.Queue()
+        done = object()
+        timeout = self.timeout if timeout is None else timeout
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        async def pump():
+            try:
+                async for delta in self.stream(model, messages, max_tokens, timeout):
+                    deltas.put(delta)
+            except BaseException as e:
+                deltas.put(e)
+                if isinstance(e, asyncio.CancelledError):
+                    raise
+            finally:
+                deltas.put(done)
+
+        future = asyncio.run_coroutine_threadsafe(pump(), self._loop)
+        try:
+            while True:
+                try:
+                    item = deltas.get(timeout=None if deadline is None else max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    raise TimeoutError("LLM request deadline exceeded") from None
+                if item is done:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            future.cancel()
+
+    def stats(self) -> dict:
+        return {
+            "max_in_flight": self.max_in_flight,
+            "in_flight": len(self._inflight),
+            "coalesced": self.coalesced,
+            "retries": self.retries,
+        }
@@ -0,0 +1,187 @@
+"""
+LLM backends behind Generator / AsyncLLMClient.
+
+A backend only makes a single request. Concurrency limits, retries,
+deadlines and coalescing live in AsyncLLMClient, so they apply to every
+backend the same way.
+
+cerebras  the Cerebras chat-completions API (needs CEREBRAS_API_KEY)
+mock      deterministic local stand-in with configurable latency, throughput
+          and failure rate, for offline tests and benchmarks
+
+``make_backend`` picks one by name; with no name it reads GENERATOR_BACKEND
+and falls back to cerebras.
+"""
+import os
+import re
+import random
+import asyncio
+import hashlib
+from typing import AsyncIterator, Optional, Union
+
+
+class TransientBackendError(Exception):
+    """A failure worth retrying (the mock raises it for injected faults)."""
+
+
+class LLMBackend:
+    """Interface: one chat completion, whole or streamed."""
+
+    name = "base"
+
+    async def complete(self, model: str, messages: list, max_tokens: int) -> str:
+        raise NotImplementedError
+
+    async def open_stream(self, model: str, messages: list, max_tokens: int) -> AsyncIterator[str]:
+        """Start a streamed completion; returns an async iterator of content deltas."""
+        raise NotImplementedError
+
+    def is_transient(self, exc: BaseException) -> bool:
+        return isinstance(exc, TransientBackendError)
+
+    def warm_up(self):
+        """Import SDKs and open clients ahead of the first request (optional)."""
+
+
+class CerebrasBackend(LLMBackend):
+    name = "cerebras"
+
+    def __init__(self, api_key: Optional[str] = None, max_connections: int = 8):
+        api_key = api_key or os.environ.get("CEREBRAS_API_KEY")
+        if not api_key:
+            raise ValueError("❌ CEREBRAS_API_KEY environment variable not set.")
+        self.api_key = api_key
+        self.max_connections = max_connections
+        self._client = None
+
+    @property
+    def client(self):
+        """The SDK client, created (and the SDK imported) on first use."""
+        if self._client is None:
+            import httpx
+            from cerebras.cloud.sdk import AsyncCerebras, DefaultAsyncHttpxClient
+
+            # Retries are handled by AsyncLLMClient so backoff and deadlines apply uniformly
+            self._client = AsyncCerebras(
+                api_key=self.api_key,
+                max_retries=0,
+                http_client=DefaultAsyncHttpxClient(
+                    limits=httpx.Limits(max_connections=self.max_connections,
+                                        max_keepalive_connections=self.max_connections)
+                ),
+            )
+        return self._client
+
+    def warm_up(self):
+        self.client
+
+    async def complete(self, model: str, messages: list, max_tokens: int) -> str:
+        response = await self.client.chat.completions.create(
+            messages=messages, model=model, max_tokens=max_tokens
+        )
+        return response.choices[0].message.content
+
+    async def open_stream(self, model: str, messages: list, max_tokens: int) -> AsyncIterator[str]:
+        stream = await self.client.chat.completions.create(
+            messages=messages, model=model, max_tokens=max_tokens, stream=True
+        )
+
+        async def deltas():
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    yield delta
+
+        return deltas()
+
+    def is_transient(self, exc: BaseException) -> bool:
+        """Connection errors, timeouts, 429 and 5xx responses are worth retrying."""
+        from cerebras.cloud.sdk import APIConnectionError, APIStatusError
+
+        if isinstance(exc, APIConnectionError):  # includes APITimeoutError
+            return True
+        if isinstance(exc, APIStatusError):
+            return exc.status_code == 429 or exc.status_code >= 500
+        return super().is_transient(exc)
+
+
+class MockBackend(LLMBackend):
+    """
+    Offline stand-in for the LLM API with realistic timing.
+
+    A request waits a time-to-first-token drawn from a log-normal distribution
+    (median ``ttft_ms``, shape ``ttft_sigma``), then emits tokens at
+    ``tokens_per_sec``. It fails with probability ``failure_rate``, raising
+    TransientBackendError so the client's retry path is exercised.
+
+    Answers depend only on the prompt: the first ``answer_tokens`` words of the
+    prompt's Context section (words stand in for tokens). Latency and failures
+    come from a generator seeded with ``seed``, so a run replays identically.
+    """
+
+    name = "mock"
+
+    def __init__(self, ttft_ms: float = 300.0, ttft_sigma: float = 0.5, tokens_per_sec: float = 400.0,
+                 answer_tokens: int = 64, failure_rate: float = 0.0, seed: int = 0):
+        self.ttft_ms = ttft_ms
+        self.ttft_sigma = ttft_sigma
+        self.tokens_per_sec = tokens_per_sec
+        self.answer_tokens = answer_tokens
+        self.failure_rate = failure_rate
+        self._rng = random.Random(seed)
+        self.requests = 0
+        self.failures = 0
+
+    def answer(self, messages: list, max_tokens: int) -> str:
+        prompt = messages[-1]["content"] if messages else ""
+        match = re.search(r"Context:\n(.*?)\n\nQuestion:", prompt, re.S)
+        words = (match.group(1) if match else prompt).split()
+        if not words:
+            words = [hashlib.sha1(prompt.encode("utf-8")).hexdigest()[:8]]
+        return " ".join(words[:min(self.answer_tokens, max_tokens)])
+
+    def _start(self) -> float:
+        """Count the request, maybe fail it, and return its time to first token in seconds."""
+        self.requests += 1
+        ttft = self._rng.lognormvariate(0.0, self.ttft_sigma) * self.ttft_ms / 1000
+        if self._rng.random() < self.failure_rate:
+            self.failures += 1
+            raise TransientBackendError("mock backend: injected failure")
+        return ttft
+
+    async def complete(self, model: str, messages: list, max_tokens: int) -> str:
+        ttft = self._start()
+        answer = self.answer(messages, max_tokens)
+        await asyncio.sleep(ttft + len(answer.split()) / self.tokens_per_sec)
+        return answer
+
+    async def open_stream(self, model: str, messages: list, max_tokens: int) -> AsyncIterator[str]:
+        ttft = self._start()
+        words = self.answer(messages, max_tokens).split()
+        await asyncio.sleep(ttft)
+
+        async def deltas():
+            for i, word in enumerate(words):
+                if i:
+                    await asyncio.sleep(1 / self.tokens_per_sec)
+                yield word if i == 0 else " " + word
+
+        return deltas()
+
+    def stats(self) -> dict:
+        return {"requests": self.requests, "failures": self.failures}
+
+
+BACKENDS = {"cerebras": CerebrasBackend, "mock": MockBackend}
+
+
+def make_backend(backend: Union[str, LLMBackend, None] = None, **kwargs) -> LLMBackend:
+    """Return ``backend`` itself, or build it by name (default: $GENERATOR_BACKEND, else cerebras)."""
+    if isinstance(backend, LLMBackend):
+        return backend
+    name = backend or os.environ.get("GENERATOR_BACKEND", "cerebras")
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown generator backend '{name}'. Choose from {tuple(BACKENDS)}.")
+    return BACKENDS[name](**kwargs)
@@ -0,0 +1,157 @@
+from typing import Callable, List, Tuple
+
+from generator.tokens import count_tokens
+
+
+def overlap_length(left: str, right: str, max_overlap: int, min_overlap: int = 16) -> int:
+    """
+    Length of the longest suffix of ``left`` (at most ``max_overlap`` chars)
+    that ``right`` starts with, or 0 if shorter than ``min_overlap``.
+    """
+    tail = left[-max_overlap:]
+    probe = right[:min_overlap]
+    if len(probe) < min_overlap:
+        return 0
+    start = tail.find(probe)
+    while start != -1:
+        if right.startswith(tail[start:]):
+            return len(tail) - start
+        start = tail.find(probe, start + 1)
+    return 0
+
+
+class ContextPacker:
+    """
+    Turns retrieved (metadata, text) pairs into compact prompt context.
+
+    - Chunks of the same source with consecutive chunk ids (or whose text
+      overlaps) are merged into one passage, and the text the splitter
+      repeated between them (up to ``max_overlap`` chars) is kept once.
+    - Each passage gets a one-line header (source, type, date, chunk range)
+      instead of a dump of every metadata dict.
+    - Passages are kept in retrieval rank order until ``token_budget`` is
+      spent; the passage that crosses the budget is truncated if at least
+      ``min_passage_tokens`` remain, and the rest are dropped.
+
+    ``count_tokens`` defaults to generator/tokens.py's, which counts with the
+    served model's tokenizer when it can be loaded and estimates otherwise.
+    """
+
+    def __init__(
+        self,
+        token_budget: int = 3000,
+        max_overlap: int = 300,
+        min_overlap: int = 16,
+        min_passage_tokens: int = 32,
+        count_tokens: Callable[[str], int] = count_tokens,
+    ):
+        self.token_budget = token_budget
+        self.max_overlap = max_overlap
+        self.min_overlap = min_overlap
+        self.min_passage_tokens = min_passage_tokens
+        self.count_tokens = count_tokens
+        self.requests = 0
+        self.tokens_saved = 0
+
+    def _merge(self, retrieved: list) -> List[dict]:
+        """Passages (dicts with rank, meta, chunk ids, text) in retrieval rank order."""
+        groups = {}
+        seen = set()
+        for rank, (meta, text) in enumerate(retrieved):
+            source, chunk_id = meta.get("source"), meta.get("chunk_id")
+            key = (source, chunk_id) if chunk_id is not None else (source, text)
+            if key in seen:
+                continue
+            seen.add(key)
+            groups.setdefault(source, []).append((rank, meta, chunk_id, text))
+
+        passages = []
+        for items in groups.values():
+            if all(item[2] is not None for item in items):
+                items.sort(key=lambda item: item[2])
+            current = None
+            for rank, meta, chunk_id, text in items:
+                if current is not None:
+                    last_id = current["chunk_ids"][-1]
+                    adjacent = chunk_id is not None and last_id is not None and chunk_id == last_id + 1
+                    overlap = overlap_length(current["text"], text, self.max_overlap, self.min_overlap)
+                    if adjacent or overlap:
+                        current["text"] += text[overlap:] if overlap else "\n" + text
+                        current["overlap_chars"] += overlap
+                        current["chunk_ids"].append(chunk_id)
+                        current["rank"] = min(current["rank"], rank)
+                        continue
+                current = {"rank": rank, "meta": meta, "chunk_ids": [chunk_id], "text": text, "overlap_chars": 0}
+                passages.append(current)
+        passages.sort(key=lambda p: p["rank"])
+        return passages
+
+    @staticmethod
+    def _header(n: int, passage: dict) -> str:
+        meta = passage["meta"]
+        details = ", ".join(str(meta[k]) for k in ("source_type", "date") if meta.get(k))
+        header = f"[{n}] {meta.get('source', 'unknown')}" + (f" ({details})" if details else "")
+        ids = [i for i in passage["chunk_ids"] if i is not None]
+        if ids:
+            header += f", chunk {ids[0]}" if len(ids) == 1 else f", chunks {ids[0]}-{ids[-1]}"
+        return header
+
+    def pack(self, retrieved: list) -> Tuple[List[str], List[str], dict]:
+        """
+        Return (passage texts, passage headers, stats). Stats compare the
+        packed context with the unpacked one (every chunk plus ``str(meta)``):
+        {"chunks", "passages", "tokens_before", "tokens_after", "tokens_saved",
+        "overlap_chars", "truncated", "dropped"}.
+        """
+        before = self.count_tokens("\n".join(text for _, text in retrieved)) + \
+            self.count_tokens("\n".join(str(meta) for meta, _ in retrieved))
+        passages = self._merge(retrieved)
+
+        texts, headers = [], []
+        used = truncated = dropped = 0
+        for passage in passages:
+            header = self._header(len(texts) + 1, passage)
+            text = f"[{len(texts) + 1}] {passage['text']}"
+            cost = self.count_tokens(header) + self.count_tokens(text)
+            remaining = self.token_budget - used
+            if cost > remaining:
+                body = remaining - self.count_tokens(header)
+                if body < self.min_passage_tokens:
+                    dropped += 1
+                    continue
+                text = self._truncate(text, body)
+                cost = self.count_tokens(header) + self.count_tokens(text)
+                truncated += 1
+            texts.append(text)
+            headers.append(header)
+            used += cost
+
+        after = self.count_tokens("\n".join(texts)) + self.count_tokens("\n".join(headers))
+        self.requests += 1
+        self.tokens_saved += max(0, before - after)
+        return texts, headers, {
+            "chunks": len(retrieved),
+            "passages": len(texts),
+            "tokens_before": before,
+            "tokens_after": after,
+            "tokens_saved": max(0, before - after),
+            "overlap_chars": sum(p["overlap_chars"] for p in passages),
+            "truncated": truncated,
+            "dropped": dropped,
+        }
+
+    def _truncate(self, text: str, max_tokens: int) -> str:
+        """Cut ``text`` to ``max_tokens`` by characters, proportionally, at a word boundary."""
+        tokens = self.count_tokens(text)
+        limit = int(len(text) * max_tokens / tokens) if tokens else len(text)
+        while limit > 0:
+            cut = text[:limit]
+            space = cut.rfind(" ")
+            cut = cut[:space] if space > limit // 2 else cut
+            if self.count_tokens(cut) <= max_tokens:
+                return cut
+            limit = int(limit * 0.9)
+        return ""
+
+    def stats(self) -> dict:
+        return {"requests": self.requests, "tokens_saved": self.tokens_saved}
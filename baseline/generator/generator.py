@@ -1,28 +1,53 @@
-import os
-from cerebras.cloud.sdk import Cerebras
+import asyncio
+from time import perf_counter_ns
+from typing import Iterator, List, Optional, Tuple, Union
 from dotenv import load_dotenv
+
+from generator.async_client import AsyncLLMClient
+from generator.backends import LLMBackend, make_backend
+from generator.context_packer import ContextPacker
+from metrics.tracing import tracer
 load_dotenv()
 
 class Generator:
-    def __init__(self, model_name: str = "deepseek-r1-distill-llama-70b"):
+    def __init__(self, model_name: str = "deepseek-r1-distill-llama-70b",
+                 backend: Union[str, LLMBackend, None] = None, max_in_flight: int = 8,
+                 max_retries: int = 3, timeout: Optional[float] = 60.0,
+                 context_packer: Optional[ContextPacker] = None):
         """
-        Initialize Cerebras client and set model.
+        Initialize the shared LLM client and set model.
+
+        ``backend`` is an LLMBackend or its name ("cerebras", "mock"); by
+        default $GENERATOR_BACKEND, else cerebras, which needs CEREBRAS_API_KEY.
+
+        Requests go through a process-wide AsyncLLMClient (one pooled
+        connection set and event loop per API key): at most ``max_in_flight``
+        run at once, transient errors are retried up to ``max_retries`` times
+        with jittered exponential backoff, each request must finish within
+        ``timeout`` seconds, and identical in-flight prompts share one call.
+
+        ``context_packer`` merges and budgets retrieved chunks for
+        ``build_packed_prompt`` (default: ContextPacker()).
         """
-        api_key = os.environ.get("CEREBRAS_API_KEY")
-        if not api_key:
-            raise ValueError("❌ CEREBRAS_API_KEY environment variable not set.")
-        
-        self.client = Cerebras(api_key=api_key)
+        self.backend = make_backend(backend)
+        self.client = AsyncLLMClient.shared(
+            self.backend, max_in_flight=max_in_flight, max_retries=max_retries, timeout=timeout
+        )
         self.model_name = model_name
+        self.context_packer = context_packer or ContextPacker()
 
-    def build_prompt(self, context: list, metadata: list, question: str, history: list = None) -> list:
+    def build_prompt(self, context: list, metadata: list, question: str, history: list = None,
+                     summary: str = "") -> list:
         """
-        Build the prompt messages in OpenAI-compatible format.
+        Build the prompt messages in OpenAI-compatible format. ``summary``
+        condenses conversation turns older than ``history``.
         """
         combined_context = "\n".join(context)
         meta_info = "\n".join(metadata)
 
         messages = []
+        if summary:
+            messages.append({"role": "system", "content": f"Summary of the earlier conversation:\n{summary}"})
         if history:
             for q, a in history[-3:]:
                 messages.append({"role": "user", "content": q})
@@ -39,16 +64,62 @@ class Generator:
         messages.append({"role": "user", "content": user_message})
         return messages
 
-    def generate_answer(self, messages: list, max_tokens: int = 1024) -> str:
+    def build_packed_prompt(self, retrieved: list, question: str, history: list = None,
+                            summary: str = "") -> Tuple[list, dict]:
         """
-        Call Cerebras chat completion API.
+        build_prompt over retrieved (metadata, text) pairs packed by
+        ``self.context_packer``; returns (messages, packing stats).
         """
-        response = self.client.chat.completions.create(
-            messages=messages,
-            model=self.model_name,
-            max_tokens=max_tokens
-        )
-        # Extract the assistant's reply
-        print(response)
+        with tracer.span("generator.pack_context"):
+            texts, headers, stats = self.context_packer.pack(retrieved)
+        tracer.annotate(context_tokens=stats["tokens_after"], context_tokens_saved=stats["tokens_saved"])
+        return self.build_prompt(texts, headers, question, history, summary=summary), stats
+
+    def generate_answer(self, messages: list, max_tokens: int = 1024, timeout: Optional[float] = None) -> str:
+        """
+        Call Cerebras chat completion API. ``timeout`` overrides the client's
+        per-request deadline in seconds.
+        """
+        with tracer.span("generator.generate"):
+            return self.client.run(self.agenerate_answer(messages, max_tokens, timeout))
 
-        return response.choices[0].message.content
+    async def agenerate_answer(self, messages: list, max_tokens: int = 1024,
+                               timeout: Optional[float] = None) -> str:
+        """Async generate_answer; await it on the client loop (``self.client.run``)."""
+        return await self.client.complete(self.model_name, messages, max_tokens, timeout)
+
+    def generate_batch(self, batch: List[list], max_tokens: int = 1024, max_concurrency: int = 4,
+                       timeout: Optional[float] = None) -> List[Tuple[Optional[str], Optional[str]]]:
+        """
+        Generate answers for many prompts with at most ``max_concurrency``
+        requests in flight. Returns (answer, error) pairs in input order; a
+        failed request sets error instead of failing the batch.
+        """
+        async def run_all():
+            limit = asyncio.Semaphore(max(1, max_concurrency))
+
+            async def one(messages):
+                async with limit:
+                    try:
+                        return await self.agenerate_answer(messages, max_tokens, timeout), None
+                    except Exception as e:
+                        return None, f"{type(e).__name__}: {e}"
+
+            return await asyncio.gather(*(one(messages) for messages in batch))
+
+        with tracer.span("generator.generate_batch"):
+            return self.client.run(run_all())
+
+    def stream_answer(self, messages: list, max_tokens: int = 1024,
+                      timeout: Optional[float] = None) -> Iterator[str]:
+        """
+        Stream the chat completion, yielding content deltas as they arrive.
+        """
+        start = perf_counter_ns()
+        first = True
+        with tracer.span("generator.stream"):
+            for delta in self.client.iter_stream(self.model_name, messages, max_tokens, timeout):
+                if first and tracer.enabled:
+                    tracer.record("generator.first_token", perf_counter_ns() - start)
+                first = False
+                yield delta
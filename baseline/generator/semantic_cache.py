@@ -0,0 +1,119 @@
+import time
+import threading
+from collections import OrderedDict
+from typing import Iterable, List, Optional
+
+import numpy as np
+
+
+class SemanticAnswerCache:
+    """
+    Answer cache for paraphrased questions.
+
+    A lookup hits when a cached question's embedding has cosine similarity of
+    at least ``similarity_threshold`` with the new question AND the chunks
+    retrieved for the two questions overlap (Jaccard) by at least
+    ``min_chunk_overlap``. The second check keeps answers grounded in the same
+    context. Entries expire after ``ttl`` seconds, the least recently used
+    entry is evicted past ``capacity``, and entries are dropped when one of
+    their source documents is re-indexed (see ``invalidate_sources``).
+
+    Cached answers ignore conversation history, so the cache is opt-in.
+    """
+
+    def __init__(
+        self,
+        similarity_threshold: float = 0.92,
+        min_chunk_overlap: float = 0.6,
+        capacity: int = 512,
+        ttl: Optional[float] = 24 * 3600,
+    ):
+        self.similarity_threshold = similarity_threshold
+        self.min_chunk_overlap = min_chunk_overlap
+        self.capacity = capacity
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[int, dict]" = OrderedDict()
+        self._next_key = 0
+        self._matrix: Optional[np.ndarray] = None
+        self._keys: List[int] = []
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _unit(vector: np.ndarray) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _expire(self):
+        if self.ttl is None:
+            return
+        now = time.monotonic()
+        expired = [k for k, e in self._entries.items() if now - e["created"] > self.ttl]
+        for k in expired:
+            del self._entries[k]
+        if expired:
+            self._matrix = None
+
+    def lookup(self, vector: np.ndarray, chunk_ids: Iterable[str]) -> Optional[str]:
+        """Return a cached answer for a near-duplicate question, or None."""
+        chunk_ids = set(chunk_ids)
+        with self._lock:
+            self._expire()
+            if self._entries:
+                if self._matrix is None:
+                    self._keys = list(self._entries)
+                    self._matrix = np.stack([self._entries[k]["vector"] for k in self._keys])
+                sims = self._matrix @ self._unit(vector)
+                for i in np.argsort(-sims):
+                    if sims[i] < self.similarity_threshold:
+                        break
+                    entry = self._entries[self._keys[i]]
+                    union = chunk_ids | entry["chunk_ids"]
+                    overlap = len(chunk_ids & entry["chunk_ids"]) / len(union) if union else 1.0
+                    if overlap >= self.min_chunk_overlap:
+                        self._entries.move_to_end(self._keys[i])
+                        self.hits += 1
+                        return entry["answer"]
+            self.misses += 1
+            return None
+
+    def store(self, question: str, vector: np.ndarray, chunk_ids: Iterable[str],
+              sources: Iterable[str], answer: str):
+        with self._lock:
+            self._entries[self._next_key] = {
+                "question": question,
+                "vector": self._unit(vector),
+                "chunk_ids": set(chunk_ids),
+                "sources": set(sources),
+                "answer": answer,
+                "created": time.monotonic(),
+            }
+            self._next_key += 1
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+            self._matrix = None
+
+    def invalidate_sources(self, sources: Optional[set]):
+        """Drop entries grounded in any of ``sources``; None drops everything."""
+        with self._lock:
+            if sources is None:
+                self._entries.clear()
+            else:
+                stale = [k for k, e in self._entries.items() if e["sources"] & sources]
+                for k in stale:
+                    del self._entries[k]
+            self._matrix = None
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
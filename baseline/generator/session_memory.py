@@ -0,0 +1,149 @@
+import time
+import threading
+from collections import OrderedDict
+from typing import Callable, List, Optional, Tuple
+
+from generator.tokens import count_tokens, truncate_to_tokens
+
+# summarizer(previous summary, turns being dropped) -> new summary
+Summarizer = Callable[[str, List[Tuple[str, str]]], str]
+
+
+class _Session:
+    __slots__ = ("turns", "summary", "last_used")
+
+    def __init__(self):
+        self.turns: List[Tuple[str, str, int]] = []  # (question, answer, tokens)
+        self.summary = ""
+        self.last_used = time.monotonic()
+
+
+class SessionMemoryStore:
+    """
+    Conversation history per session id, for a Pipeline shared by many users.
+
+    Each session keeps at most ``max_turns`` recent Q/A pairs, and the turns
+    plus the summary stay within ``token_budget`` tokens (``count_tokens``). Turns
+    pushed out are dropped or, when a ``summarizer`` is given, folded into a
+    running summary of at most ``summary_tokens`` tokens, so the history part
+    of a prompt stays bounded however long a conversation runs.
+
+    Sessions idle for more than ``idle_ttl`` seconds expire, and the least
+    recently used session is evicted past ``max_sessions``.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = 1000,
+        idle_ttl: Optional[float] = 3600.0,
+        max_turns: int = 3,
+        token_budget: int = 1024,
+        summarizer: Optional[Summarizer] = None,
+        summary_tokens: int = 256,
+    ):
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.max_turns = max_turns
+        self.token_budget = token_budget
+        self.summarizer = summarizer
+        self.summary_tokens = summary_tokens
+        self.evictions = 0
+        self.summaries = 0
+        self._sessions: "OrderedDict[str, _Session]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def _expire(self, now: float):
+        if self.idle_ttl is None:
+            return
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if now - session.last_used <= self.idle_ttl:
+                break
+            del self._sessions[session_id]
+            self.evictions += 1
+
+    def _get(self, session_id: str, create: bool) -> Optional[_Session]:
+        now = time.monotonic()
+        self._expire(now)
+        session = self._sessions.get(session_id)
+        if session is None:
+            if not create:
+                return None
+            session = self._sessions[session_id] = _Session()
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.evictions += 1
+        session.last_used = now
+        self._sessions.move_to_end(session_id)
+        return session
+
+    def history(self, session_id: str) -> Tuple[str, List[Tuple[str, str]]]:
+        """(summary of older turns, recent (question, answer) pairs) for a prompt."""
+        with self._lock:
+            session = self._get(session_id, create=False)
+            if session is None:
+                return "", []
+            return session.summary, [(q, a) for q, a, _ in session.turns]
+
+    def append(self, session_id: str, question: str, answer: str):
+        """Record a turn, then trim the session back to max_turns and the token budget."""
+        with self._lock:
+            session = self._get(session_id, create=True)
+            session.turns.append((question, answer, count_tokens(question) + count_tokens(answer)))
+            dropped = []
+            used = count_tokens(session.summary) + sum(t for _, _, t in session.turns)
+            while session.turns and (len(session.turns) > self.max_turns or used > self.token_budget):
+                q, a, tokens = session.turns.pop(0)
+                dropped.append((q, a))
+                used -= tokens
+            previous = session.summary
+
+        if dropped and self.summarizer is not None:
+            # The LLM call runs outside the lock; a concurrent turn in the
+            # same session just sees the previous summary meanwhile.
+            try:
+                summary = truncate_to_tokens(self.summarizer(previous, dropped).strip(), self.summary_tokens)
+            except Exception as e:
+                print(f"[WARN] Failed to summarize conversation history: {e}")
+                return
+            with self._lock:
+                session = self._sessions.get(session_id)
+                if session is not None:
+                    session.summary = summary
+                    self.summaries += 1
+
+    def clear(self, session_id: Optional[str] = None):
+        """Forget one session, or every session when ``session_id`` is None."""
+        with self._lock:
+            if session_id is None:
+                self._sessions.clear()
+            else:
+                self._sessions.pop(session_id, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "turns": sum(len(s.turns) for s in self._sessions.values()),
+                "evictions": self.evictions,
+                "summaries": self.summaries,
+            }
+
+
+def llm_summarizer(generator, max_tokens: int = 256) -> Summarizer:
+    """A summarizer that asks ``generator``'s LLM to fold old turns into the running summary."""
+
+    def summarize(previous: str, turns: List[Tuple[str, str]]) -> str:
+        transcript = "\n".join(f"User: {q}\nAssistant: {a}" for q, a in turns)
+        content = (
+            f"Summarize this conversation in at most {max_tokens * 3 // 4} words, keeping facts, names "
+            "and open questions a follow-up question might refer to.\n\n"
+            + (f"Summary so far:\n{previous}\n\n" if previous else "")
+            + f"New turns:\n{transcript}"
+        )
+        return generator.generate_answer([{"role": "user", "content": content}], max_tokens=max_tokens)
+
+    return summarize
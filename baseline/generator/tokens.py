@@ -0,0 +1,83 @@
+import os
+import math
+import threading
+from typing import Callable
+
+# Hugging Face tokenizer behind count_tokens: the served model's by default
+# (see generator/generator.py); $RAG_TOKENIZER overrides it, and an empty
+# value keeps the character estimate.
+TOKENIZER_ENV = "RAG_TOKENIZER"
+DEFAULT_TOKENIZER = "deepseek-ai/DeepSeek-R1-Distill-Llama-70B"
+
+_tokenizer = None  # loaded on first use; False when unavailable
+_tokenizer_lock = threading.Lock()
+
+
+def _load_tokenizer(name: str):
+    try:
+        from transformers import AutoTokenizer
+        return AutoTokenizer.from_pretrained(name, use_fast=True)
+    except Exception as e:  # transformers missing, offline, or an unknown name
+        print(f"[WARN] Tokenizer '{name}' unavailable ({e}); estimating ~4 characters per token")
+        return False
+
+
+def default_tokenizer():
+    """The shared tokenizer used by count_tokens, or None when it falls back to the estimate."""
+    global _tokenizer
+    if _tokenizer is None:
+        with _tokenizer_lock:
+            if _tokenizer is None:
+                name = os.environ.get(TOKENIZER_ENV, DEFAULT_TOKENIZER)
+                _tokenizer = _load_tokenizer(name) if name else False
+    return _tokenizer or None
+
+
+def estimate_tokens(text: str) -> int:
+    """~4 characters per token for English prose; budgets built on it should leave some headroom."""
+    return math.ceil(len(text) / 4)
+
+
+def count_tokens(text: str) -> int:
+    """
+    LLM token count of ``text``: exact when the tokenizer from
+    ``default_tokenizer`` loads (transformers installed and the tokenizer
+    cached or downloadable), else ``estimate_tokens``.
+    """
+    tokenizer = default_tokenizer()
+    if tokenizer is None:
+        return estimate_tokens(text)
+    return len(tokenizer(text, add_special_tokens=False)["input_ids"])
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut ``text`` to about ``max_tokens`` tokens, at a word boundary where possible."""
+    tokenizer = default_tokenizer()
+    if tokenizer is None:
+        limit = max_tokens * 4
+    else:
+        offsets = tokenizer(text, add_special_tokens=False, return_offsets_mapping=True)["offset_mapping"]
+        # Cut where the first token past the budget starts
+        limit = offsets[max(max_tokens, 0)][0] if len(offsets) > max_tokens else len(text)
+    if len(text) <= limit:
+        return text
+    cut = text[:limit]
+    space = cut.rfind(" ")
+    return cut[:space] if space > limit // 2 else cut
+
+
+def hf_token_counter(tokenizer_name: str) -> Callable[[str], int]:
+    """
+    Exact token counts from a Hugging Face fast tokenizer (e.g. the served
+    model's). The tokenizer is loaded on first use.
+    """
+    tokenizer = None
+
+    def count(text: str) -> int:
+        nonlocal tokenizer
+        if tokenizer is None:
+            from transformers import AutoTokenizer
+            tokenizer = AutoTokenizer.from_pretrained(tokenizer_name, use_fast=True)
+        return len(tokenizer(text, add_special_tokens=False)["input_ids"])
+
+    return count
@@ -0,0 +1,150 @@
+"""
+Read, compact and export the JSONL query logs written by ``Logger``.
+
+Usage (from ``baseline/``):
+    python -m logger.log_reader export --format json --out logs/export.json
+    python -m logger.log_reader export --format csv --out logs/export.csv
+    python -m logger.log_reader compact
+"""
+import os
+import csv
+import json
+import gzip
+import argparse
+from typing import Iterator
+
+from logger.logger import rotated_segments
+
+CSV_COLUMNS = [
+    "group_id",
+    "timestamp",
+    "question",
+    "retrieved_chunks",
+    "prompt",
+    "generated_answer",
+]
+
+
+def _open_segment(path: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, "r", encoding="utf-8")
+
+
+def iter_segment(path: str) -> Iterator[dict]:
+    with _open_segment(path) as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                # a crash can leave a torn last line; skip it instead of failing the export
+                print(f"[WARN] Skipping malformed line {line_no} in {path}")
+
+
+def iter_entries(log_dir: str = "logs", include_legacy: bool = False) -> Iterator[dict]:
+    """
+    Yield every logged entry, oldest first: the legacy ``queries.json`` array
+    (if requested), rotated segments, then the active ``queries.jsonl``.
+    """
+    legacy = os.path.join(log_dir, "queries.json")
+    if include_legacy and os.path.exists(legacy):
+        with open(legacy, "r", encoding="utf-8") as f:
+            try:
+                data = json.load(f)
+            except json.JSONDecodeError:
+                data = []
+        yield from (data if isinstance(data, list) else [])
+
+    for segment in rotated_segments(log_dir):
+        yield from iter_segment(segment)
+
+    active = os.path.join(log_dir, "queries.jsonl")
+    if os.path.exists(active):
+        yield from iter_segment(active)
+
+
+def export_json(out_path: str, log_dir: str = "logs", include_legacy: bool = False) -> int:
+    """Write entries as one JSON array (the legacy ``queries.json`` format), streaming."""
+    count = 0
+    with open(out_path, "w", encoding="utf-8") as f:
+        f.write("[")
+        for entry in iter_entries(log_dir, include_legacy):
+            f.write(",\n" if count else "\n")
+            f.write(json.dumps(entry, ensure_ascii=False, indent=2))
+            count += 1
+        f.write("\n]\n" if count else "]\n")
+    return count
+
+
+def export_csv(out_path: str, log_dir: str = "logs", include_legacy: bool = False) -> int:
+    """Write entries in the legacy ``queries.csv`` layout."""
+    count = 0
+    with open(out_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_COLUMNS)
+        for entry in iter_entries(log_dir, include_legacy):
+            writer.writerow([
+                entry.get("group_id"),
+                entry.get("timestamp"),
+                entry.get("question"),
+                json.dumps(entry.get("retrieved_chunks"), ensure_ascii=False),
+                entry.get("prompt"),
+                entry.get("generated_answer"),
+            ])
+            count += 1
+    return count
+
+
+def compact(log_dir: str = "logs") -> int:
+    """
+    Merge all rotated segments into a single gzipped segment, dropping
+    malformed lines. The active ``queries.jsonl`` is left untouched.
+    """
+    segments = rotated_segments(log_dir)
+    if len(segments) < 2:
+        return 0
+    first = os.path.basename(segments[0]).split(".")[0]
+    if first.endswith("-compact"):
+        first = first[:-len("-compact")]
+    target = os.path.join(log_dir, f"{first}-compact.jsonl.gz")
+    tmp = target + ".tmp"
+    count = 0
+    with gzip.open(tmp, "wt", encoding="utf-8") as out:
+        for segment in segments:
+            for entry in iter_segment(segment):
+                out.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                count += 1
+    for segment in segments:
+        os.remove(segment)
+    os.replace(tmp, target)
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query log reader / compaction tool")
+    parser.add_argument("--log-dir", default="logs")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    exp = sub.add_parser("export", help="export logs in the legacy JSON or CSV format")
+    exp.add_argument("--format", choices=["json", "csv"], default="json")
+    exp.add_argument("--out", required=True)
+    exp.add_argument("--include-legacy", action="store_true",
+                     help="prepend entries from the old queries.json")
+
+    sub.add_parser("compact", help="merge rotated segments into one gzipped file")
+
+    args = parser.parse_args()
+    if args.command == "export":
+        export = export_json if args.format == "json" else export_csv
+        n = export(args.out, args.log_dir, args.include_legacy)
+        print(f"✅ Exported {n} entries to {args.out}")
+    else:
+        n = compact(args.log_dir)
+        print(f"✅ Compacted {n} entries")
+
+
+if __name__ == "__main__":
+    main()
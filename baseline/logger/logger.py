@@ -1,31 +1,61 @@
 import os
 import json
-import csv
+import gzip
+import queue
+import atexit
+import shutil
+import threading
 from datetime import datetime
 
+from metrics.tracing import tracer
+
+
 class Logger:
-    def __init__(self, path: str = "logs"):
+    """
+    Buffered, append-only JSONL query logger.
+
+    ``log`` only enqueues the entry; a background thread appends batches to
+    ``queries.jsonl`` every ``flush_interval`` seconds (or as soon as
+    ``batch_size`` entries are waiting), so the request path never pays for
+    file I/O. When the active file grows past ``max_bytes`` it is rotated to
+    ``queries-<timestamp>.jsonl`` (gzipped when ``compress`` is set) and the
+    oldest segments beyond ``backup_count`` are deleted.
+
+    The legacy ``queries.json`` / ``queries.csv`` formats can be exported on
+    demand with ``logger.log_reader``.
+    """
+
+    def __init__(
+        self,
+        path: str = "logs",
+        flush_interval: float = 1.0,
+        batch_size: int = 256,
+        max_bytes: int = 64 * 1024 * 1024,
+        backup_count: int = 20,
+        compress: bool = False,
+    ):
         os.makedirs(path, exist_ok=True)
-        self.csv_file = os.path.join(path, "queries.csv")
-        self.json_file = os.path.join(path, "queries.json")
-        # ensure CSV header
-        if not os.path.exists(self.csv_file):
-            with open(self.csv_file, "w", newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow([
-                    "group_id",
-                    "timestamp",
-                    "question",
-                    "retrieved_chunks",
-                    "prompt",
-                    "generated_answer"
-                ])
-        # ensure JSON file exists with empty list
-        if not os.path.exists(self.json_file):
-            with open(self.json_file, "w", encoding='utf-8') as f:
-                json.dump([], f, ensure_ascii=False, indent=2)
-
-    def log(self, question: str, retrieved: list, prompt: str, answer: str):
+        self.log_dir = path
+        self.jsonl_file = os.path.join(path, "queries.jsonl")
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.compress = compress
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._flushed = threading.Condition()
+        self._pending = 0
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, name="query-logger", daemon=True)
+        self._worker.start()
+        atexit.register(self.close)
+
+    def log(self, question: str, retrieved: list, prompt: str, answer: str, context: dict = None):
+        with tracer.span("logger.log"):
+            self._enqueue(question, retrieved, prompt, answer, context)
+
+    def _enqueue(self, question: str, retrieved: list, prompt: str, answer: str, context: dict = None):
         entry = {
             "group_id": "Team Neural Narrators",
             "timestamp": datetime.utcnow().isoformat(),
@@ -34,31 +64,81 @@ class Logger:
             "prompt": prompt,
             "generated_answer": answer,
         }
+        if context:
+            # Context packing stats (tokens before/after, tokens saved)
+            entry["context"] = context
+        with self._flushed:
+            self._pending += 1
+        self._queue.put(entry)
 
-        # append to JSON array, handling empty/corrupt files
-        with open(self.json_file, "r+", encoding='utf-8') as f:
+    def flush(self, timeout: float = None) -> bool:
+        """Block until every entry logged so far is on disk."""
+        with self._flushed:
+            return self._flushed.wait_for(lambda: self._pending == 0, timeout=timeout)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._worker.join()
+
+    def _run(self):
+        stop = False
+        while not stop:
+            batch = []
             try:
-                data = json.load(f)
-                if not isinstance(data, list):
-                    # if the file contains something other than a list, reset it
-                    data = []
-            except json.JSONDecodeError:
-                data = []
-
-            data.append(entry)
-            # rewrite the file from the start
-            f.seek(0)
-            json.dump(data, f, ensure_ascii=False, indent=2)
-            f.truncate()
-
-        # append to CSV
-        with open(self.csv_file, "a", newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            writer.writerow([
-                entry['group_id'],
-                entry['timestamp'],
-                question,
-                json.dumps(retrieved, ensure_ascii=False),
-                prompt,
-                answer,
-            ])
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            while True:
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                # Off the request path: recorded in the histograms, not on traces
+                with tracer.span("logger.write"):
+                    self._write(batch)
+
+    def _write(self, batch: list):
+        lines = "".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in batch)
+        try:
+            with open(self.jsonl_file, "a", encoding="utf-8") as f:
+                f.write(lines)
+            if os.path.getsize(self.jsonl_file) >= self.max_bytes:
+                self._rotate()
+        except OSError as e:
+            print(f"[WARN] Failed to write query log {self.jsonl_file}: {e}")
+        finally:
+            with self._flushed:
+                self._pending -= len(batch)
+                self._flushed.notify_all()
+
+    def _rotate(self):
+        stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
+        target = os.path.join(self.log_dir, f"queries-{stamp}.jsonl")
+        os.replace(self.jsonl_file, target)
+        if self.compress:
+            with open(target, "rb") as src, gzip.open(target + ".gz", "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            os.remove(target)
+
+        segments = rotated_segments(self.log_dir)
+        for old in segments[:max(0, len(segments) - self.backup_count)]:
+            os.remove(old)
+
+
+def rotated_segments(log_dir: str) -> list:
+    """Rotated ``queries-*.jsonl[.gz]`` files in ``log_dir``, oldest first."""
+    names = [
+        n for n in os.listdir(log_dir)
+        if n.startswith("queries-") and (n.endswith(".jsonl") or n.endswith(".jsonl.gz"))
+    ]
+    return [os.path.join(log_dir, n) for n in sorted(names)]
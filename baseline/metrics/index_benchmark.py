@@ -0,0 +1,135 @@
+# metrics/index_benchmark.py
+"""
+Recall-vs-latency report for the FAISS index types supported by Retriever.
+
+Every configuration is rebuilt from the same base vectors and compared to an
+exact flat search (ANN recall@k), timed per query, and sized in bytes.
+Gold-label Recall@k from metrics/recall_evaluator.py is added when benchmark
+data is given.
+
+Usage (from ``baseline/``):
+    python -m metrics.index_benchmark --k 5
+"""
+import time
+import argparse
+from typing import List, Optional, Tuple
+
+import faiss
+import numpy as np
+
+from metrics.recall_evaluator import BENCHMARK_DATA, compute_recall_at_k
+from retriever import index_factory
+
+# (index_type, build params, list of query knob settings)
+DEFAULT_CONFIGS = [
+    ("flat", {}, [{}]),
+    ("hnsw", {}, [{"ef_search": 16}, {"ef_search": 64}, {"ef_search": 128}]),
+    ("ivf_flat", {}, [{"nprobe": 1}, {"nprobe": 8}, {"nprobe": 32}]),
+    ("ivf_pq", {}, [{"nprobe": 8}, {"nprobe": 32}]),
+    ("sq8", {}, [{}]),
+]
+
+
+def _percentile(values: List[float], q: float) -> float:
+    return float(np.percentile(values, q)) if values else 0.0
+
+
+def benchmark_index_types(
+    retriever,
+    questions: List[str],
+    k: int = 5,
+    configs: Optional[list] = None,
+    benchmark_data: Optional[List[Tuple[str, List[str]]]] = None,
+    repeats: int = 3,
+) -> List[dict]:
+    """
+    Rebuild ``retriever``'s index for each configuration and measure it.
+    The original index type is restored afterwards.
+
+    Returns one dict per (index type, knobs) with ann_recall@k, p50/p95 search
+    latency in ms, index size in bytes and, with benchmark_data, recall@k.
+    """
+    if retriever.index is None:
+        raise ValueError("No documents indexed yet.")
+    configs = configs or DEFAULT_CONFIGS
+    original = (retriever.index_type, retriever.index_params)
+
+    if original[0] != "flat":
+        print(f"[WARN] Base index is '{original[0]}'; reconstructed vectors may be approximate.")
+    base = retriever.index
+    index_factory.ensure_direct_map(base)
+    vectors = base.reconstruct_n(0, base.ntotal)
+
+    query_vecs = np.vstack([retriever.embed_query(q) for q in questions])
+    exact = faiss.IndexFlatL2(vectors.shape[1])
+    exact.add(vectors)
+    _, truth = exact.search(query_vecs, k)
+
+    rows = []
+    try:
+        for index_type, params, knob_list in configs:
+            try:
+                retriever.rebuild_index(index_type, params, vectors=vectors)
+            except Exception as e:
+                print(f"[WARN] Skipping {index_type}: {e}")
+                continue
+            index = retriever.index
+            size = int(faiss.serialize_index(index).size)
+            for knobs in knob_list:
+                latencies, recalls = [], []
+                for qi in range(len(questions)):
+                    vec = query_vecs[qi:qi + 1]
+                    for _ in range(repeats):
+                        start = time.perf_counter()
+                        hits = retriever._search(vec, k, None, **knobs)
+                        latencies.append((time.perf_counter() - start) * 1000)
+                    found = {pos for pos, _ in hits}
+                    recalls.append(len(found & set(truth[qi].tolist())) / k)
+                row = {
+                    "index_type": index_type,
+                    "knobs": knobs,
+                    "params": dict(retriever.index_params),
+                    f"ann_recall@{k}": float(np.mean(recalls)) if recalls else 0.0,
+                    "p50_ms": _percentile(latencies, 50),
+                    "p95_ms": _percentile(latencies, 95),
+                    "index_bytes": size,
+                    "bytes_per_vector": size / max(index.ntotal, 1),
+                }
+                if benchmark_data:
+                    row[f"recall@{k}"] = compute_recall_at_k(retriever, benchmark_data, k=k)
+                rows.append(row)
+    finally:
+        retriever.rebuild_index(original[0], original[1], vectors=vectors)
+    return rows
+
+
+def format_report(rows: List[dict], k: int = 5) -> str:
+    header = f"{'index':<9} {'knobs':<18} {'ann_recall@' + str(k):>13} {'p50 ms':>8} {'p95 ms':>8} {'B/vector':>9}"
+    if rows and f"recall@{k}" in rows[0]:
+        header += f" {'recall@' + str(k):>9}"
+    lines = [header, "-" * len(header)]
+    for row in rows:
+        knobs = ",".join(f"{key}={val}" for key, val in row["knobs"].items()) or "-"
+        line = (f"{row['index_type']:<9} {knobs:<18} {row[f'ann_recall@{k}']:>13.3f} "
+                f"{row['p50_ms']:>8.3f} {row['p95_ms']:>8.3f} {row['bytes_per_vector']:>9.0f}")
+        if f"recall@{k}" in row:
+            line += f" {row[f'recall@{k}']:>9.2%}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    from retriever.retreiver import Retriever
+
+    parser = argparse.ArgumentParser(description="FAISS index recall-vs-latency report")
+    parser.add_argument("--embeddings-dir", default="./embeddings")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    retriever = Retriever()
+    retriever.load(args.embeddings_dir)
+    questions = [q for q, _ in BENCHMARK_DATA]
+    rows = benchmark_index_types(retriever, questions, k=args.k,
+                                 benchmark_data=BENCHMARK_DATA, repeats=args.repeats)
+    print(format_report(rows, k=args.k))
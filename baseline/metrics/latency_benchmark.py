@@ -1,7 +1,21 @@
 # metrics/latency_benchmark.py
+"""
+End-to-end Pipeline.run latency.
+
+Runs offline with the mock LLM backend (simulated latency and throughput),
+which exercises retrieval, prompt building, memory and logging for real:
+
+    GENERATOR_BACKEND=mock python -m metrics.latency_benchmark --runs 3
+
+``--trace`` adds the per-stage breakdown from metrics/tracing.py and can
+write the request traces and a Prometheus text dump.
+"""
 import time
+import argparse
 from typing import List, Tuple
 
+import numpy as np
+
 def benchmark_latency(pipeline, query: str) -> Tuple[float, str]:
     """
     Measure latency for a single query.
@@ -13,8 +27,53 @@ def benchmark_latency(pipeline, query: str) -> Tuple[float, str]:
     Returns:
         latency (seconds), answer
     """
-    start = time.time()
+    start = time.perf_counter()
     answer = pipeline.run(query)
-    end = time.time()
+    end = time.perf_counter()
     latency = end - start
     return latency, answer
+
+def benchmark_latencies(pipeline, queries: List[str], runs: int = 1) -> dict:
+    """
+    Run every query ``runs`` times and summarise latency in seconds
+    (mean, p50, p95, max).
+    """
+    latencies = [benchmark_latency(pipeline, q)[0] for _ in range(runs) for q in queries]
+    if not latencies:
+        return {"n": 0, "mean": 0.0, "p50": 0.0, "p95": 0.0, "max": 0.0}
+    return {
+        "n": len(latencies),
+        "mean": float(np.mean(latencies)),
+        "p50": float(np.percentile(latencies, 50)),
+        "p95": float(np.percentile(latencies, 95)),
+        "max": float(np.max(latencies)),
+    }
+
+
+if __name__ == "__main__":
+    from pipeline import Pipeline
+    from metrics.recall_evaluator import BENCHMARK_DATA
+
+    parser = argparse.ArgumentParser(description="End-to-end Pipeline latency")
+    parser.add_argument("--backend", default=None, help="generator backend: cerebras or mock "
+                                                        "(default: $GENERATOR_BACKEND, else cerebras)")
+    parser.add_argument("--runs", type=int, default=1)
+    parser.add_argument("--trace", action="store_true", help="print per-stage span timings")
+    parser.add_argument("--traces-out", default=None, help="append request traces to this JSONL file")
+    parser.add_argument("--prometheus-out", default=None, help="write span histograms in Prometheus format")
+    args = parser.parse_args()
+
+    trace = args.trace or bool(args.traces_out or args.prometheus_out)
+    pipe = Pipeline(generator_backend=args.backend, trace=trace)
+    pipe.tracer.reset()  # drop startup/indexing spans
+    stats = benchmark_latencies(pipe, [q for q, _ in BENCHMARK_DATA], runs=args.runs)
+    print(f"n={stats['n']}  mean={stats['mean']:.3f}s  p50={stats['p50']:.3f}s  "
+          f"p95={stats['p95']:.3f}s  max={stats['max']:.3f}s")
+    if trace:
+        print()
+        print(pipe.tracer.format_summary())
+    if args.prometheus_out:
+        with open(args.prometheus_out, "w", encoding="utf-8") as f:
+            f.write(pipe.tracer.prometheus_text())
+    if args.traces_out:
+        print(f"Wrote {pipe.tracer.export_traces(args.traces_out)} traces to {args.traces_out}")
@@ -0,0 +1,319 @@
+# metrics/load_benchmark.py
+"""
+Load generation against Pipeline.run.
+
+Questions come from the query logs (``logs/queries.jsonl`` and rotated
+segments, or an exported ``queries.csv``) or are synthesised from indexed
+chunks. Each scenario replays them either closed-loop at a fixed
+concurrency or open-loop at a fixed arrival rate (QPS; latency then counts
+from the scheduled arrival, so queueing delay is included). Every scenario
+runs a cold phase (in-memory retrieval/answer caches cleared) and a warm
+phase (same questions again) and records:
+
+- latency p50/p95/p99/mean/max and throughput
+- errors
+- resident memory (current and peak RSS)
+- per-stage span timings from metrics/tracing.py
+
+Sweeps over corpus size (number of source files, re-indexed with the
+pipeline's embedder) and top_k are supported. Results are written as JSON,
+and ``--compare`` prints p95 / throughput deltas against an earlier run.
+
+Usage (from ``baseline/``, offline with the mock LLM):
+    GENERATOR_BACKEND=mock python -m metrics.load_benchmark --concurrency 1,4,8 --top-k 3,5 \\
+        --requests 50 --out logs/load.json
+    GENERATOR_BACKEND=mock python -m metrics.load_benchmark --qps 5 --duration 20 --compare logs/load.json
+"""
+import os
+import csv
+import json
+import time
+import random
+import argparse
+import platform
+import threading
+import subprocess
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+import numpy as np
+
+from metrics.tracing import tracer
+
+
+def load_logged_questions(source: str = "logs", limit: Optional[int] = None) -> List[str]:
+    """Questions from a log directory (JSONL segments) or an exported CSV/JSON file."""
+    if os.path.isdir(source):
+        from logger.log_reader import iter_entries
+        questions = [e.get("question") for e in iter_entries(source, include_legacy=True)]
+    elif source.endswith(".csv"):
+        with open(source, "r", encoding="utf-8", newline="") as f:
+            questions = [row.get("question") for row in csv.DictReader(f)]
+    else:
+        with open(source, "r", encoding="utf-8") as f:
+            questions = [e.get("question") for e in json.load(f)]
+    questions = [q for q in questions if q and q.strip()]
+    return questions[:limit] if limit else questions
+
+
+def synthetic_questions(retriever, n: int = 50, words: int = 6, seed: int = 0) -> List[str]:
+    """Questions built from word windows of randomly chosen indexed chunks."""
+    rng = random.Random(seed)
+    total = len(retriever.chunks)
+    if not total:
+        return []
+    questions = []
+    for _ in range(n):
+        tokens = retriever.chunks.text(rng.randrange(total)).split()
+        start = rng.randrange(max(1, len(tokens) - words))
+        questions.append(f"What does the document say about {' '.join(tokens[start:start + words])}?")
+    return questions
+
+
+def rss_mb() -> float:
+    """Current resident set size in MB (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError, AttributeError):
+        return peak_rss_mb()
+
+
+def peak_rss_mb() -> float:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2 ** 20 if platform.system() == "Darwin" else peak / 1024
+
+
+def _latency_stats(latencies: List[float]) -> dict:
+    if not latencies:
+        return {"p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0, "mean_ms": 0.0, "max_ms": 0.0}
+    ms = np.asarray(latencies) * 1000
+    return {
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "mean_ms": float(ms.mean()),
+        "max_ms": float(ms.max()),
+    }
+
+
+def run_load(pipeline, questions: List[str], concurrency: Optional[int] = None, qps: Optional[float] = None,
+             requests: Optional[int] = None, duration: Optional[float] = None, max_in_flight: int = 64) -> dict:
+    """
+    Replay ``questions`` (cycled) against ``pipeline.run``.
+
+    With ``qps`` requests arrive open-loop at that rate for ``duration``
+    seconds (or ``requests`` arrivals) using up to ``max_in_flight`` threads;
+    otherwise ``concurrency`` workers run closed-loop until ``requests`` are
+    done. Returns latency stats, throughput, error count and per-stage spans.
+    """
+    if not questions:
+        raise ValueError("No questions to replay.")
+    if qps:
+        requests = requests or max(1, int(qps * (duration or 10)))
+    else:
+        concurrency = concurrency or 1
+        requests = requests or len(questions)
+
+    latencies, errors = [], []
+    lock = threading.Lock()
+
+    def one(i: int, scheduled: float):
+        try:
+            pipeline.run(questions[i % len(questions)])
+            error = None
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        done = time.perf_counter()
+        with lock:
+            latencies.append(done - scheduled)
+            if error:
+                errors.append(error)
+
+    tracer.reset()
+    start = time.perf_counter()
+    if qps:
+        with ThreadPoolExecutor(max_workers=max_in_flight) as pool:
+            for i in range(requests):
+                scheduled = start + i / qps
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                pool.submit(one, i, scheduled)
+    else:
+        counter = iter(range(requests))
+
+        def worker():
+            for i in counter:  # range iterators hand out each index once, even across threads
+                one(i, time.perf_counter())
+
+        threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    elapsed = time.perf_counter() - start
+
+    return dict(
+        {"requests": requests, "errors": len(errors), "elapsed_s": elapsed,
+         "throughput_qps": len(latencies) / elapsed if elapsed else 0.0},
+        **_latency_stats(latencies),
+        rss_mb=rss_mb(),
+        peak_rss_mb=peak_rss_mb(),
+        stages=tracer.summary(),
+        sample_errors=errors[:5],
+    )
+
+
+def clear_caches(pipeline):
+    """Drop in-memory retrieval and answer caches (the on-disk query cache is kept)."""
+    pipeline.retriever.result_cache.clear()
+    pipeline.retriever.query_cache.memory.clear()
+    if pipeline.answer_cache is not None:
+        pipeline.answer_cache.invalidate_sources(None)
+    pipeline.memory.clear()
+
+
+def _subset_retriever(pipeline, paths: List[str]):
+    from retriever.retreiver import Retriever
+
+    base = pipeline.retriever
+    retriever = Retriever(
+        embed_model_name=base.embed_model_name,
+        chunk_size=base.chunk_size,
+        chunk_overlap=base.chunk_overlap,
+        ingest_workers=base.ingest_workers,
+        index_type=base.index_type,
+        index_params=base.index_params,
+        embedder=base.embedder,
+    )
+    retriever.add_documents(paths)
+    return retriever
+
+
+def run_suite(pipeline, questions: List[str], concurrency: List[int] = None, qps: List[float] = None,
+              top_k: List[int] = None, corpus_sizes: List[Optional[int]] = None,
+              requests: Optional[int] = None, duration: Optional[float] = None) -> List[dict]:
+    """
+    Run every (corpus size, top_k, load level) scenario, cold then warm.
+    A corpus size of None keeps the pipeline's loaded index.
+    """
+    was_enabled = tracer.enabled
+    tracer.enable()
+    original = (pipeline.retriever, pipeline.top_k)
+    loads = [("qps", q) for q in (qps or [])] or [("concurrency", c) for c in (concurrency or [1])]
+    paths = pipeline._document_paths()
+    results = []
+    try:
+        for size in corpus_sizes or [None]:
+            if size is None:
+                pipeline.retriever = original[0]
+            else:
+                print(f"⚙️  Indexing {min(size, len(paths))} file(s) for the corpus-size sweep...")
+                pipeline.retriever = _subset_retriever(pipeline, paths[:size])
+            chunks = len(pipeline.retriever.chunks)
+            for k in top_k or [original[1]]:
+                pipeline.top_k = k
+                for kind, level in loads:
+                    clear_caches(pipeline)
+                    for phase in ("cold", "warm"):
+                        kwargs = {"qps": level} if kind == "qps" else {"concurrency": level}
+                        row = run_load(pipeline, questions, requests=requests, duration=duration, **kwargs)
+                        row.update({"corpus_files": size or len(paths), "corpus_chunks": chunks,
+                                    "top_k": k, kind: level, "phase": phase})
+                        results.append(row)
+                        print(f"files={row['corpus_files']:<4} top_k={k:<3} {kind}={level:<5} {phase:<5} "
+                              f"p50={row['p50_ms']:.1f}ms p95={row['p95_ms']:.1f}ms p99={row['p99_ms']:.1f}ms "
+                              f"thr={row['throughput_qps']:.2f}/s err={row['errors']} rss={row['rss_mb']:.0f}MB")
+    finally:
+        pipeline.retriever, pipeline.top_k = original
+        tracer.enabled = was_enabled
+    return results
+
+
+def _scenario_key(row: dict) -> tuple:
+    return (row["corpus_files"], row["top_k"], row.get("qps"), row.get("concurrency"), row["phase"])
+
+
+def compare(old: List[dict], new: List[dict]) -> str:
+    """Per-scenario p95 and throughput change of ``new`` relative to ``old``."""
+    previous = {_scenario_key(r): r for r in old}
+    lines = [f"{'scenario':<40} {'p95 ms':>16} {'change':>8} {'qps':>14} {'change':>8}"]
+    for row in new:
+        before = previous.get(_scenario_key(row))
+        if before is None:
+            continue
+        files, k, qps, conc, phase = _scenario_key(row)
+        name = f"files={files} k={k} " + (f"qps={qps}" if qps else f"c={conc}") + f" {phase}"
+        p95 = (row["p95_ms"] / before["p95_ms"] - 1) * 100 if before["p95_ms"] else 0.0
+        thr = (row["throughput_qps"] / before["throughput_qps"] - 1) * 100 if before["throughput_qps"] else 0.0
+        lines.append(f"{name:<40} {before['p95_ms']:>7.1f}→{row['p95_ms']:<8.1f} {p95:>+7.1f}% "
+                     f"{before['throughput_qps']:>6.2f}→{row['throughput_qps']:<7.2f} {thr:>+7.1f}%")
+    return "\n".join(lines)
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v]
+
+
+if __name__ == "__main__":
+    from pipeline import Pipeline
+
+    parser = argparse.ArgumentParser(description="Load-generation benchmark for Pipeline.run")
+    parser.add_argument("--backend", default=None, help="generator backend (default: $GENERATOR_BACKEND)")
+    parser.add_argument("--questions", default=None,
+                        help="log directory or exported queries.csv/json to replay (default: synthetic)")
+    parser.add_argument("--synthetic", type=int, default=50, help="number of synthetic questions")
+    parser.add_argument("--concurrency", type=_int_list, default=[1], help="closed-loop levels, e.g. 1,4,8")
+    parser.add_argument("--qps", type=lambda v: [float(x) for x in v.split(",") if x], default=None,
+                        help="open-loop arrival rates, e.g. 2,5 (overrides --concurrency)")
+    parser.add_argument("--requests", type=int, default=None, help="requests per phase")
+    parser.add_argument("--duration", type=float, default=None, help="seconds per phase for --qps")
+    parser.add_argument("--top-k", type=_int_list, default=None, help="top_k values, e.g. 3,5,10")
+    parser.add_argument("--corpus-sizes", type=_int_list, default=None,
+                        help="numbers of source files to index, e.g. 1,2 (default: loaded index)")
+    parser.add_argument("--out", default=None, help="write results JSON here")
+    parser.add_argument("--compare", default=None, help="earlier results JSON to compare against")
+    args = parser.parse_args()
+
+    pipe = Pipeline(generator_backend=args.backend, trace=True)
+    if args.questions:
+        qs = load_logged_questions(args.questions)
+    else:
+        qs = synthetic_questions(pipe.retriever, args.synthetic)
+
+    rows = run_suite(pipe, qs, concurrency=args.concurrency, qps=args.qps, top_k=args.top_k,
+                     corpus_sizes=args.corpus_sizes, requests=args.requests, duration=args.duration)
+    report = {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat(),
+            "git_revision": _git_revision(),
+            "backend": pipe.generator.backend.name,
+            "index_type": pipe.retriever.index_type,
+            "questions": len(qs),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+        },
+        "scenarios": rows,
+    }
+    if args.out:
+        os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Wrote {len(rows)} scenarios to {args.out}")
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            print(compare(json.load(f)["scenarios"], rows))
@@ -0,0 +1,66 @@
+# metrics/ranking_metrics.py
+"""
+Vectorised ranking metrics over a whole query set.
+
+Retrieved ids are turned into one boolean relevance matrix (queries x rank)
+and every metric is computed with NumPy reductions over it, so scoring
+thousands of queries at several k costs a few array operations.
+"""
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+
+def relevance_matrix(retrieved: Sequence[Sequence[str]], gold: Sequence[Sequence[str]],
+                     depth: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Return (rel, n_gold): rel[q, r] is True when the rank-r result of query q
+    is a gold id (ranks beyond the results are False), n_gold[q] the number of
+    distinct gold ids of query q.
+    """
+    rel = np.zeros((len(retrieved), depth), dtype=bool)
+    for q, (ids, gold_ids) in enumerate(zip(retrieved, gold)):
+        gold_set = set(gold_ids)
+        rel[q, :min(depth, len(ids))] = [doc_id in gold_set for doc_id in list(ids)[:depth]]
+    n_gold = np.array([len(set(g)) for g in gold], dtype=np.float64)
+    return rel, n_gold
+
+
+def metrics_at_k(rel: np.ndarray, n_gold: np.ndarray, k: int) -> Dict[str, float]:
+    """
+    Mean hit_rate (binary recall: any gold id retrieved), precision, recall,
+    F1, MRR and nDCG at k over all queries.
+    """
+    if rel.shape[0] == 0:
+        return {name: 0.0 for name in ("hit_rate", "precision", "recall", "f1", "mrr", "ndcg")}
+    hits = rel[:, :k]
+    tp = hits.sum(axis=1).astype(np.float64)
+    precision = tp / k
+    recall = np.divide(tp, n_gold, out=np.zeros_like(tp), where=n_gold > 0)
+    denom = precision + recall
+    f1 = np.divide(2 * precision * recall, denom, out=np.zeros_like(tp), where=denom > 0)
+
+    found = hits.any(axis=1)
+    first = hits.argmax(axis=1)
+    mrr = np.where(found, 1.0 / (first + 1), 0.0)
+
+    discounts = 1.0 / np.log2(np.arange(2, hits.shape[1] + 2))
+    dcg = (hits * discounts).sum(axis=1)
+    ideal = np.minimum(n_gold, hits.shape[1]).astype(int)
+    idcg = np.concatenate([[0.0], np.cumsum(discounts)])[ideal]
+    ndcg = np.divide(dcg, idcg, out=np.zeros_like(dcg), where=idcg > 0)
+
+    return {
+        "hit_rate": float(found.mean()),
+        "precision": float(precision.mean()),
+        "recall": float(recall.mean()),
+        "f1": float(f1.mean()),
+        "mrr": float(mrr.mean()),
+        "ndcg": float(ndcg.mean()),
+    }
+
+
+def evaluate_rankings(retrieved: List[List[str]], gold: List[List[str]], ks: Sequence[int]) -> Dict[int, dict]:
+    """metrics_at_k for every k in ``ks`` from one relevance matrix."""
+    rel, n_gold = relevance_matrix(retrieved, gold, max(ks))
+    return {k: metrics_at_k(rel, n_gold, k) for k in ks}
@@ -1,18 +1,50 @@
 from typing import List, Tuple
 
-def _retrieve_doc_ids(retriever, question: str, k: int) -> List[str]:
-    """Helper function to retrieve document IDs from retriever."""
-    results = retriever.query(question, top_k=k)
+# Curated questions mapped to gold chunk ids (used by the Streamlit dashboard
+# and metrics/index_benchmark.py)
+BENCHMARK_DATA = [
+    (
+        "What is the role of cyber security in information technology?",
+        ["A_Study_Of_Cyber_Security_Challenges_And_Its_Emerg_chunk0"]
+    ),
+    (
+        "What are the major challenges faced by cyber security today?",
+        ["A_Study_Of_Cyber_Security_Challenges_And_Its_Emerg_chunk0"]
+    ),
+    (
+        "What is the first thing that comes to mind when thinking about cyber security?",
+        ["A_Study_Of_Cyber_Security_Challenges_And_Its_Emerg_chunk0"]
+    ),
+    (
+        "How are governments and companies trying to prevent cyber crimes?",
+        ["A_Study_Of_Cyber_Security_Challenges_And_Its_Emerg_chunk0"]
+    ),
+    (
+        "What does this paper focus on regarding cyber security?",
+        ["A_Study_Of_Cyber_Security_Challenges_And_Its_Emerg_chunk0"]
+    )
+]
+
+def _doc_ids(results) -> List[str]:
     return [
         meta["source"].replace(".pdf", "").replace(".md", "").replace(".txt", "") +
         f"_chunk{meta.get('chunk_id', meta.get('row_id', 0))}"
         for (meta, _) in results
     ]
 
+def _retrieve_doc_ids(retriever, question: str, k: int) -> List[str]:
+    """Helper function to retrieve document IDs from retriever."""
+    return _doc_ids(retriever.query(question, top_k=k))
+
+def _retrieve_doc_ids_batch(retriever, questions: List[str], k: int) -> List[List[str]]:
+    """Retrieve document IDs for all questions with one batched query."""
+    return [_doc_ids(results) for results in retriever.query_batch(questions, top_k=k)]
+
 def compute_recall_at_k(
     retriever,
     benchmark_data: List[Tuple[str, List[str]]],
-    k: int = 5
+    k: int = 5,
+    verbose: bool = False
 ) -> float:
     """
     Compute Recall@k for benchmark queries (binary version: 1 if any relevant doc is retrieved).
@@ -21,6 +53,7 @@ def compute_recall_at_k(
         retriever: your Retriever instance
         benchmark_data: list of (question, list of gold doc_ids)
         k: number of top documents to retrieve
+        verbose: print gold and retrieved ids per question
 
     Returns:
         recall@k value (0.0 - 1.0)
@@ -28,12 +61,12 @@ def compute_recall_at_k(
     hits = 0
     total = len(benchmark_data)
 
-    for question, gold_doc_ids in benchmark_data:
-        retrieved_ids = _retrieve_doc_ids(retriever, question, k)
-
-        print(f"Question: {question}")
-        print(f"Gold IDs: {gold_doc_ids}")
-        print(f"Retrieved IDs: {retrieved_ids}\n")
+    retrieved_all = _retrieve_doc_ids_batch(retriever, [q for q, _ in benchmark_data], k)
+    for (question, gold_doc_ids), retrieved_ids in zip(benchmark_data, retrieved_all):
+        if verbose:
+            print(f"Question: {question}")
+            print(f"Gold IDs: {gold_doc_ids}")
+            print(f"Retrieved IDs: {retrieved_ids}\n")
 
         if any(doc_id in retrieved_ids for doc_id in gold_doc_ids):
             hits += 1
@@ -65,8 +98,8 @@ def compute_precision_recall_f1_at_k(
     if total_queries == 0:
         return 0.0, 0.0, 0.0
 
-    for question, gold_doc_ids in benchmark_data:
-        retrieved_ids = _retrieve_doc_ids(retriever, question, k)
+    retrieved_all = _retrieve_doc_ids_batch(retriever, [q for q, _ in benchmark_data], k)
+    for (question, gold_doc_ids), retrieved_ids in zip(benchmark_data, retrieved_all):
         gold_set = set(gold_doc_ids)
         retrieved_set = set(retrieved_ids)
         
@@ -102,8 +135,8 @@ def compute_precision_at_k(retriever, benchmark_data, k=5) -> float:
     precision, _, _ = compute_precision_recall_f1_at_k(retriever, benchmark_data, k)
     return precision
 
-def compute_recall_at_k(retriever, benchmark_data, k=5) -> float:
-    """Compute average Recall@k"""
+def compute_macro_recall_at_k(retriever, benchmark_data, k=5) -> float:
+    """Compute average Recall@k (fraction of gold ids found; see compute_recall_at_k for the binary version)"""
     _, recall, _ = compute_precision_recall_f1_at_k(retriever, benchmark_data, k)
     return recall
 
@@ -0,0 +1,136 @@
+# metrics/startup_profile.py
+"""
+Cold-start profile of the Pipeline, for tracking startup regressions.
+
+    python -m metrics.startup_profile --backend mock --out startup.json
+    python -m metrics.startup_profile --backend mock --warm-up --compare startup.json
+
+Reports
+- import time of ``pipeline`` and, per top-level package, of everything it
+  pulls in (``python -X importtime`` in a fresh interpreter)
+- the phases recorded in ``Pipeline.startup`` (retriever/generator
+  construction, index load, total, and warm-up when enabled)
+- embedding model load time and the first retrieval, which pays for lazily
+  loaded models unless ``--warm-up`` ran first
+
+Run from the baseline directory, like the other metrics modules.
+"""
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import subprocess
+from collections import defaultdict
+from typing import Optional
+
+BASELINE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_IMPORTTIME_RE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def import_times(module: str = "pipeline", top: int = 15) -> dict:
+    """
+    Import ``module`` in a fresh interpreter and return {"total_s", "packages":
+    [(package, seconds), ...]} with the ``top`` slowest top-level packages
+    (self time of all their submodules).
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BASELINE_DIR, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    packages = defaultdict(int)
+    total_us = 0
+    for line in proc.stderr.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, _, name = match.groups()
+        packages[name.split(".")[0]] += int(self_us)
+        if name == module:
+            total_us = int(cumulative_us)
+    slowest = sorted(packages.items(), key=lambda item: -item[1])[:top]
+    return {"total_s": total_us / 1e6, "packages": [(name, us / 1e6) for name, us in slowest]}
+
+
+def profile_startup(backend: Optional[str] = None, warm_up: bool = False,
+                    question: str = "What is cyber security?") -> dict:
+    """Construct a Pipeline in this process and time each startup step."""
+    start = time.perf_counter()
+    from pipeline import Pipeline
+    import_s = time.perf_counter() - start
+
+    pipe = Pipeline(generator_backend=backend, warm_up=warm_up)
+    constructed_s = time.perf_counter() - start
+    if warm_up:
+        pipe.wait_until_ready()
+    ready_s = time.perf_counter() - start
+
+    first = time.perf_counter()
+    pipe.retrieve(question)
+    first_retrieve_s = time.perf_counter() - first
+
+    return {
+        "import_s": import_s,
+        "phases": dict(pipe.startup),
+        "constructed_s": constructed_s,
+        "ready_s": ready_s,
+        "model_load_s": pipe.retriever.embedder.load_seconds,
+        "first_retrieve_s": first_retrieve_s,
+        "first_request_ready_s": ready_s + first_retrieve_s,
+        "warm_up": warm_up,
+    }
+
+
+def format_profile(profile: dict) -> str:
+    lines = [f"import pipeline (fresh interpreter): {profile['imports']['total_s']:.3f}s"]
+    lines += [f"  {name:<28} {seconds:>8.3f}s" for name, seconds in profile["imports"]["packages"]]
+    startup = profile["startup"]
+    lines.append("Pipeline startup:")
+    lines += [f"  {name:<28} {seconds:>8.3f}s" for name, seconds in startup["phases"].items()
+              if seconds is not None]
+    for key in ("constructed_s", "ready_s", "model_load_s", "first_retrieve_s", "first_request_ready_s"):
+        if startup[key] is not None:
+            lines.append(f"  {key:<28} {startup[key]:>8.3f}s")
+    return "\n".join(lines)
+
+
+def compare(baseline: dict, current: dict, tolerance: float = 0.2) -> str:
+    """Side-by-side startup timings; rows slower by more than ``tolerance`` are flagged."""
+    rows = [("import pipeline", baseline["imports"]["total_s"], current["imports"]["total_s"])]
+    for key in ("constructed_s", "model_load_s", "first_request_ready_s"):
+        rows.append((key, baseline["startup"].get(key), current["startup"].get(key)))
+    lines = [f"{'':<24} {'baseline':>10} {'current':>10} {'change':>8}"]
+    for name, old, new in rows:
+        if old is None or new is None:
+            continue
+        change = (new - old) / old if old else 0.0
+        flag = "  ⚠️ regression" if change > tolerance else ""
+        lines.append(f"{name:<24} {old:>9.3f}s {new:>9.3f}s {change:>+7.0%}{flag}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pipeline cold-start profile")
+    parser.add_argument("--backend", default=None, help="generator backend: cerebras or mock "
+                                                        "(default: $GENERATOR_BACKEND, else cerebras)")
+    parser.add_argument("--warm-up", action="store_true", help="start the Pipeline with background warm-up")
+    parser.add_argument("--top", type=int, default=15, help="slowest packages to list")
+    parser.add_argument("--out", default=None, help="write the profile as JSON")
+    parser.add_argument("--compare", default=None, help="baseline profile JSON to compare against")
+    args = parser.parse_args()
+
+    # Import timing first, in a child process, while this one has imported nothing heavy
+    result = {"imports": import_times("pipeline", args.top)}
+    result["startup"] = profile_startup(args.backend, args.warm_up)
+    print(format_profile(result))
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            print()
+            print(compare(json.load(f), result))
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"✅ Wrote startup profile to {args.out}")
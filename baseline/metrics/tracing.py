@@ -0,0 +1,290 @@
+# metrics/tracing.py
+"""
+Lightweight span timing for the request path.
+
+    from metrics.tracing import tracer
+
+    with tracer.trace("pipeline.run", question=q):    # one trace per request
+        with tracer.span("retriever.search"):          # nested stages
+            ...
+
+Every span feeds a per-name histogram (p50/p95/p99 via ``summary()``, a
+Prometheus text dump via ``prometheus_text()``); spans opened inside a
+``trace`` are also recorded on that request's trace, which can be exported
+as JSON lines. Timing uses ``time.perf_counter_ns``.
+
+The module-level ``tracer`` is disabled unless RAG_TRACE=1 or ``enable()``
+is called; disabled, ``span``/``trace`` return a shared no-op context
+manager, so instrumented code costs one attribute check per span.
+"""
+import os
+import json
+import math
+import uuid
+import threading
+import contextvars
+from collections import deque
+from time import perf_counter_ns, time
+from typing import Dict, List, Optional
+
+# Histogram buckets grow by 2**(1/4) from 1 µs; Prometheus output uses every
+# 4th boundary (powers of two in µs), up to ~134 s.
+_BUCKETS_PER_OCTAVE = 4
+_OCTAVES = 27
+_BOUNDS_NS = [1000 * 2 ** (i / _BUCKETS_PER_OCTAVE) for i in range(_OCTAVES * _BUCKETS_PER_OCTAVE + 1)]
+
+_current_trace: contextvars.ContextVar = contextvars.ContextVar("rag_trace", default=None)
+# Nesting depth of the current span within its trace. It lives next to the
+# trace rather than on it, so concurrent coroutines of one request each
+# keep their own depth.
+_span_depth: contextvars.ContextVar = contextvars.ContextVar("rag_span_depth", default=0)
+
+
+class Histogram:
+    """Log-bucketed latency histogram; quantiles are interpolated within a bucket."""
+
+    def __init__(self):
+        self.counts = [0] * (len(_BOUNDS_NS) + 1)  # last bucket: overflow
+        self.count = 0
+        self.sum_ns = 0
+        self.min_ns: Optional[int] = None
+        self.max_ns = 0
+
+    def add(self, ns: int):
+        if ns <= _BOUNDS_NS[0]:
+            i = 0
+        else:
+            i = min(math.ceil(_BUCKETS_PER_OCTAVE * math.log2(ns / 1000)), len(_BOUNDS_NS))
+        self.counts[i] += 1
+        self.count += 1
+        self.sum_ns += ns
+        self.min_ns = ns if self.min_ns is None else min(self.min_ns, ns)
+        self.max_ns = max(self.max_ns, ns)
+
+    def quantile(self, q: float) -> float:
+        """Estimated q-quantile in nanoseconds."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                lower = _BOUNDS_NS[i - 1] if i > 0 else 0.0
+                upper = _BOUNDS_NS[i] if i < len(_BOUNDS_NS) else self.max_ns
+                lower, upper = max(lower, self.min_ns), min(upper, self.max_ns)
+                return lower + (upper - lower) * (rank - seen) / n
+            seen += n
+        return float(self.max_ns)
+
+
+class Trace:
+    """Spans of one request, as (name, start offset, duration, depth) records."""
+
+    def __init__(self, name: str, attrs: dict):
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.name = name
+        self.attrs = attrs
+        self.timestamp = time()
+        self.start_ns = perf_counter_ns()
+        self.duration_ns = 0
+        self.spans: List[tuple] = []
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "timestamp": self.timestamp,
+            "duration_ms": self.duration_ns / 1e6,
+            "attrs": self.attrs,
+            "spans": [
+                {"name": name, "start_ms": start / 1e6, "duration_ms": dur / 1e6, "depth": depth}
+                for name, start, dur, depth in self.spans
+            ],
+        }
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+def _reset(var: contextvars.ContextVar, token):
+    try:
+        var.reset(token)
+    except ValueError:
+        pass  # exited in another context, e.g. a traced generator closed by the garbage collector
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "start", "trace", "depth", "token")
+
+    def __init__(self, tracer: "Tracer", name: str):
+        self.tracer = tracer
+        self.name = name
+
+    def __enter__(self):
+        self.trace = _current_trace.get()
+        if self.trace is not None:
+            self.depth = _span_depth.get()
+            self.token = _span_depth.set(self.depth + 1)
+        self.start = perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        end = perf_counter_ns()
+        self.tracer.record(self.name, end - self.start)
+        if self.trace is not None:
+            _reset(_span_depth, self.token)
+            self.trace.spans.append((self.name, self.start - self.trace.start_ns, end - self.start,
+                                     self.depth))
+        return False
+
+
+class _TraceScope:
+    __slots__ = ("tracer", "trace", "token", "depth_token")
+
+    def __init__(self, tracer: "Tracer", trace: Trace):
+        self.tracer = tracer
+        self.trace = trace
+
+    def __enter__(self) -> Trace:
+        self.token = _current_trace.set(self.trace)
+        self.depth_token = _span_depth.set(0)
+        self.trace.start_ns = perf_counter_ns()
+        return self.trace
+
+    def __exit__(self, *exc):
+        trace = self.trace
+        trace.duration_ns = perf_counter_ns() - trace.start_ns
+        _reset(_current_trace, self.token)
+        _reset(_span_depth, self.depth_token)
+        if exc[0] is not None:
+            trace.attrs["error"] = f"{exc[0].__name__}: {exc[1]}"
+        trace.spans.sort(key=lambda s: s[1])
+        self.tracer.record(trace.name, trace.duration_ns)
+        self.tracer.finish_trace(trace)
+        return False
+
+
+class Tracer:
+    """
+    Span histograms plus a ring buffer of the last ``max_traces`` request
+    traces. Thread-safe; traces follow contextvars, so spans opened in
+    coroutines submitted from a traced request land on its trace too.
+    """
+
+    def __init__(self, enabled: bool = False, max_traces: int = 1000):
+        self.enabled = enabled
+        self.histograms: Dict[str, Histogram] = {}
+        self.traces: "deque[Trace]" = deque(maxlen=max_traces)
+        self._lock = threading.Lock()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        with self._lock:
+            self.histograms = {}
+            self.traces.clear()
+
+    def span(self, name: str):
+        """Context manager timing one stage."""
+        if not self.enabled:
+            return _NOOP
+        return _Span(self, name)
+
+    def trace(self, name: str, **attrs):
+        """Context manager for one request; yields its Trace (None when disabled)."""
+        if not self.enabled:
+            return _NOOP
+        return _TraceScope(self, Trace(name, attrs))
+
+    def annotate(self, **attrs):
+        """Attach attributes to the current request's trace, if any."""
+        trace = _current_trace.get() if self.enabled else None
+        if trace is not None:
+            trace.attrs.update(attrs)
+
+    def record(self, name: str, duration_ns: int):
+        """Add a duration measured elsewhere (e.g. on a background thread)."""
+        with self._lock:
+            hist = self.histograms.get(name)
+            if hist is None:
+                hist = self.histograms[name] = Histogram()
+            hist.add(duration_ns)
+
+    def finish_trace(self, trace: Trace):
+        with self._lock:
+            self.traces.append(trace)
+
+    def last_trace(self) -> Optional[dict]:
+        with self._lock:
+            return self.traces[-1].to_dict() if self.traces else None
+
+    def summary(self) -> Dict[str, dict]:
+        """Per span: count, mean and p50/p95/p99/max in milliseconds."""
+        with self._lock:
+            items = sorted(self.histograms.items())
+            return {
+                name: {
+                    "count": hist.count,
+                    "mean_ms": hist.sum_ns / hist.count / 1e6,
+                    "p50_ms": hist.quantile(0.50) / 1e6,
+                    "p95_ms": hist.quantile(0.95) / 1e6,
+                    "p99_ms": hist.quantile(0.99) / 1e6,
+                    "max_ms": hist.max_ns / 1e6,
+                }
+                for name, hist in items
+            }
+
+    def format_summary(self) -> str:
+        header = f"{'span':<28} {'count':>7} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+        lines = [header, "-" * len(header)]
+        for name, s in self.summary().items():
+            lines.append(f"{name:<28} {s['count']:>7} {s['mean_ms']:>9.3f} {s['p50_ms']:>9.3f} "
+                         f"{s['p95_ms']:>9.3f} {s['p99_ms']:>9.3f}")
+        return "\n".join(lines)
+
+    def export_traces(self, path: str) -> int:
+        """Append buffered traces to a JSONL file and clear the buffer; returns the count."""
+        with self._lock:
+            traces = list(self.traces)
+            self.traces.clear()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            for trace in traces:
+                f.write(json.dumps(trace.to_dict(), ensure_ascii=False) + "\n")
+        return len(traces)
+
+    def prometheus_text(self, metric: str = "rag_span_duration_seconds") -> str:
+        """Histograms in the Prometheus text exposition format."""
+        lines = [
+            f"# HELP {metric} Time spent in each instrumented stage.",
+            f"# TYPE {metric} histogram",
+        ]
+        with self._lock:
+            for name, hist in sorted(self.histograms.items()):
+                label = name.replace("\\", "\\\\").replace('"', '\\"')
+                cumulative = 0
+                for i, n in enumerate(hist.counts[:-1]):
+                    cumulative += n
+                    if i % _BUCKETS_PER_OCTAVE == 0:
+                        lines.append(f'{metric}_bucket{{span="{label}",le="{_BOUNDS_NS[i] / 1e9:.6g}"}} {cumulative}')
+                lines.append(f'{metric}_bucket{{span="{label}",le="+Inf"}} {hist.count}')
+                lines.append(f'{metric}_sum{{span="{label}"}} {hist.sum_ns / 1e9:.9f}')
+                lines.append(f'{metric}_count{{span="{label}"}} {hist.count}')
+        return "\n".join(lines) + "\n"
+
+
+tracer = Tracer(enabled=os.environ.get("RAG_TRACE") == "1")
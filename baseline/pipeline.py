@@ -1,79 +1,378 @@
 import os
-os.environ["OMP_NUM_THREADS"] = "1"
-os.environ["MKL_NUM_THREADS"] = "1"
-os.environ["OPENBLAS_NUM_THREADS"] = "1"
+# Single-threaded BLAS stays the safe default; export these (or pass
+# embed_threads to Pipeline) to let embedding use more cores.
+os.environ.setdefault("OMP_NUM_THREADS", "1")
+os.environ.setdefault("MKL_NUM_THREADS", "1")
+os.environ.setdefault("OPENBLAS_NUM_THREADS", "1")
 os.environ["OBJC_DISABLE_INITIALIZE_FORK_SAFETY"] = "YES"
 
 import multiprocessing
 multiprocessing.set_start_method("spawn", force=True)
 
+import threading
+from contextlib import contextmanager
 from glob import glob
+from time import perf_counter
+from typing import Iterator, List, Optional, Union
 from retriever.retreiver import Retriever
+from retriever.sharded import ShardedRetriever
+from retriever.watcher import IndexWatcher
+from retriever.reranker import CrossEncoderReranker
 from generator.generator import Generator
+from generator.backends import LLMBackend
+from generator.semantic_cache import SemanticAnswerCache
+from generator.session_memory import SessionMemoryStore
+from generator.context_packer import ContextPacker
+from generator.tokens import default_tokenizer
 from logger.logger import Logger
+from metrics.tracing import tracer
 
 class Pipeline:
-    def __init__(self):
+    def __init__(self, answer_cache: Optional[SemanticAnswerCache] = None, ingest_workers: int = 1,
+                 embed_threads: int = 1, embed_batch_size: int = 32, max_seq_length: int = 512,
+                 index_type: str = "flat", index_params: Optional[dict] = None,
+                 generator_backend: Union[str, LLMBackend, None] = None, trace: bool = False,
+                 memory: Optional[SessionMemoryStore] = None, context_token_budget: int = 3000,
+                 reranker: Optional[CrossEncoderReranker] = None, warm_up: bool = False,
+                 shards: int = 0, watch: bool = False, watch_interval: float = 2.0):
+        # Seconds spent in each startup phase (see metrics/startup_profile.py).
+        # Models and heavy SDKs load on first use; warm_up=True loads them on a
+        # background thread instead, and ``ready`` reports when that is done.
+        self.startup = {}
+        self._warmup_thread = None
+        started = perf_counter()
+
+        if watch and shards > 1:
+            raise ValueError("watch is not supported with a sharded index.")
         self.embeddings_dir = "./embeddings"
         self.docs_dir = "./data"
+        self.cache_dir = "./.cache"
+        self.top_k = 5
+
+        # Per-stage timings (see metrics/tracing.py); also enabled by RAG_TRACE=1
+        self.tracer = tracer
+        if trace:
+            tracer.enable()
 
-        self.retriever = Retriever()
-        self.generator = Generator()
+        # ingest_workers > 1 parses/chunks files in a spawn process pool; BLAS
+        # threads above default to 1, so size this explicitly per machine.
+        # shards > 1 splits the index by source file across that many worker
+        # processes (retriever/sharded.py; dense retrieval only).
+        with self._startup_phase("retriever_init"):
+            options = dict(
+                cache_dir=self.cache_dir,
+                ingest_workers=ingest_workers,
+                embed_threads=embed_threads,
+                embed_batch_size=embed_batch_size,
+                max_seq_length=max_seq_length,
+                index_type=index_type,          # used for new indexes; saved ones keep their type
+                index_params=index_params,
+            )
+            if shards > 1:
+                self.retriever = ShardedRetriever(os.path.join(self.embeddings_dir, "sharded"),
+                                                  num_shards=shards, **options)
+                self.embeddings_dir = self.retriever.path
+            else:
+                self.retriever = Retriever(**options)
+        # Dense + BM25 fusion; the sharded index serves dense search only
+        self.retrieval_mode = "dense" if shards > 1 else "hybrid"
+        # "mock" (or GENERATOR_BACKEND=mock) runs offline with simulated LLM latency.
+        # Retrieved chunks are merged (overlap stripped) and fit into
+        # context_token_budget before they reach the prompt.
+        with self._startup_phase("generator_init"):
+            self.generator = Generator(
+                backend=generator_backend,
+                context_packer=ContextPacker(token_budget=context_token_budget,
+                                             max_overlap=self.retriever.chunk_overlap),
+            )
         self.logger = Logger()
 
-        self.memory = []
-
-        index_path = os.path.join(self.embeddings_dir, "index.faiss")
-        docs_meta  = os.path.join(self.embeddings_dir, "docs.pkl")
-
-        if os.path.exists(index_path) and os.path.exists(docs_meta):
-            print(f"✅ Loading existing embeddings from '{self.embeddings_dir}'")
-            self.retriever.load(self.embeddings_dir)
-        else:
-            if not os.path.isdir(self.docs_dir):
-                raise FileNotFoundError(f"Documents folder '{self.docs_dir}' not found.")
-            print(f"⚙️  No embeddings found—indexing documents in '{self.docs_dir}'...")
-            patterns = ["*.txt", "*.md", "*.pdf", "*.csv"]
-            paths = []
-            for pat in patterns:
-                paths += glob(os.path.join(self.docs_dir, pat))
-            if not paths:
-                raise ValueError(f"No .txt/.md/.pdf files found in '{self.docs_dir}'.")
-            self.retriever.add_documents(paths)
-            os.makedirs(self.embeddings_dir, exist_ok=True)
-            self.retriever.save(self.embeddings_dir)
-            print(f"✅ Embeddings built and saved to '{self.embeddings_dir}'")
-
-    def run(self, question: str) -> str:
-        # Retrieve with optional filters
+        # Opt-in: over-fetch reranker.candidates chunks and keep the
+        # reranker.top_k best by cross-encoder score (ANN order on timeout)
+        self.reranker = reranker
+
+        # Conversation history per session id; requests without one share
+        # the "default" session.
+        self.memory = memory if memory is not None else SessionMemoryStore()
+
+        # Opt-in: reuse answers of near-duplicate questions; entries are dropped
+        # when their source documents are re-indexed.
+        self.answer_cache = answer_cache
+        if answer_cache is not None:
+            self.retriever.add_index_listener(answer_cache.invalidate_sources)
+
+        if warm_up:
+            # Model loading overlaps with loading the index below
+            self._warmup_thread = threading.Thread(target=self._background_warm_up, name="pipeline-warmup",
+                                                   daemon=True)
+            self._warmup_thread.start()
+
+        with self._startup_phase("index"):
+            if self.retriever.exists(self.embeddings_dir):
+                print(f"✅ Loading existing embeddings from '{self.embeddings_dir}'")
+                self.retriever.load(self.embeddings_dir)
+                # Pick up files added to or changed in ./data since the last save
+                # (left to the watcher's first scan when watching)
+                pending = self.retriever.manifest.pending(self._document_paths()) \
+                    if os.path.isdir(self.docs_dir) and not watch else []
+                if pending:
+                    print(f"⚙️  Indexing {len(pending)} new/changed file(s) in '{self.docs_dir}'...")
+                    self.retriever.add_documents(pending)
+                    self.retriever.save(self.embeddings_dir)
+            else:
+                if not os.path.isdir(self.docs_dir):
+                    raise FileNotFoundError(f"Documents folder '{self.docs_dir}' not found.")
+                print(f"⚙️  No embeddings found—indexing documents in '{self.docs_dir}'...")
+                paths = self._document_paths()
+                if not paths:
+                    raise ValueError(f"No .txt/.md/.pdf files found in '{self.docs_dir}'.")
+                self.retriever.add_documents(paths)
+                os.makedirs(self.embeddings_dir, exist_ok=True)
+                self.retriever.save(self.embeddings_dir)
+                print(f"✅ Embeddings built and saved to '{self.embeddings_dir}'")
+
+        # Opt-in: index new, changed and deleted files in ./data on a background
+        # thread and swap the result in; see watcher.stats() for the indexing lag.
+        self.watcher = None
+        if watch:
+            self.watcher = IndexWatcher(self.retriever, self._document_paths, self.embeddings_dir,
+                                        interval=watch_interval).start()
+        self.startup["total"] = perf_counter() - started
+
+    @contextmanager
+    def _startup_phase(self, name: str):
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.startup[name] = perf_counter() - start
+
+    def warm_up(self):
+        """
+        Load the embedding model (and reranker model), run one query
+        embedding, load the prompt tokenizer and import the LLM SDK, so the
+        first request pays none of it.
+        """
+        with self._startup_phase("warm_up"):
+            self.retriever.embedder.encode(["warm up"])
+            if self.reranker is not None:
+                self.reranker.load()
+            default_tokenizer()
+            self.generator.backend.warm_up()
+        self.startup["model_load"] = self.retriever.embedder.load_seconds
+
+    def _background_warm_up(self):
+        try:
+            self.warm_up()
+        except Exception as e:
+            # Requests still load what they need on first use
+            print(f"[WARN] Warm-up failed: {type(e).__name__}: {e}")
+
+    @property
+    def ready(self) -> bool:
+        """True once every model a request needs is loaded."""
+        return self.retriever.embedder.loaded and (self.reranker is None or self.reranker.loaded)
+
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        """Wait for the background warm-up (if any); returns ``ready``."""
+        if self._warmup_thread is not None:
+            self._warmup_thread.join(timeout)
+        return self.ready
+
+    def _document_paths(self) -> list:
+        patterns = ["*.txt", "*.md", "*.pdf", "*.csv"]
+        paths = []
+        for pat in patterns:
+            paths += glob(os.path.join(self.docs_dir, pat))
+        return sorted(paths)
+
+    def retrieve(self, question: str, filter_source_type: str = None, filter_date_after: str = None) -> list:
+        with tracer.span("pipeline.retrieve"):
+            return self._retrieve(question, filter_source_type, filter_date_after)
+
+    def _retrieve(self, question: str, filter_source_type: str = None, filter_date_after: str = None) -> list:
         retrieved = self.retriever.query(
             question,
-            top_k=5,
-            filter_source_type=None,        # e.g., "pdf" to filter
-            filter_date_after=None          # e.g., "2023-01-01" to filter
+            top_k=self.reranker.candidates if self.reranker else self.top_k,
+            filter_source_type=filter_source_type,  # e.g., "pdf" to filter
+            filter_date_after=filter_date_after,    # e.g., "2023-01-01" to filter
+            mode=self.retrieval_mode,
+        )
+        return self._rerank(question, retrieved)
+
+    def retrieve_batch(self, questions: List[str], filter_source_type: str = None,
+                       filter_date_after: str = None) -> List[list]:
+        retrieved_all = self.retriever.query_batch(
+            questions,
+            top_k=self.reranker.candidates if self.reranker else self.top_k,
+            filter_source_type=filter_source_type,
+            filter_date_after=filter_date_after,
+            mode=self.retrieval_mode,
         )
+        return [self._rerank(q, retrieved) for q, retrieved in zip(questions, retrieved_all)]
+
+    def _rerank(self, question: str, retrieved: list) -> list:
+        if self.reranker is None:
+            return retrieved
+        with tracer.span("pipeline.rerank"):
+            reranked, info = self.reranker.rerank(question, retrieved)
+        tracer.annotate(reranked=info["reranked"], rerank_scored=info["scored"])
+        return reranked
+
+    def _prepare(self, question: str, retrieved: list, session_id: str = "default"):
+        with tracer.span("pipeline.prompt"):
+            return self._build_prompt(question, retrieved, session_id)
 
-        chunks = [text for _, text in retrieved]
-        metas  = [str(meta) for meta, _ in retrieved]
-        ids    = [meta.get("source") for meta, _ in retrieved]
+    def _build_prompt(self, question: str, retrieved: list, session_id: str = "default"):
+        ids = [meta.get("source") for meta, _ in retrieved]
 
-        # Build prompt with memory
-        prompt = self.generator.build_prompt(chunks, metas, question, self.memory)
+        # Build prompt from the packed context and this session's memory
+        summary, history = self.memory.history(session_id)
+        prompt, packing = self.generator.build_packed_prompt(retrieved, question, history, summary=summary)
+        return prompt, ids, packing
+
+    @staticmethod
+    def _chunk_keys(retrieved: list) -> list:
+        return [f"{meta.get('source')}:{meta.get('chunk_id')}" for meta, _ in retrieved]
+
+    def _cached_answer(self, question: str, retrieved: list):
+        """Return (cached answer or None, question vector) when the answer cache is enabled."""
+        if self.answer_cache is None:
+            return None, None
+        with tracer.span("pipeline.answer_cache"):
+            vector = self.retriever.embed_query(question)[0]
+            return self.answer_cache.lookup(vector, self._chunk_keys(retrieved)), vector
+
+    def _cache_answer(self, question: str, vector, retrieved: list, answer: str):
+        if self.answer_cache is not None and vector is not None:
+            sources = {meta.get("source") for meta, _ in retrieved}
+            self.answer_cache.store(question, vector, self._chunk_keys(retrieved), sources, answer)
+
+    def _finish(self, question: str, ids: list, prompt: list, answer: str, session_id: str = "default",
+                packing: dict = None):
+        with tracer.span("pipeline.finish"):
+            # Update memory
+            self.memory.append(session_id, question, answer)
+
+            # Log
+            self.logger.log(question, ids, prompt, answer, context=packing)
+
+    def run(self, question: str, filter_source_type: str = None, filter_date_after: str = None,
+            session_id: str = "default") -> str:
+        with tracer.trace("pipeline.run", question=question):
+            return self._run(question, filter_source_type, filter_date_after, session_id)
+
+    def _run(self, question: str, filter_source_type: str = None, filter_date_after: str = None,
+             session_id: str = "default") -> str:
+        # Retrieve with optional filters
+        retrieved = self.retrieve(question, filter_source_type, filter_date_after)
+        prompt, ids, packing = self._prepare(question, retrieved, session_id)
+
+        answer, vector = self._cached_answer(question, retrieved)
+        if answer is not None:
+            self._finish(question, ids, prompt, answer, session_id, packing)
+            return answer
 
         # Generate
         answer = self.generator.generate_answer(prompt)
+        self._cache_answer(question, vector, retrieved, answer)
 
         # # Basic post-check: warn if not grounded
         # if ("I don’t know" not in answer) and not any(chunk in answer for chunk in chunks):
         #     answer = "⚠️ The answer may not be based on the provided context.\n" + answer
 
-        # Update memory
-        self.memory.append((question, answer))
-
-        # Log
-        self.logger.log(question, ids, prompt, answer)
+        self._finish(question, ids, prompt, answer, session_id, packing)
         return answer
 
+    def run_batch(self, questions: List[str], filter_source_type: str = None,
+                  filter_date_after: str = None, max_concurrency: int = 4,
+                  session_id: str = "default") -> List[dict]:
+        """
+        Answer many questions: one batched retrieval, then generation with at
+        most ``max_concurrency`` LLM calls in flight. Returns one
+        {"question", "answer", "error"} dict per question, in input order; a
+        failed question has answer None and is left out of memory and the log.
+        All prompts share the session's memory as it was when the batch began.
+        """
+        with tracer.trace("pipeline.run_batch", questions=len(questions)):
+            return self._run_batch(questions, filter_source_type, filter_date_after, max_concurrency, session_id)
+
+    def _run_batch(self, questions: List[str], filter_source_type: str = None,
+                   filter_date_after: str = None, max_concurrency: int = 4,
+                   session_id: str = "default") -> List[dict]:
+        results = [{"question": q, "answer": None, "error": None} for q in questions]
+        try:
+            with tracer.span("pipeline.retrieve"):
+                retrieved_all = self.retrieve_batch(questions, filter_source_type, filter_date_after)
+        except Exception as e:
+            for result in results:
+                result["error"] = f"{type(e).__name__}: {e}"
+            return results
+
+        prepared, pending = [], []
+        for i, (question, retrieved) in enumerate(zip(questions, retrieved_all)):
+            prompt, ids, packing = self._prepare(question, retrieved, session_id)
+            answer, vector = self._cached_answer(question, retrieved)
+            prepared.append((prompt, ids, vector, packing))
+            if answer is not None:
+                results[i]["answer"] = answer
+            else:
+                pending.append(i)
+
+        generated = self.generator.generate_batch([prepared[i][0] for i in pending],
+                                                  max_concurrency=max_concurrency)
+        for i, (answer, error) in zip(pending, generated):
+            results[i]["answer"], results[i]["error"] = answer, error
+            if answer is not None:
+                self._cache_answer(questions[i], prepared[i][2], retrieved_all[i], answer)
+
+        for result, (prompt, ids, _, packing) in zip(results, prepared):
+            if result["answer"] is not None:
+                self._finish(result["question"], ids, prompt, result["answer"], session_id, packing)
+        return results
+
+    def run_stream(self, question: str, retrieved: list = None, filter_source_type: str = None,
+                   filter_date_after: str = None, session_id: str = "default") -> Iterator[str]:
+        """
+        Like run(), but yields answer deltas as the LLM produces them. Memory and
+        the query log are updated when the stream ends, with whatever was
+        generated if the caller stops early or generation fails. Pass
+        ``retrieved`` to reuse results already fetched with retrieve().
+        """
+        with tracer.trace("pipeline.run_stream", question=question):
+            yield from self._run_stream(question, retrieved, filter_source_type, filter_date_after, session_id)
+
+    def _run_stream(self, question: str, retrieved: list = None, filter_source_type: str = None,
+                    filter_date_after: str = None, session_id: str = "default") -> Iterator[str]:
+        if retrieved is None:
+            retrieved = self.retrieve(question, filter_source_type, filter_date_after)
+        prompt, ids, packing = self._prepare(question, retrieved, session_id)
+
+        answer, vector = self._cached_answer(question, retrieved)
+        if answer is not None:
+            try:
+                yield answer
+            finally:
+                self._finish(question, ids, prompt, answer, session_id, packing)
+            return
+
+        parts = []
+        completed = False
+        try:
+            for delta in self.generator.stream_answer(prompt):
+                parts.append(delta)
+                yield delta
+            completed = True
+        finally:
+            # Runs on completion, on errors and when the consumer abandons
+            # the stream (e.g. a Streamlit rerun closes the generator)
+            tracer.annotate(stream_completed=completed)
+            answer = "".join(parts)
+            if completed:
+                self._cache_answer(question, vector, retrieved, answer)
+            if answer:
+                self._finish(question, ids, prompt, answer, session_id, packing)
+
 if __name__ == "__main__":
     pipe = Pipeline()
     q = "What is neural network?"
@@ -0,0 +1,213 @@
+import os
+import re
+import json
+import threading
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from retriever.columns import load_array, save_array
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+class _Postings(NamedTuple):
+    term_offsets: np.ndarray  # term t owns [term_offsets[t], term_offsets[t + 1])
+    post_docs: np.ndarray
+    post_tfs: np.ndarray
+    post_weights: np.ndarray
+    idf: np.ndarray
+
+
+class _DocTerms(NamedTuple):
+    doc_offsets: np.ndarray  # doc i owns [doc_offsets[i], doc_offsets[i + 1])
+    doc_terms: np.ndarray
+    doc_tfs: np.ndarray
+
+
+class BM25Index:
+    """
+    Sparse BM25 index over the same chunks as the FAISS store.
+
+    Documents are aligned with FAISS positions, like MetadataIndex, so metadata
+    masks and dense hits can be combined directly. Searches use CSR postings
+    (per-term offsets into doc ordinals, term frequencies and precomputed
+    BM25 weights), so a query only touches one contiguous slice per query term.
+
+    Only the postings are saved, one .npy file per array, and ``load``
+    memory-maps them: opening an index reads just the vocabulary, and a
+    search pages in the slices of its query terms. ``append`` and ``remove``
+    work on a doc-major view of the same (term, tf) pairs, rebuilt from the
+    postings on the first change after a load.
+
+    Postings are rebuilt on the first search after a change, under a lock,
+    and published as one tuple, so concurrent searches never see a partial
+    build.
+    """
+
+    FILE_NAME = "bm25.json"
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.vocab: Dict[str, int] = {}
+        self.doc_len = np.empty(0, dtype=np.int32)
+        self._docs: Optional[_DocTerms] = _DocTerms(
+            np.zeros(1, dtype=np.int64), np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int32)
+        )
+        self._postings: Optional[_Postings] = None
+        self._build_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.doc_len)
+
+    def _doc_terms(self) -> _DocTerms:
+        """The doc-major (term, tf) pairs, rebuilt from the postings if only those were loaded."""
+        if self._docs is None:
+            postings = self._postings
+            n_terms = len(postings.term_offsets) - 1
+            pair_terms = np.repeat(np.arange(n_terms, dtype=np.int32), np.diff(postings.term_offsets))
+            order = np.argsort(postings.post_docs, kind="stable")
+            counts = np.bincount(postings.post_docs, minlength=len(self))
+            self._docs = _DocTerms(
+                np.concatenate([[0], np.cumsum(counts)]).astype(np.int64),
+                pair_terms[order],
+                np.asarray(postings.post_tfs)[order],
+            )
+        return self._docs
+
+    def append(self, texts: Iterable[str]):
+        """Index new chunks, in FAISS insertion order."""
+        terms, tfs, counts, lengths = [], [], [], []
+        for text in texts:
+            tokens = tokenize(text)
+            freq: Dict[int, int] = {}
+            for tok in tokens:
+                tid = self.vocab.get(tok)
+                if tid is None:
+                    tid = self.vocab[tok] = len(self.vocab)
+                freq[tid] = freq.get(tid, 0) + 1
+            terms.extend(freq.keys())
+            tfs.extend(freq.values())
+            counts.append(len(freq))
+            lengths.append(len(tokens))
+        if not lengths:
+            return
+        docs = self._doc_terms()
+        self._docs = _DocTerms(
+            np.concatenate([docs.doc_offsets, docs.doc_offsets[-1] + np.cumsum(counts, dtype=np.int64)]),
+            np.concatenate([docs.doc_terms, np.asarray(terms, dtype=np.int32)]),
+            np.concatenate([docs.doc_tfs, np.asarray(tfs, dtype=np.int32)]),
+        )
+        self.doc_len = np.concatenate([self.doc_len, np.asarray(lengths, dtype=np.int32)])
+        self._postings = None
+
+    def remove(self, positions: Iterable[int]):
+        """Drop documents at the given positions; remaining documents keep their order."""
+        docs = self._doc_terms()
+        keep_docs = np.ones(len(self), dtype=bool)
+        keep_docs[np.fromiter(positions, dtype=np.int64)] = False
+        counts = np.diff(docs.doc_offsets)
+        keep_pairs = np.repeat(keep_docs, counts)
+        self._docs = _DocTerms(
+            np.concatenate([[0], np.cumsum(counts[keep_docs])]).astype(np.int64),
+            docs.doc_terms[keep_pairs],
+            docs.doc_tfs[keep_pairs],
+        )
+        self.doc_len = self.doc_len[keep_docs]
+        self._postings = None
+
+    def _build_postings(self) -> _Postings:
+        docs = self._docs
+        n_docs = len(self)
+        n_terms = len(self.vocab)
+        pair_docs = np.repeat(np.arange(n_docs, dtype=np.int32), np.diff(docs.doc_offsets))
+        order = np.argsort(docs.doc_terms, kind="stable")
+        post_docs = pair_docs[order]
+        post_tfs = docs.doc_tfs[order]
+
+        df = np.bincount(docs.doc_terms, minlength=n_terms)
+        term_offsets = np.concatenate([[0], np.cumsum(df)]).astype(np.int64)
+        idf = np.log1p((n_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+
+        avgdl = float(self.doc_len.mean()) if n_docs else 0.0
+        norm = self.k1 * (1 - self.b + self.b * self.doc_len / max(avgdl, 1e-9))
+        tf = post_tfs.astype(np.float32)
+        post_weights = (tf * (self.k1 + 1) / (tf + norm[post_docs])).astype(np.float32)
+        return _Postings(term_offsets, post_docs, post_tfs, post_weights, idf)
+
+    def postings(self) -> _Postings:
+        """The CSR postings, built once per change."""
+        postings = self._postings
+        if postings is None:
+            with self._build_lock:
+                postings = self._postings
+                if postings is None:
+                    postings = self._postings = self._build_postings()
+        return postings
+
+    def search(self, query: str, k: int, mask: Optional[np.ndarray] = None) -> List[Tuple[int, float]]:
+        """Return up to k (position, bm25 score) pairs with a positive score."""
+        if not len(self):
+            return []
+        postings = self.postings()
+        term_ids = {self.vocab[t] for t in tokenize(query) if t in self.vocab}
+        if not term_ids:
+            return []
+
+        scores = np.zeros(len(self), dtype=np.float32)
+        for tid in term_ids:
+            start, end = postings.term_offsets[tid], postings.term_offsets[tid + 1]
+            # doc ordinals are unique within one term's postings, so += is safe
+            scores[postings.post_docs[start:end]] += postings.idf[tid] * postings.post_weights[start:end]
+        if mask is not None:
+            scores[~mask] = 0.0
+
+        candidates = np.flatnonzero(scores > 0)
+        if candidates.size > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [(int(p), float(scores[p])) for p in candidates]
+
+    @staticmethod
+    def _path(dir_path: str, name: str) -> str:
+        return os.path.join(dir_path, f"bm25.{name}.npy")
+
+    def save(self, dir_path: str):
+        postings = self.postings()
+        for name, array in postings._asdict().items():
+            save_array(self._path(dir_path, name), array)
+        save_array(self._path(dir_path, "doc_len"), self.doc_len)
+        # Written last: its presence marks a complete save
+        tmp = os.path.join(dir_path, self.FILE_NAME + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": 2, "k1": self.k1, "b": self.b, "docs": len(self),
+                       "vocab": list(self.vocab)}, f, ensure_ascii=False)
+        os.replace(tmp, os.path.join(dir_path, self.FILE_NAME))
+
+    @classmethod
+    def load(cls, dir_path: str) -> Optional["BM25Index"]:
+        path = os.path.join(dir_path, cls.FILE_NAME)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        index = cls(k1=meta["k1"], b=meta["b"])
+        index.vocab = {t: i for i, t in enumerate(meta["vocab"])}
+        index.doc_len = load_array(cls._path(dir_path, "doc_len"))
+        index._postings = _Postings(*(load_array(cls._path(dir_path, name)) for name in _Postings._fields))
+        index._docs = None
+        return index
+
+    @classmethod
+    def from_docstore(cls, index_to_docstore_id: Dict[int, str], docstore) -> "BM25Index":
+        """Build the index from a docstore (for indexes saved without one)."""
+        index = cls()
+        index.append(
+            docstore.search(doc_id).page_content for _, doc_id in sorted(index_to_docstore_id.items())
+        )
+        return index
@@ -0,0 +1,147 @@
+import os
+import re
+import time
+import sqlite3
+import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+import numpy as np
+
+_WS_RE = re.compile(r"\s+")
+
+
+def normalize_query(text: str) -> str:
+    """Cache-key form of a query: NFKC, case-folded, whitespace collapsed."""
+    return _WS_RE.sub(" ", unicodedata.normalize("NFKC", text).casefold()).strip()
+
+
+class LRUCache:
+    """
+    Thread-safe bounded LRU cache with an optional TTL (seconds) and hit/miss
+    counters.
+    """
+
+    def __init__(self, capacity: int = 1024, ttl: Optional[float] = None):
+        self.capacity = capacity
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                value, stored_at = item
+                if self.ttl is None or time.monotonic() - stored_at <= self.ttl:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, value: Any):
+        if self.capacity <= 0:
+            return
+        with self._lock:
+            self._data[key] = (value, time.monotonic())
+            self._data.move_to_end(key)
+            while len(self._data) > self.capacity:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+class QueryEmbeddingCache:
+    """
+    Query-vector cache keyed by (embedding model key, normalised query text).
+    The key should be ``EmbeddingEngine.cache_key``, which also covers the
+    settings that change vectors (sequence length, normalisation), so the
+    disk tier never serves vectors from a differently configured model.
+
+    An in-memory LRU sits in front of an optional SQLite disk tier
+    (``<cache_dir>/query_embeddings.sqlite``) so vectors survive restarts.
+    Disk entries older than ``ttl`` are ignored and overwritten.
+    """
+
+    def __init__(
+        self,
+        model_key: str,
+        capacity: int = 1024,
+        ttl: Optional[float] = None,
+        cache_dir: Optional[str] = None,
+    ):
+        self.model_key = model_key
+        self.ttl = ttl
+        self.memory = LRUCache(capacity, ttl)
+        self.disk_hits = 0
+        self._db = None
+        self._db_lock = threading.Lock()
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            self._db = sqlite3.connect(
+                os.path.join(cache_dir, "query_embeddings.sqlite"), check_same_thread=False
+            )
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS vectors (key TEXT PRIMARY KEY, vector BLOB, created REAL)"
+            )
+            self._db.commit()
+
+    def _key(self, query: str) -> str:
+        raw = f"{self.model_key}\x1f{normalize_query(query)}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def get(self, query: str) -> Optional[np.ndarray]:
+        key = self._key(query)
+        vector = self.memory.get(key)
+        if vector is not None or self._db is None:
+            return vector
+        with self._db_lock:
+            row = self._db.execute("SELECT vector, created FROM vectors WHERE key = ?", (key,)).fetchone()
+        if row is None or (self.ttl is not None and time.time() - row[1] > self.ttl):
+            return None
+        vector = np.frombuffer(row[0], dtype=np.float32)
+        self.disk_hits += 1
+        self.memory.put(key, vector)
+        return vector
+
+    def put(self, query: str, vector: np.ndarray):
+        key = self._key(query)
+        vector = np.ascontiguousarray(vector, dtype=np.float32).ravel()
+        self.memory.put(key, vector)
+        if self._db is not None:
+            with self._db_lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO vectors (key, vector, created) VALUES (?, ?, ?)",
+                    (key, vector.tobytes(), time.time()),
+                )
+                self._db.commit()
+
+    def clear(self):
+        self.memory.clear()
+        if self._db is not None:
+            with self._db_lock:
+                self._db.execute("DELETE FROM vectors")
+                self._db.commit()
+
+    def stats(self) -> dict:
+        return dict(self.memory.stats(), disk_hits=self.disk_hits)
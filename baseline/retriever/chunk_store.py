@@ -0,0 +1,136 @@
+import os
+from collections.abc import Mapping
+from typing import Dict, Iterable, NamedTuple, Optional, Union
+
+import numpy as np
+
+from retriever.columns import BlobColumn
+
+
+class ChunkStore:
+    """
+    Chunk texts and ids aligned with FAISS positions, stored as UTF-8 blobs.
+
+    On disk each column is a ``BlobColumn`` (one contiguous blob plus an
+    int64 offsets array):
+
+    chunks.bin / chunks.offsets.npy        chunk texts
+    chunk_ids.bin / chunk_ids.offsets.npy  docstore ids
+
+    ``load`` memory-maps the files, so opening a store costs the same for any
+    corpus size and a text is only decoded when it is read.
+    """
+
+    TEXT_FILE = "chunks.bin"
+    TEXT_OFFSETS_FILE = "chunks.offsets.npy"
+    ID_FILE = "chunk_ids.bin"
+    ID_OFFSETS_FILE = "chunk_ids.offsets.npy"
+
+    def __init__(self):
+        self._texts = BlobColumn()
+        self._ids = BlobColumn()
+        self._positions: Optional[Dict[str, int]] = None
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def append(self, ids: Iterable[str], texts: Iterable[str]):
+        """Add chunks in FAISS insertion order."""
+        self._ids.append(ids)
+        self._texts.append(texts)
+        self._positions = None
+
+    def remove(self, positions: Iterable[int]):
+        """Drop rows at the given positions; remaining rows keep their order like FAISS remove_ids."""
+        positions = np.fromiter(positions, dtype=np.int64)
+        self._texts.remove(positions)
+        self._ids.remove(positions)
+        self._positions = None
+
+    def text(self, pos: int) -> str:
+        return self._texts.get(pos)
+
+    def id_at(self, pos: int) -> str:
+        return self._ids.get(pos)
+
+    def position(self, doc_id: str) -> Optional[int]:
+        """Position of a docstore id. The reverse map is built on first use."""
+        if self._positions is None:
+            self._positions = {self.id_at(pos): pos for pos in range(len(self))}
+        return self._positions.get(doc_id)
+
+    def save(self, dir_path: str):
+        """
+        Write every live row to ``dir_path`` and reopen the store from there.
+        Files are replaced atomically, so saving over the loaded directory is safe.
+        """
+        self._texts.save(os.path.join(dir_path, self.TEXT_FILE), os.path.join(dir_path, self.TEXT_OFFSETS_FILE))
+        self._ids.save(os.path.join(dir_path, self.ID_FILE), os.path.join(dir_path, self.ID_OFFSETS_FILE))
+
+    @classmethod
+    def exists(cls, dir_path: str) -> bool:
+        return all(os.path.exists(os.path.join(dir_path, name)) for name in
+                   (cls.TEXT_FILE, cls.TEXT_OFFSETS_FILE, cls.ID_FILE, cls.ID_OFFSETS_FILE))
+
+    @classmethod
+    def load(cls, dir_path: str) -> Optional["ChunkStore"]:
+        if not cls.exists(dir_path):
+            return None
+        store = cls()
+        store._texts = BlobColumn.load(os.path.join(dir_path, cls.TEXT_FILE),
+                                       os.path.join(dir_path, cls.TEXT_OFFSETS_FILE))
+        store._ids = BlobColumn.load(os.path.join(dir_path, cls.ID_FILE),
+                                     os.path.join(dir_path, cls.ID_OFFSETS_FILE))
+        return store
+
+    @classmethod
+    def from_docstore(cls, index_to_docstore_id: Dict[int, str], docstore) -> "ChunkStore":
+        """Convert a pickled langchain docstore (indexes saved before this store existed)."""
+        store = cls()
+        items = sorted(index_to_docstore_id.items())
+        store.append((doc_id for _, doc_id in items),
+                     (docstore.search(doc_id).page_content for _, doc_id in items))
+        return store
+
+
+class ChunkIdMap(Mapping):
+    """Read-only FAISS position -> docstore id view, shaped like langchain's index_to_docstore_id."""
+
+    def __init__(self, chunks: ChunkStore):
+        self._chunks = chunks
+
+    def __getitem__(self, pos: int) -> str:
+        if not 0 <= pos < len(self._chunks):
+            raise KeyError(pos)
+        return self._chunks.id_at(pos)
+
+    def __iter__(self):
+        return iter(range(len(self._chunks)))
+
+    def __len__(self) -> int:
+        return len(self._chunks)
+
+
+class StoredChunk(NamedTuple):
+    """A chunk as ChunkDocstore returns it; the field names match langchain's Document."""
+    page_content: str
+    metadata: dict
+
+
+class ChunkDocstore:
+    """
+    Lookup by docstore id over a ChunkStore and MetadataIndex, with the same
+    ``search`` contract as a pickled langchain docstore, so the
+    ``from_docstore`` rebuilds accept either. Chunks are built on lookup; the
+    Retriever owns all writes.
+    """
+
+    def __init__(self, chunks: ChunkStore, metadata_index):
+        self._chunks = chunks
+        self._metadata = metadata_index
+
+    def search(self, search: str) -> Union[str, StoredChunk]:
+        pos = self._chunks.position(search)
+        if pos is None:
+            return f"ID {search} not found."
+        return StoredChunk(self._chunks.text(pos), self._metadata.row(pos))
@@ -0,0 +1,90 @@
+import os
+from typing import Iterable, List, Optional
+
+import numpy as np
+
+
+def save_array(path: str, array: np.ndarray):
+    """Write ``array`` as .npy, atomically, so a memory-mapped copy of the old file stays valid."""
+    with open(path + ".tmp", "wb") as f:
+        np.save(f, np.ascontiguousarray(array))
+    os.replace(path + ".tmp", path)
+
+
+def load_array(path: str) -> np.ndarray:
+    """Memory-map a .npy file read-only; the data is paged in only where it is read."""
+    return np.load(path, mmap_mode="r")
+
+
+class BlobColumn:
+    """
+    Strings aligned with FAISS positions, stored as one UTF-8 blob plus an
+    int64 offsets array (row i is ``blob[offsets[i]:offsets[i + 1]]``).
+
+    ``load`` memory-maps both files, so opening a column costs the same for
+    any corpus size and a value is only decoded when it is read. Values
+    appended after loading are kept in memory until the next ``save``;
+    removals only rewrite the int64 row table, which maps positions to saved
+    rows (>= 0) or appended rows (< 0).
+    """
+
+    def __init__(self):
+        self._blob: Optional[np.ndarray] = None
+        self._offsets = np.zeros(1, dtype=np.int64)
+        self._new: List[str] = []
+        self._rows = np.empty(0, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def append(self, values: Iterable[str]):
+        values = list(values)
+        start = len(self._new)
+        self._new += values
+        self._rows = np.concatenate([self._rows, -np.arange(start + 1, start + len(values) + 1, dtype=np.int64)])
+
+    def remove(self, positions: Iterable[int]):
+        """Drop rows at the given positions; remaining rows keep their order like FAISS remove_ids."""
+        keep = np.ones(len(self), dtype=bool)
+        keep[np.fromiter(positions, dtype=np.int64)] = False
+        self._rows = self._rows[keep]
+
+    def raw(self, pos: int) -> bytes:
+        row = int(self._rows[pos])
+        if row < 0:
+            return self._new[-row - 1].encode("utf-8")
+        if self._blob is None:
+            return b""  # every saved row is empty
+        return self._blob[self._offsets[row]:self._offsets[row + 1]].tobytes()
+
+    def get(self, pos: int) -> str:
+        return self.raw(pos).decode("utf-8")
+
+    def save(self, blob_path: str, offsets_path: str):
+        """
+        Write every live row and reopen the column from the new files. Files
+        are replaced atomically, so saving over the loaded ones is safe.
+        """
+        offsets = [0]
+        with open(blob_path + ".tmp", "wb") as f:
+            for pos in range(len(self)):
+                data = self.raw(pos)
+                f.write(data)
+                offsets.append(offsets[-1] + len(data))
+        save_array(offsets_path, np.asarray(offsets, dtype=np.int64))
+        os.replace(blob_path + ".tmp", blob_path)
+        self.__dict__.update(BlobColumn.load(blob_path, offsets_path).__dict__)
+
+    @staticmethod
+    def exists(blob_path: str, offsets_path: str) -> bool:
+        return os.path.exists(blob_path) and os.path.exists(offsets_path)
+
+    @classmethod
+    def load(cls, blob_path: str, offsets_path: str) -> "BlobColumn":
+        column = cls()
+        # np.memmap rejects empty files
+        if os.path.getsize(blob_path):
+            column._blob = np.memmap(blob_path, dtype=np.uint8, mode="r")
+        column._offsets = load_array(offsets_path)
+        column._rows = np.arange(len(column._offsets) - 1, dtype=np.int64)
+        return column
@@ -0,0 +1,129 @@
+import time
+import threading
+from typing import List, Optional
+
+import numpy as np
+
+from retriever.embedding_cache import model_cache_key
+
+
+class EmbeddingEngine:
+    """
+    SentenceTransformer embedder with explicit CPU tuning knobs.
+
+    Replaces langchain's HuggingFaceEmbeddings (same text preprocessing and
+    embed_documents / embed_query methods, unnormalised vectors by default,
+    so existing indexes stay compatible) and exposes:
+
+    num_threads     torch intra-op threads used while encoding. Defaults to 1,
+                    matching the BLAS pinning in pipeline.py.
+    batch_size      texts per forward pass.
+    max_seq_length  token cap per text; bge-large allows 512.
+
+    Texts are sorted by length before batching so each batch pads to similar
+    lengths, and results are returned in the input order. Throughput is
+    tracked in ``stats()`` for tuning.
+
+    torch, sentence-transformers and the model itself are loaded on first
+    use (or by ``load()``, e.g. from a warm-up thread), so constructing an
+    engine is free; ``load_seconds`` records how long loading took.
+    """
+
+    def __init__(
+        self,
+        model_name: str = "BAAI/bge-large-en",
+        device: str = "cpu",
+        num_threads: int = 1,
+        batch_size: int = 32,
+        max_seq_length: int = 512,
+        normalize: bool = False,
+    ):
+        self.model_name = model_name
+        self.device = device
+        self.num_threads = num_threads
+        self.batch_size = batch_size
+        self.normalize = normalize
+        self.max_seq_length = max_seq_length
+        self._torch = None
+        self._model = None
+        self.load_seconds: Optional[float] = None
+
+        self.texts_embedded = 0
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._model is not None
+
+    def load(self):
+        """Import torch / sentence-transformers and load the model, once."""
+        if self._model is None:
+            with self._load_lock:
+                if self._model is None:
+                    start = time.perf_counter()
+                    import torch
+                    from sentence_transformers import SentenceTransformer
+
+                    model = SentenceTransformer(self.model_name, device=self.device)
+                    model.max_seq_length = self.max_seq_length
+                    self._torch = torch
+                    self._model = model
+                    self.load_seconds = time.perf_counter() - start
+        return self._model
+
+    @property
+    def model(self):
+        return self.load()
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Encode texts into a (len(texts), dim) float32 array."""
+        self.load()
+        if not texts:
+            return np.empty((0, self.model.get_sentence_embedding_dimension()), dtype=np.float32)
+        texts = [t.replace("\n", " ") for t in texts]
+        order = np.argsort([-len(t) for t in texts], kind="stable")
+
+        with self._lock:
+            previous = self._torch.get_num_threads()
+            self._torch.set_num_threads(self.num_threads)
+            start = time.perf_counter()
+            try:
+                sorted_vecs = self.model.encode(
+                    [texts[i] for i in order],
+                    batch_size=self.batch_size,
+                    convert_to_numpy=True,
+                    normalize_embeddings=self.normalize,
+                    show_progress_bar=False,
+                )
+            finally:
+                self.seconds += time.perf_counter() - start
+                self.texts_embedded += len(texts)
+                self._torch.set_num_threads(previous)
+
+        vectors = np.empty_like(sorted_vecs, dtype=np.float32)
+        vectors[order] = sorted_vecs
+        return vectors
+
+    @property
+    def cache_key(self) -> str:
+        """Identifies the vectors this engine produces, for the on-disk embedding cache."""
+        return model_cache_key(self.model_name, self.max_seq_length, self.normalize)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.encode(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.encode([text])[0].tolist()
+
+    def stats(self) -> dict:
+        return {
+            "texts": self.texts_embedded,
+            "seconds": self.seconds,
+            "chunks_per_sec": self.texts_embedded / self.seconds if self.seconds else 0.0,
+            "num_threads": self.num_threads,
+            "batch_size": self.batch_size,
+            "max_seq_length": self.max_seq_length,
+            "load_seconds": self.load_seconds,
+        }
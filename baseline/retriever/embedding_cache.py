@@ -0,0 +1,207 @@
+"""
+Content-addressed on-disk cache of chunk embeddings.
+
+Vectors are keyed by sha1(model key, normalised chunk text), so rebuilding an
+index (after deleting it, changing chunk_overlap, or re-adding a file) only
+encodes text the model has not seen. Per model key the cache directory holds
+
+    vectors.f32   float32 rows back to back, memory-mapped for reads and
+                  appended to for writes
+    index.npz     the sha1 key and last-use tick of each row, plus the dimension
+
+``flush()`` rewrites index.npz atomically; rows appended after the last flush
+are discarded on the next open. When the vectors file grows past
+``max_bytes`` the least recently used rows are dropped (down to 90% of the
+bound) and the file is compacted.
+
+Only numpy and the standard library are used, so experiments outside the
+baseline package can load this file directly (experiments/week_3 does).
+One process should write a given cache directory at a time.
+"""
+import os
+import hashlib
+import threading
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+VECTORS_FILE = "vectors.f32"
+INDEX_FILE = "index.npz"
+
+
+def normalize_chunk(text: str) -> str:
+    """Cache-key form of a chunk: the text EmbeddingEngine actually encodes (newlines as spaces)."""
+    return text.replace("\n", " ")
+
+
+def model_cache_key(model_name: str, max_seq_length: int, normalize: bool = False) -> str:
+    """Model key for vectors from ``model_name`` with these encode settings (see EmbeddingEngine.cache_key)."""
+    return f"{model_name}|seq{max_seq_length}|{'norm' if normalize else 'raw'}"
+
+
+class EmbeddingCache:
+    def __init__(self, model_key: str, cache_dir: str, max_bytes: int = 2 * 1024 ** 3):
+        self.model_key = model_key
+        self.max_bytes = max_bytes
+        slug = "".join(c if c.isalnum() or c in "-_." else "_" for c in model_key)[:48]
+        self.path = os.path.join(cache_dir, f"{slug}-{hashlib.sha1(model_key.encode('utf-8')).hexdigest()[:8]}")
+        os.makedirs(self.path, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._rows: Dict[bytes, int] = {}
+        self._last_used = np.zeros(0, dtype=np.int64)
+        self._tick = 0
+        self._dim: Optional[int] = None
+        self._mmap: Optional[np.ndarray] = None
+        self._dirty = False
+        self._open()
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _open(self):
+        index_path, vectors_path = self._file(INDEX_FILE), self._file(VECTORS_FILE)
+        if not os.path.exists(index_path) or not os.path.exists(vectors_path):
+            open(vectors_path, "wb").close()
+            return
+        with np.load(index_path) as data:
+            keys = data["keys"]
+            self._last_used = data["last_used"].astype(np.int64)
+            self._dim = int(data["dim"]) or None
+        raw = keys.tobytes()
+        self._rows = {raw[i * 20:(i + 1) * 20]: i for i in range(len(keys))}
+        self._tick = int(self._last_used.max()) if len(self._last_used) else 0
+        expected = len(self._rows) * (self._dim or 0) * 4
+        if os.path.getsize(vectors_path) != expected:
+            # Rows appended after the last flush have no index entry
+            with open(vectors_path, "r+b") as f:
+                f.truncate(expected)
+
+    def _vectors(self) -> np.ndarray:
+        if self._mmap is None or len(self._mmap) != len(self._rows):
+            if not self._rows:
+                return np.empty((0, self._dim or 0), dtype=np.float32)
+            self._mmap = np.memmap(self._file(VECTORS_FILE), dtype=np.float32, mode="r",
+                                   shape=(len(self._rows), self._dim))
+        return self._mmap
+
+    @staticmethod
+    def _digest(model_key: str, text: str) -> bytes:
+        return hashlib.sha1(f"{model_key}\x1f{normalize_chunk(text)}".encode("utf-8")).digest()
+
+    def key(self, text: str) -> bytes:
+        return self._digest(self.model_key, text)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, text: str) -> bool:
+        return self.key(text) in self._rows
+
+    def embed(self, texts: List[str], encode: Callable[[List[str]], np.ndarray]) -> np.ndarray:
+        """
+        Return a (len(texts), dim) float32 array; texts not in the cache are
+        passed to ``encode`` in one call (each distinct text once) and stored.
+        """
+        keys = [self.key(t) for t in texts]
+        with self._lock:
+            self._tick += 1
+            missing: Dict[bytes, str] = {}
+            for key, text in zip(keys, texts):
+                if key not in self._rows and key not in missing:
+                    missing[key] = text
+            self.hits += len(keys) - len(missing)
+            self.misses += len(missing)
+
+        encoded = {}
+        if missing:
+            vectors = np.ascontiguousarray(encode(list(missing.values())), dtype=np.float32)
+            encoded = dict(zip(missing, vectors))
+
+        with self._lock:
+            if encoded:
+                self._append(encoded)
+            rows = np.fromiter((self._rows.get(key, -1) for key in keys), dtype=np.int64, count=len(keys))
+            cached = rows >= 0
+            dim = self._dim or (len(next(iter(encoded.values()))) if encoded else 0)
+            out = np.empty((len(keys), dim), dtype=np.float32)
+            if cached.any():
+                self._last_used[rows[cached]] = self._tick
+                out[cached] = self._vectors()[rows[cached]]
+            # Fresh vectors may already have been evicted again on a tiny cache
+            for i in np.flatnonzero(~cached):
+                out[i] = encoded[keys[i]]
+            if self.max_bytes and len(self._rows) * (self._dim or 0) * 4 > self.max_bytes:
+                self._evict()
+        return out
+
+    def _append(self, vectors: Dict[bytes, np.ndarray]):
+        new = [key for key in vectors if key not in self._rows]
+        if not new:
+            return
+        block = np.stack([vectors[key] for key in new]).astype(np.float32, copy=False)
+        if self._dim is None:
+            self._dim = block.shape[1]
+        elif block.shape[1] != self._dim:
+            raise ValueError(f"Embedding cache '{self.path}' holds {self._dim}-dim vectors, got {block.shape[1]}.")
+        with open(self._file(VECTORS_FILE), "ab") as f:
+            f.write(block.tobytes())
+        start = len(self._rows)
+        self._rows.update((key, start + i) for i, key in enumerate(new))
+        self._last_used = np.concatenate([self._last_used, np.full(len(new), self._tick, dtype=np.int64)])
+        self._dirty = True
+
+    def _evict(self):
+        """Keep the most recently used rows within 90% of max_bytes and compact the file."""
+        keep_n = int(self.max_bytes * 0.9) // (self._dim * 4)
+        # Most recently used first; ties go to the newer row
+        order = np.lexsort((-np.arange(len(self._last_used)), -self._last_used))[:keep_n]
+        keep = np.sort(order)
+        keys = list(self._rows)  # insertion order == row order
+        tmp = self._file(VECTORS_FILE + ".tmp")
+        vectors = self._vectors()
+        with open(tmp, "wb") as f:
+            for begin in range(0, len(keep), 65536):
+                f.write(np.ascontiguousarray(vectors[keep[begin:begin + 65536]]).tobytes())
+        self._mmap = None
+        os.replace(tmp, self._file(VECTORS_FILE))
+        self.evictions += len(keys) - len(keep)
+        self._rows = {keys[row]: i for i, row in enumerate(keep.tolist())}
+        self._last_used = self._last_used[keep]
+        self._dirty = True
+        self._write_index()
+
+    def _write_index(self):
+        # Raw sha1 digests as uint8 rows (an "S20" array would strip trailing NUL bytes)
+        keys = np.frombuffer(b"".join(self._rows), dtype=np.uint8).reshape(-1, 20)
+        tmp = self._file(INDEX_FILE + ".tmp.npz")
+        np.savez(tmp, keys=keys, last_used=self._last_used, dim=np.int64(self._dim or 0))
+        os.replace(tmp, self._file(INDEX_FILE))
+        self._dirty = False
+
+    def flush(self):
+        """Persist the index so rows added since the last flush survive a restart."""
+        with self._lock:
+            if self._dirty:
+                self._write_index()
+
+    def clear(self):
+        with self._lock:
+            self._rows = {}
+            self._last_used = np.zeros(0, dtype=np.int64)
+            self._mmap = None
+            open(self._file(VECTORS_FILE), "wb").close()
+            self._write_index()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._rows),
+            "bytes": len(self._rows) * (self._dim or 0) * 4,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "evictions": self.evictions,
+        }
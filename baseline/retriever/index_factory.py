@@ -0,0 +1,155 @@
+"""
+FAISS index types for the baseline Retriever.
+
+flat      exact search, 4 bytes per dimension (the historical default)
+hnsw      graph index over full vectors; fast, same memory as flat plus links
+ivf_flat  inverted lists over full vectors; searches ``nprobe`` of ``nlist`` cells
+ivf_pq    inverted lists over product-quantised codes (``pq_m`` bytes per vector
+          at 8 bits), the smallest footprint
+sq8       8-bit scalar quantisation, 1 byte per dimension, exact scan
+
+All indexes use L2 distance, like the langchain FAISS store older indexes were saved from.
+"""
+import os
+import json
+import math
+from typing import Optional, Tuple
+
+import faiss
+import numpy as np
+
+INDEX_TYPES = ("flat", "hnsw", "ivf_flat", "ivf_pq", "sq8")
+
+DEFAULT_PARAMS = {
+    "flat": {},
+    "hnsw": {"M": 32, "ef_construction": 80, "ef_search": 64},
+    "ivf_flat": {"nlist": 1024, "nprobe": 16},
+    "ivf_pq": {"nlist": 1024, "nprobe": 16, "pq_m": 64, "pq_nbits": 8},
+    "sq8": {},
+}
+
+CONFIG_FILE = "index_config.json"
+
+# faiss asks for ~39 training points per centroid
+_POINTS_PER_CENTROID = 39
+
+
+def resolve_params(index_type: str, params: Optional[dict] = None) -> dict:
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type '{index_type}'. Choose from {INDEX_TYPES}.")
+    return dict(DEFAULT_PARAMS[index_type], **(params or {}))
+
+
+def needs_training(index_type: str) -> bool:
+    return index_type in ("ivf_flat", "ivf_pq", "sq8")
+
+
+def training_size(index_type: str, params: dict) -> int:
+    """Number of vectors to collect before training without shrinking the index."""
+    if index_type == "ivf_flat":
+        return params["nlist"] * _POINTS_PER_CENTROID
+    if index_type == "ivf_pq":
+        return max(params["nlist"], 2 ** params["pq_nbits"]) * _POINTS_PER_CENTROID
+    if index_type == "sq8":
+        return 1
+    return 0
+
+
+def fit_params(index_type: str, params: dict, n_train: int) -> dict:
+    """Shrink nlist / pq_nbits so a small training set still yields a usable index."""
+    params = dict(params)
+    if index_type in ("ivf_flat", "ivf_pq"):
+        params["nlist"] = max(1, min(params["nlist"], n_train // _POINTS_PER_CENTROID))
+        params["nprobe"] = min(params["nprobe"], params["nlist"])
+    if index_type == "ivf_pq":
+        params["pq_nbits"] = max(1, min(params["pq_nbits"], int(math.log2(max(n_train, 2)))))
+    return params
+
+
+def build_index(index_type: str, dim: int, params: dict) -> faiss.Index:
+    """Create an empty (possibly untrained) index."""
+    if index_type == "flat":
+        return faiss.IndexFlatL2(dim)
+    if index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, params["M"])
+        index.hnsw.efConstruction = params["ef_construction"]
+        index.hnsw.efSearch = params["ef_search"]
+        return index
+    if index_type == "ivf_flat":
+        index = faiss.index_factory(dim, f"IVF{params['nlist']},Flat")
+    elif index_type == "ivf_pq":
+        if dim % params["pq_m"]:
+            raise ValueError(f"pq_m={params['pq_m']} must divide the embedding dimension {dim}.")
+        index = faiss.index_factory(dim, f"IVF{params['nlist']},PQ{params['pq_m']}x{params['pq_nbits']}")
+    else:
+        return faiss.index_factory(dim, "SQ8")
+    faiss.extract_index_ivf(index).nprobe = params["nprobe"]
+    return index
+
+
+def train_index(index_type: str, vectors: np.ndarray, params: dict,
+                sample_size: int = 100_000, seed: int = 0) -> Tuple[faiss.Index, dict]:
+    """
+    Build an index of ``index_type`` and train it on a random sample of
+    ``vectors``. Returns the index and the params it was built with, after
+    ``fit_params``; store those, not the requested ones.
+    """
+    if len(vectors) > sample_size:
+        rng = np.random.default_rng(seed)
+        vectors = vectors[rng.choice(len(vectors), sample_size, replace=False)]
+    params = fit_params(index_type, params, len(vectors))
+    index = build_index(index_type, vectors.shape[1], params)
+    if not index.is_trained:
+        index.train(np.ascontiguousarray(vectors, dtype=np.float32))
+    ensure_direct_map(index)
+    return index, params
+
+
+def ensure_direct_map(index: faiss.Index):
+    """IVF indexes need a direct map to reconstruct vectors by position."""
+    try:
+        ivf = faiss.extract_index_ivf(index)
+    except RuntimeError:
+        return
+    if ivf.direct_map.type == faiss.DirectMap.NoMap:
+        ivf.make_direct_map()
+
+
+def supports_remove(index: faiss.Index) -> bool:
+    """True if remove_ids compacts positions, keeping them aligned with the chunk store."""
+    return isinstance(index, faiss.IndexFlatCodes)
+
+
+def search_params(index: faiss.Index, selector=None, nprobe: Optional[int] = None,
+                  ef_search: Optional[int] = None):
+    """SearchParameters of the right subclass for ``index``, carrying the query knobs."""
+    try:
+        ivf = faiss.extract_index_ivf(index)
+    except RuntimeError:
+        ivf = None
+    if ivf is not None:
+        params = faiss.SearchParametersIVF()
+        params.nprobe = nprobe or ivf.nprobe
+    elif isinstance(index, faiss.IndexHNSW):
+        params = faiss.SearchParametersHNSW()
+        params.efSearch = ef_search or index.hnsw.efSearch
+    else:
+        params = faiss.SearchParameters()
+    if selector is not None:
+        params.sel = selector
+    return params
+
+
+def save_config(dir_path: str, index_type: str, params: dict):
+    with open(os.path.join(dir_path, CONFIG_FILE), "w", encoding="utf-8") as f:
+        json.dump({"index_type": index_type, "params": params}, f)
+
+
+def load_config(dir_path: str):
+    """Return (index_type, params); indexes saved before this file existed are flat."""
+    path = os.path.join(dir_path, CONFIG_FILE)
+    if not os.path.exists(path):
+        return "flat", {}
+    with open(path, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    return config["index_type"], config.get("params", {})
@@ -0,0 +1,197 @@
+"""
+Document extraction and chunking, runnable in worker processes.
+
+Everything here is module-level and free of embedding-model state so it can be
+pickled into a spawn-mode process pool (pipeline.py forces ``spawn``).
+
+CSV files are streamed instead (see ``iter_csv_parts``): rows are read
+lazily and grouped into header-prefixed chunks, so a multi-GB export is
+chunked in constant memory and no chunk cuts a row in half.
+"""
+import os
+import csv
+import multiprocessing
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Iterator, List
+
+
+def extract_text(path: str) -> str:
+    ext = os.path.splitext(path)[1].lower()
+    try:
+        if ext in ['.txt', '.md']:
+            with open(path, 'r', encoding='utf-8') as f:
+                return f.read()
+        elif ext == '.pdf':
+            from PyPDF2 import PdfReader
+            reader = PdfReader(path)
+            return "\n".join(page.extract_text() or "" for page in reader.pages)
+        elif ext == '.csv':
+            return extract_csv_text(path)
+    except Exception as e:
+        print(f"[WARN] Failed to read {path}: {e}")
+    return ""
+
+
+def extract_csv_text(path: str) -> str:
+    lines = []
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header:
+                lines.append(", ".join(header))
+            for row in reader:
+                lines.append(", ".join(row))
+    except Exception as e:
+        print(f"[WARN] Failed to parse CSV {path}: {e}")
+    return "\n".join(lines)
+
+
+def iter_csv_chunks(path: str, chunk_size: int) -> Iterator[tuple]:
+    """
+    Yield (text, row_start, row_end) for consecutive groups of data rows
+    (0-based, inclusive). Each text starts with the header line and stays
+    within ``chunk_size`` characters; a row longer than that on its own is
+    split across several chunks with the same row range.
+    """
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        prefix = ", ".join(header) + "\n" if header else ""
+        budget = max(chunk_size - len(prefix), 1)
+        lines, size, start = [], 0, 0
+        for row_id, row in enumerate(reader):
+            line = ", ".join(row)
+            if lines and size + len(line) + 1 > budget:
+                yield prefix + "\n".join(lines), start, row_id - 1
+                lines, size = [], 0
+            if not lines:
+                start = row_id
+            if len(line) > budget:
+                for begin in range(0, len(line), budget):
+                    yield prefix + line[begin:begin + budget], row_id, row_id
+                continue
+            lines.append(line)
+            size += len(line) + 1
+        if lines:
+            yield prefix + "\n".join(lines), start, start + len(lines) - 1
+
+
+def iter_csv_parts(path: str, digest: str, chunk_size: int, part_size: int = 256) -> Iterator[dict]:
+    """
+    Stream a CSV file as ``chunk_file``-style results of at most
+    ``part_size`` chunks. Parts carry ``first_chunk`` (index of their first
+    chunk in the file), per-chunk ``chunk_metadata`` with the row range
+    (``row_start``/``row_end``) and ``final`` on the last part. A parse error
+    ends the file early with a warning, like ``extract_csv_text``.
+    """
+    file_name = os.path.basename(path)
+    metadata = {"source": file_name, "source_type": "csv", "date": extract_date(path)}
+
+    def part(chunks, first, final):
+        return {"path": path, "file_name": file_name, "digest": digest,
+                "chunks": [c[0] for c in chunks],
+                "ids": [f"{file_name}:{digest[:16]}:{first + i}" for i in range(len(chunks))],
+                "metadata": metadata, "error": None, "first_chunk": first, "final": final,
+                "chunk_metadata": [{"row_start": c[1], "row_end": c[2]} for c in chunks]}
+
+    chunks, first = [], 0
+    try:
+        for chunk in iter_csv_chunks(path, chunk_size):
+            chunks.append(chunk)
+            if len(chunks) >= part_size:
+                yield part(chunks, first, final=False)
+                first += len(chunks)
+                chunks = []
+    except Exception as e:
+        print(f"[WARN] Failed to parse CSV {path}: {e}")
+    yield part(chunks, first, final=True)
+
+
+def extract_date(path: str) -> str:
+    base = os.path.basename(path)
+    for fmt in ("%Y-%m-%d", "%Y%m%d"):
+        try:
+            return datetime.strptime(base[:10], fmt).strftime("%Y-%m-%d")
+        except:
+            continue
+    try:
+        ts = os.path.getmtime(path)
+        return datetime.fromtimestamp(ts).strftime("%Y-%m-%d")
+    except:
+        return "unknown"
+
+
+def chunk_file(path: str, digest: str, chunk_size: int, chunk_overlap: int) -> dict:
+    """
+    Extract and split one file. Returns a dict with the file's ``chunks``,
+    their ``ids`` and shared ``metadata``; ``error`` is set instead when the
+    file could not be processed.
+    """
+    file_name = os.path.basename(path)
+    result = {"path": path, "file_name": file_name, "digest": digest,
+              "chunks": [], "ids": [], "metadata": None, "error": None}
+    try:
+        text = extract_text(path)
+        if not text.strip():
+            return result
+        from langchain.text_splitter import RecursiveCharacterTextSplitter
+        splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+        result["chunks"] = splitter.split_text(text)
+        result["ids"] = [f"{file_name}:{digest[:16]}:{i}" for i in range(len(result["chunks"]))]
+        result["metadata"] = {
+            "source": file_name,
+            "source_type": os.path.splitext(path)[1].lower().strip('.'),
+            "date": extract_date(path),
+        }
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    return result
+
+
+def iter_chunked_files(
+    jobs: List[tuple],
+    chunk_size: int,
+    chunk_overlap: int,
+    workers: int = 1,
+    stream_csv: bool = True,
+) -> Iterator[dict]:
+    """
+    Yield ``chunk_file`` results for (path, digest) jobs as they complete.
+
+    With ``workers`` > 1 files are parsed in a spawn-mode process pool and
+    results arrive in completion order; otherwise they are processed inline.
+    With ``stream_csv`` CSV files are streamed afterwards, inline, as several
+    partial results each (see ``iter_csv_parts``).
+    """
+    csv_jobs = [job for job in jobs if stream_csv and job[0].lower().endswith(".csv")]
+    jobs = [job for job in jobs if not (stream_csv and job[0].lower().endswith(".csv"))]
+    yield from _iter_chunk_file_results(jobs, chunk_size, chunk_overlap, workers)
+    for path, digest in csv_jobs:
+        yield from iter_csv_parts(path, digest, chunk_size)
+
+
+def _iter_chunk_file_results(jobs: List[tuple], chunk_size: int, chunk_overlap: int,
+                             workers: int) -> Iterator[dict]:
+    if not jobs:
+        return
+    if workers <= 1 or len(jobs) <= 1:
+        for path, digest in jobs:
+            yield chunk_file(path, digest, chunk_size, chunk_overlap)
+        return
+
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=min(workers, len(jobs)), mp_context=ctx) as pool:
+        futures = {
+            pool.submit(chunk_file, path, digest, chunk_size, chunk_overlap): path
+            for path, digest in jobs
+        }
+        for future in as_completed(futures):
+            try:
+                yield future.result()
+            except Exception as e:  # worker crashed (e.g. killed by OOM)
+                path = futures[future]
+                yield {"path": path, "file_name": os.path.basename(path), "digest": None,
+                       "chunks": [], "ids": [], "metadata": None,
+                       "error": f"{type(e).__name__}: {e}"}
@@ -0,0 +1,99 @@
+import os
+import json
+import hashlib
+from typing import Dict, List, Optional
+
+
+class IndexManifest:
+    """
+    On-disk record of which source files are in the index.
+
+    Stored as ``manifest.json`` next to ``index.faiss``. Every entry maps a file
+    name (the ``source`` metadata of its chunks) to the SHA-256 of its content
+    and the docstore ids of its chunks, so re-indexing can skip unchanged
+    files and drop the stale vectors of changed ones.
+    """
+
+    FILE_NAME = "manifest.json"
+
+    def __init__(self):
+        self.files: Dict[str, dict] = {}
+
+    @staticmethod
+    def hash_file(path: str, block_size: int = 1 << 20) -> str:
+        """Return the hex SHA-256 of a file's bytes."""
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(block_size), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def status(self, name: str, digest: str) -> str:
+        """Return 'new', 'changed' or 'unchanged' for a file and its current hash."""
+        entry = self.files.get(name)
+        if entry is None:
+            return "new"
+        if entry.get("sha256") is None:
+            # Adopted from an index built before manifests existed: trust it
+            # matches the file on disk instead of re-embedding everything.
+            entry["sha256"] = digest
+            return "unchanged"
+        return "unchanged" if entry["sha256"] == digest else "changed"
+
+    def pending(self, paths: List[str]) -> List[str]:
+        """Return the paths that are new or whose content changed since indexing."""
+        out = []
+        for path in paths:
+            try:
+                digest = self.hash_file(path)
+            except OSError as e:
+                print(f"[WARN] Failed to hash {path}: {e}")
+                continue
+            if self.status(os.path.basename(path), digest) != "unchanged":
+                out.append(path)
+        return out
+
+    def ids_for(self, name: str) -> List[str]:
+        entry = self.files.get(name)
+        return list(entry["ids"]) if entry else []
+
+    def record(self, name: str, digest: str, ids: List[str]):
+        self.files[name] = {"sha256": digest, "ids": list(ids)}
+
+    def remove(self, name: str) -> List[str]:
+        """Forget a file and return the ids of its chunks."""
+        entry = self.files.pop(name, None)
+        return list(entry["ids"]) if entry else []
+
+    def save(self, dir_path: str):
+        tmp = os.path.join(dir_path, self.FILE_NAME + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": 1, "files": self.files}, f, ensure_ascii=False)
+        os.replace(tmp, os.path.join(dir_path, self.FILE_NAME))
+
+    @classmethod
+    def load(cls, dir_path: str) -> Optional["IndexManifest"]:
+        """Load ``manifest.json`` from ``dir_path``; None if it does not exist."""
+        path = os.path.join(dir_path, cls.FILE_NAME)
+        if not os.path.exists(path):
+            return None
+        manifest = cls()
+        with open(path, "r", encoding="utf-8") as f:
+            manifest.files = json.load(f).get("files", {})
+        return manifest
+
+    @classmethod
+    def from_docstore(cls, index_to_docstore_id: Dict[int, str], docstore) -> "IndexManifest":
+        """
+        Rebuild a manifest from a docstore, for an index that has none on disk.
+        File hashes are unknown, so entries are adopted on first check.
+        """
+        manifest = cls()
+        for _, doc_id in sorted(index_to_docstore_id.items()):
+            doc = docstore.search(doc_id)
+            source = getattr(doc, "metadata", {}).get("source")
+            if source is None:
+                continue
+            entry = manifest.files.setdefault(source, {"sha256": None, "ids": []})
+            entry["ids"].append(doc_id)
+        return manifest
@@ -0,0 +1,180 @@
+import os
+import json
+from datetime import date
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from retriever.columns import BlobColumn, load_array, save_array
+
+
+class MetadataIndex:
+    """
+    Columnar copy of the filterable chunk metadata, aligned with FAISS positions.
+
+    ``source_type`` and ``source`` are dictionary-encoded int32 columns and
+    ``date`` is an int32 day ordinal (-1 for "unknown"). A filter resolves to a
+    boolean mask over positions, which the retriever uses to search only the
+    matching subset instead of post-filtering the top_k hits.
+
+    The columns also hold everything else the chunk metadata carries
+    (``chunk_id`` and, as per-row JSON, any other keys), so ``row`` rebuilds a
+    chunk's metadata dict without a pickled docstore.
+
+    Each column is saved as its own .npy file (the extra keys as a
+    ``BlobColumn``) and memory-mapped by ``load``; only the two value
+    vocabularies in metadata.json are parsed up front.
+    """
+
+    FILE_NAME = "metadata.json"
+    _COLUMNS = ("source", "source_type", "date", "chunk_id")
+
+    def __init__(self):
+        self.source_types: List[str] = []
+        self.sources: List[str] = []
+        self._type_codes: Dict[str, int] = {}
+        self._source_codes: Dict[str, int] = {}
+        self.source_type = np.empty(0, dtype=np.int32)
+        self.source = np.empty(0, dtype=np.int32)
+        self.date = np.empty(0, dtype=np.int32)
+        self.chunk_id = np.empty(0, dtype=np.int32)
+        self.extra = BlobColumn()  # JSON of the other keys, "" when there are none
+
+    def __len__(self) -> int:
+        return len(self.date)
+
+    @staticmethod
+    def _encode(value: str, vocab: List[str], codes: Dict[str, int]) -> int:
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(vocab)
+            vocab.append(value)
+        return code
+
+    @staticmethod
+    def _date_ordinal(value: Optional[str]) -> int:
+        try:
+            return date.fromisoformat(value).toordinal()
+        except (TypeError, ValueError):
+            return -1
+
+    def append(self, metadatas: Iterable[dict]):
+        """Add the metadata of newly indexed chunks, in FAISS insertion order."""
+        types, sources, dates, chunk_ids, extras = [], [], [], [], []
+        for meta in metadatas:
+            types.append(self._encode(str(meta.get("source_type", "")), self.source_types, self._type_codes))
+            sources.append(self._encode(str(meta.get("source", "")), self.sources, self._source_codes))
+            dates.append(self._date_ordinal(meta.get("date")))
+            chunk_ids.append(int(meta.get("chunk_id", -1)))
+            rest = {k: v for k, v in meta.items() if k not in self._COLUMNS}
+            extras.append(json.dumps(rest) if rest else "")
+        self.source_type = np.concatenate([self.source_type, np.asarray(types, dtype=np.int32)])
+        self.source = np.concatenate([self.source, np.asarray(sources, dtype=np.int32)])
+        self.date = np.concatenate([self.date, np.asarray(dates, dtype=np.int32)])
+        self.chunk_id = np.concatenate([self.chunk_id, np.asarray(chunk_ids, dtype=np.int32)])
+        self.extra.append(extras)
+
+    def remove(self, positions: Iterable[int]):
+        """Drop rows at the given positions; remaining rows keep their order like FAISS remove_ids."""
+        keep = np.ones(len(self), dtype=bool)
+        keep[np.fromiter(positions, dtype=np.int64)] = False
+        self.source_type = self.source_type[keep]
+        self.source = self.source[keep]
+        self.date = self.date[keep]
+        self.chunk_id = self.chunk_id[keep]
+        self.extra.remove(np.flatnonzero(~keep))
+
+    def row(self, pos: int) -> dict:
+        """The metadata dict of the chunk at ``pos``, as it was indexed."""
+        ordinal = int(self.date[pos])
+        meta = {
+            "source": self.sources[self.source[pos]],
+            "source_type": self.source_types[self.source_type[pos]],
+            "date": date.fromordinal(ordinal).isoformat() if ordinal >= 0 else "unknown",
+            "chunk_id": int(self.chunk_id[pos]),
+        }
+        extra = self.extra.raw(pos)
+        if extra:
+            meta.update(json.loads(extra))
+        return meta
+
+    def positions(self, source: str) -> np.ndarray:
+        """Positions of every chunk of one source file."""
+        code = self._source_codes.get(source)
+        if code is None:
+            return np.empty(0, dtype=np.int64)
+        return np.flatnonzero(self.source == code)
+
+    def mask(
+        self,
+        source_type: Optional[str] = None,
+        date_after: Optional[str] = None,
+        source: Optional[str] = None,
+    ) -> Optional[np.ndarray]:
+        """
+        Return a boolean mask of positions that pass every given filter,
+        or None when no filter is set.
+        """
+        if not (source_type or date_after or source):
+            return None
+        mask = np.ones(len(self), dtype=bool)
+        if source_type:
+            code = self._type_codes.get(source_type)
+            if code is None:
+                return np.zeros(len(self), dtype=bool)
+            mask &= self.source_type == code
+        if source:
+            code = self._source_codes.get(source)
+            if code is None:
+                return np.zeros(len(self), dtype=bool)
+            mask &= self.source == code
+        if date_after:
+            after = self._date_ordinal(date_after)
+            if after < 0:
+                print(f"[WARN] Ignoring invalid date filter '{date_after}' (expected YYYY-MM-DD)")
+            else:
+                mask &= self.date >= after
+        return mask
+
+    def _path(self, dir_path: str, name: str) -> str:
+        return os.path.join(dir_path, f"metadata.{name}")
+
+    def save(self, dir_path: str):
+        for column in ("source_type", "source", "date", "chunk_id"):
+            save_array(self._path(dir_path, f"{column}.npy"), getattr(self, column))
+        self.extra.save(self._path(dir_path, "extra.bin"), self._path(dir_path, "extra.offsets.npy"))
+        # Written last: its presence marks a complete save
+        tmp = os.path.join(dir_path, self.FILE_NAME + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": 2, "rows": len(self), "source_types": self.source_types,
+                       "sources": self.sources}, f, ensure_ascii=False)
+        os.replace(tmp, os.path.join(dir_path, self.FILE_NAME))
+
+    @classmethod
+    def load(cls, dir_path: str) -> Optional["MetadataIndex"]:
+        path = os.path.join(dir_path, cls.FILE_NAME)
+        if not os.path.exists(path):
+            return None
+        index = cls()
+        with open(path, "r", encoding="utf-8") as f:
+            vocab = json.load(f)
+        for column in ("source_type", "source", "date", "chunk_id"):
+            setattr(index, column, load_array(index._path(dir_path, f"{column}.npy")))
+        index.extra = BlobColumn.load(index._path(dir_path, "extra.bin"), index._path(dir_path, "extra.offsets.npy"))
+        index._set_vocab(vocab["source_types"], vocab["sources"])
+        return index
+
+    def _set_vocab(self, source_types: List[str], sources: List[str]):
+        self.source_types = source_types
+        self.sources = sources
+        self._type_codes = {v: i for i, v in enumerate(source_types)}
+        self._source_codes = {v: i for i, v in enumerate(sources)}
+
+    @classmethod
+    def from_docstore(cls, index_to_docstore_id: Dict[int, str], docstore) -> "MetadataIndex":
+        """Build the columns from a docstore (for indexes saved without them)."""
+        index = cls()
+        index.append(
+            docstore.search(doc_id).metadata for _, doc_id in sorted(index_to_docstore_id.items())
+        )
+        return index
@@ -0,0 +1,145 @@
+import time
+import threading
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from retriever.cache import LRUCache, normalize_query
+
+
+class CrossEncoderReranker:
+    """
+    Re-scores retrieved chunks with a local cross-encoder.
+
+    The pipeline over-fetches ``candidates`` chunks from the ANN index and
+    keeps the ``top_k`` best by cross-encoder score. Scoring is CPU-friendly:
+
+    - (query, chunk) pairs are sorted by length and scored in batches of
+      ``batch_size``, so each batch pads to similar lengths
+    - scores are cached per (normalised query, chunk text) in an LRU of
+      ``cache_size`` pairs, so repeated and overlapping requests only score
+      new pairs
+    - ``time_budget`` seconds per request is checked between batches; once
+      it is spent the remaining batches are skipped and the request falls
+      back to the ANN order (pairs scored so far stay cached)
+    - torch intra-op threads are pinned to ``num_threads`` while scoring,
+      as in EmbeddingEngine
+
+    ``model`` may be an existing sentence_transformers CrossEncoder (or any
+    object with the same ``predict``) to share one between pipelines;
+    otherwise it is loaded on first use or by ``load()``.
+    """
+
+    def __init__(
+        self,
+        model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2",
+        device: str = "cpu",
+        candidates: int = 20,
+        top_k: int = 3,
+        batch_size: int = 16,
+        max_length: int = 512,
+        num_threads: int = 1,
+        cache_size: int = 10_000,
+        time_budget: Optional[float] = 0.5,
+        model=None,
+    ):
+        self.model_name = model_name
+        self.candidates = candidates
+        self.top_k = top_k
+        self.batch_size = batch_size
+        self.num_threads = num_threads
+        self.time_budget = time_budget
+        self.device = device
+        self.max_length = max_length
+        self.model = model
+        self.scores = LRUCache(cache_size)
+        self.requests = 0
+        self.fallbacks = 0
+        self.pairs_scored = 0
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self.model is not None
+
+    def load(self):
+        if self.model is None:
+            with self._load_lock:
+                if self.model is None:
+                    from sentence_transformers import CrossEncoder
+                    self.model = CrossEncoder(self.model_name, device=self.device, max_length=self.max_length)
+        return self.model
+
+    def _predict(self, pairs: List[Tuple[str, str]]) -> np.ndarray:
+        model = self.load()
+        try:
+            import torch
+        except ImportError:
+            torch = None
+        with self._lock:
+            previous = torch.get_num_threads() if torch is not None else None
+            if torch is not None:
+                torch.set_num_threads(self.num_threads)
+            try:
+                return np.asarray(model.predict(pairs, batch_size=len(pairs), convert_to_numpy=True,
+                                                show_progress_bar=False), dtype=np.float32).ravel()
+            finally:
+                if torch is not None:
+                    torch.set_num_threads(previous)
+
+    def rerank(self, question: str, retrieved: List[Tuple[dict, str]],
+               top_k: Optional[int] = None) -> Tuple[List[Tuple[dict, str]], dict]:
+        """
+        Return (the ``top_k`` best of ``retrieved`` by cross-encoder score,
+        info). ``info`` has "reranked" (False when the time budget ran out and
+        ANN order was kept), "scored", "cached" and "seconds".
+        """
+        top_k = self.top_k if top_k is None else top_k
+        self.load()  # model loading does not count against the time budget
+        start = time.perf_counter()
+        query = normalize_query(question)
+        scores = np.full(len(retrieved), np.nan, dtype=np.float32)
+        todo = []
+        for i, (_, text) in enumerate(retrieved):
+            cached = self.scores.get((query, text))
+            if cached is not None:
+                scores[i] = cached
+            else:
+                todo.append(i)
+        cached_count = len(retrieved) - len(todo)
+
+        # Length-bucketed batches: similar lengths pad to similar sizes
+        todo.sort(key=lambda i: len(retrieved[i][1]))
+        complete = True
+        for begin in range(0, len(todo), self.batch_size):
+            if self.time_budget is not None and time.perf_counter() - start > self.time_budget:
+                complete = False
+                break
+            batch = todo[begin:begin + self.batch_size]
+            batch_scores = self._predict([(question, retrieved[i][1]) for i in batch])
+            for i, score in zip(batch, batch_scores):
+                scores[i] = score
+                self.scores.put((query, retrieved[i][1]), float(score))
+            self.pairs_scored += len(batch)
+
+        self.requests += 1
+        info = {
+            "reranked": complete,
+            "scored": int(np.count_nonzero(~np.isnan(scores))) - cached_count,
+            "cached": cached_count,
+            "seconds": time.perf_counter() - start,
+        }
+        if not complete:
+            self.fallbacks += 1
+            return list(retrieved[:top_k]), info
+        order = np.argsort(-scores, kind="stable")[:top_k]
+        return [retrieved[i] for i in order], info
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "fallbacks": self.fallbacks,
+            "pairs_scored": self.pairs_scored,
+            "cache": self.scores.stats(),
+        }
@@ -1,112 +1,725 @@
 import os
-import csv
-from typing import List, Optional
-from datetime import datetime
+import pickle
+import threading
+from contextlib import contextmanager
+from typing import Callable, List, Optional, Tuple
+
+import faiss
+import numpy as np
+
+from metrics.tracing import tracer
+from retriever import index_factory
+from retriever.embedding import EmbeddingEngine
+from retriever.manifest import IndexManifest
+from retriever.chunk_store import ChunkDocstore, ChunkIdMap, ChunkStore
+from retriever.metadata_index import MetadataIndex
+from retriever.bm25 import BM25Index
+from retriever.cache import LRUCache, QueryEmbeddingCache, normalize_query
+from retriever.embedding_cache import EmbeddingCache
+from retriever.ingest import extract_csv_text, extract_date, extract_text, iter_chunked_files
+
+class _SwapLock:
+    """
+    Readers/writer lock for index swaps: queries share it, and a swap waits
+    for running queries to finish and holds new ones back while it runs.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writing = False
+
+    @contextmanager
+    def read(self):
+        with self._cond:
+            while self._writing:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        with self._cond:
+            while self._writing:
+                self._cond.wait()
+            self._writing = True
+            while self._readers:
+                self._cond.wait()
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writing = False
+                self._cond.notify_all()
 
-from langchain.vectorstores import FAISS
-from langchain.embeddings import HuggingFaceEmbeddings
-from langchain.schema import Document
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from PyPDF2 import PdfReader
 
 class Retriever:
-    def __init__(self, embed_model_name: str = "BAAI/bge-large-en", device: str = "cpu"):
-        self.embedder = HuggingFaceEmbeddings(model_name=embed_model_name)
-        self.vectorstore: Optional[FAISS] = None
+    # Filters matching at most this many chunks are scored exactly against the
+    # reconstructed subset; larger subsets use a FAISS ID selector.
+    exact_subset_max = 4096
+
+    def __init__(self, embed_model_name: str = "BAAI/bge-large-en", device: str = "cpu",
+                 cache_dir: Optional[str] = None, query_cache_size: int = 1024,
+                 result_cache_size: int = 1024, cache_ttl: Optional[float] = None,
+                 chunk_size: int = 1500, chunk_overlap: int = 300, ingest_workers: int = 1,
+                 embed_threads: int = 1, embed_batch_size: int = 32, max_seq_length: int = 512,
+                 index_type: str = "flat", index_params: Optional[dict] = None,
+                 train_sample_size: int = 100_000, embedder: Optional[EmbeddingEngine] = None,
+                 embedding_cache_bytes: int = 2 * 1024 ** 3):
+        self.embed_model_name = embed_model_name
+        self.device = device
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        # Extraction processes for add_documents; 1 parses inline
+        self.ingest_workers = ingest_workers
+        # An existing engine can be shared (e.g. by benchmark retrievers over
+        # corpus subsets) instead of loading the model again
+        self.embedder = embedder or EmbeddingEngine(
+            embed_model_name,
+            device=device,
+            num_threads=embed_threads,
+            batch_size=embed_batch_size,
+            max_seq_length=max_seq_length,
+        )
+        # Chunk vectors keyed by content, under cache_dir, so rebuilding the
+        # index only encodes text this model has not embedded before
+        self.embedding_cache = (
+            EmbeddingCache(self.embedder.cache_key, os.path.join(cache_dir, "embeddings"), embedding_cache_bytes)
+            if cache_dir else None
+        )
+        self.index: Optional[faiss.Index] = None  # created with the first batch of vectors
+        # FAISS index type used when the store is first created (see
+        # retriever/index_factory.py); trainable types collect training_size()
+        # vectors first and are trained on up to train_sample_size of them.
+        self.index_type = index_type
+        self.index_params = index_factory.resolve_params(index_type, index_params)
+        self.train_sample_size = train_sample_size
+        self._pending: List[Tuple[List[Tuple[str, dict]], List[str], np.ndarray]] = []
+        self.manifest = IndexManifest()
+        # Chunk texts, metadata columns and BM25 postings, all aligned with
+        # FAISS positions.
+        self.chunks = ChunkStore()
+        self.metadata_index = MetadataIndex()
+        self.bm25 = BM25Index()
+
+        # Query vectors depend only on the model, so they survive index changes
+        # (and restarts, when cache_dir is set). Result ids are dropped whenever
+        # the index changes.
+        self.query_cache = QueryEmbeddingCache(self.embedder.cache_key, query_cache_size, cache_ttl, cache_dir)
+        self.result_cache = LRUCache(result_cache_size, cache_ttl)
+        self.index_version = 0
+        self._index_listeners: List[Callable[[Optional[set]], None]] = [
+            lambda sources: self.result_cache.clear()
+        ]
+        self._swap_lock = _SwapLock()
 
     def _extract_text(self, path: str) -> str:
-        ext = os.path.splitext(path)[1].lower()
-        try:
-            if ext in ['.txt', '.md']:
-                with open(path, 'r', encoding='utf-8') as f:
-                    return f.read()
-            elif ext == '.pdf':
-                reader = PdfReader(path)
-                return "\n".join(page.extract_text() or "" for page in reader.pages)
-            elif ext == '.csv':
-                return self._extract_csv_text(path)
-        except Exception as e:
-            print(f"[WARN] Failed to read {path}: {e}")
-        return ""
+        return extract_text(path)
 
     def _extract_csv_text(self, path: str) -> str:
-        lines = []
-        try:
-            with open(path, 'r', encoding='utf-8') as f:
-                reader = csv.reader(f)
-                header = next(reader, None)
-                if header:
-                    lines.append(", ".join(header))
-                for row in reader:
-                    lines.append(", ".join(row))
-        except Exception as e:
-            print(f"[WARN] Failed to parse CSV {path}: {e}")
-        return "\n".join(lines)
+        return extract_csv_text(path)
 
     def _extract_date(self, path: str) -> str:
-        base = os.path.basename(path)
-        for fmt in ("%Y-%m-%d", "%Y%m%d"):
+        return extract_date(path)
+
+    def add_documents(self, paths: List[str], force: bool = False, workers: Optional[int] = None,
+                      batch_size: int = 256, progress: Optional[Callable[[dict], None]] = None) -> int:
+        """
+        Incrementally index files. Files whose content hash is already in the
+        manifest are skipped, changed files have their old vectors removed, and
+        only new chunks are embedded and merged into the loaded index.
+
+        Extraction and chunking run in ``workers`` processes (default
+        ``self.ingest_workers``); chunks are embedded in batches of
+        ``batch_size`` as files finish. ``progress`` is called once per file
+        with {"path", "status", "chunks", "error", "done", "total"}, where
+        status is "indexed", "empty", "skipped" or "failed".
+        Returns the number of chunks added.
+
+        Each batch is applied under the write lock, so concurrent queries see
+        the index before or after a batch, never halfway through one. There
+        must be one writer at a time: add_documents, remove_documents,
+        rebuild_index and load are not safe to call concurrently with each
+        other (IndexWatcher stages its changes on a ``detached_copy`` and
+        uses ``swap`` instead).
+        """
+        workers = self.ingest_workers if workers is None else workers
+        cache_hits = self.embedding_cache.hits if self.embedding_cache is not None else 0
+        jobs = []
+        replaced = set()
+        seen = set()
+        done = 0
+
+        def report(path, status, chunks=0, error=None):
+            if progress is not None:
+                progress({"path": path, "status": status, "chunks": chunks,
+                          "error": error, "done": done, "total": len(paths)})
+
+        for path in paths:
+            file_name = os.path.basename(path)
+            if file_name in seen:
+                continue
+            seen.add(file_name)
             try:
-                return datetime.strptime(base[:10], fmt).strftime("%Y-%m-%d")
-            except:
+                digest = IndexManifest.hash_file(path)
+            except OSError as e:
+                print(f"[WARN] Failed to read {path}: {e}")
+                done += 1
+                report(path, "failed", error=str(e))
                 continue
-        try:
-            ts = os.path.getmtime(path)
-            return datetime.fromtimestamp(ts).strftime("%Y-%m-%d")
-        except:
-            return "unknown"
-
-    def add_documents(self, paths: List[str]):
-        splitter = RecursiveCharacterTextSplitter(chunk_size=1500, chunk_overlap=300)
-        documents = []
-        
-        for path in paths:
-            text = self._extract_text(path)
-            if not text.strip():
+            status = self.manifest.status(file_name, digest)
+            if status == "unchanged" and not force:
+                done += 1
+                report(path, "skipped")
                 continue
+            if self.manifest.remove(file_name):
+                replaced.add(file_name)
+            jobs.append((path, digest))
 
-            chunks = splitter.split_text(text)
-            file_name = os.path.basename(path)
-            source_type = os.path.splitext(path)[1].lower().strip('.')
-            doc_date = self._extract_date(path)
-
-            for i, chunk in enumerate(chunks):
-                documents.append(Document(
-                    page_content=chunk,
-                    metadata={
-                        "source": file_name,
-                        "source_type": source_type,
-                        "date": doc_date,
-                        "chunk_id": i
-                    }
-                ))
+        # Old vectors go first so re-indexed chunks can reuse their ids
+        self._delete_sources(replaced)
+
+        # Streamed files (CSV) arrive as several partial results; only the
+        # one marked final completes the file.
+        documents, ids, indexed = [], [], {}
+        added = 0
+        for result in iter_chunked_files(jobs, self.chunk_size, self.chunk_overlap, workers):
+            final = result.get("final", True)
+            done += final
+            if result["error"]:
+                print(f"[WARN] Failed to index {result['path']}: {result['error']}")
+                report(result["path"], "failed", error=result["error"])
+                continue
+            first = result.get("first_chunk", 0)
+            extras = result.get("chunk_metadata") or [{}] * len(result["chunks"])
+            for i, (chunk, extra) in enumerate(zip(result["chunks"], extras)):
+                documents.append((chunk, dict(result["metadata"], chunk_id=first + i, **extra)))
+            ids += result["ids"]
+            if result["chunks"]:
+                entry = indexed.setdefault(result["file_name"], {"file_name": result["file_name"],
+                                                                 "digest": result["digest"], "ids": []})
+                entry["ids"] += result["ids"]
+            if len(documents) >= batch_size:
+                added += self._add_batch(documents, ids)
+                documents, ids = [], []
+            if final:
+                entry = indexed.get(result["file_name"])
+                if entry is None:
+                    report(result["path"], "empty")
+                else:
+                    report(result["path"], "indexed", chunks=len(entry["ids"]))
+        added += self._add_batch(documents, ids, final=True)
+
+        for result in indexed.values():
+            self.manifest.record(result["file_name"], result["digest"], result["ids"])
+        if added:
+            stats = self.embedder.stats()
+            print(f"✅ Indexed {added} chunks ({stats['chunks_per_sec']:.1f} chunks/sec embedding, "
+                  f"{stats['num_threads']} thread(s), batch {stats['batch_size']})")
+        if self.embedding_cache is not None:
+            self.embedding_cache.flush()
+            reused = self.embedding_cache.hits - cache_hits
+            if reused:
+                print(f"✅ Reused {reused} cached chunk embeddings")
+        if added or replaced:
+            with self._swap_lock.write():
+                self._index_changed(set(indexed) | replaced)
+        return added
 
+    def _add_batch(self, documents: List[Tuple[str, dict]], ids: List[str], final: bool = False) -> int:
+        """
+        Embed a batch of (chunk text, metadata) pairs and append them to every
+        index structure.
+        Until a trainable index exists, batches are held back to train it;
+        ``final`` trains on whatever has been collected.
+        """
         if documents:
-            self.vectorstore = FAISS.from_documents(documents, self.embedder)
+            with tracer.span("retriever.embed_documents"):
+                texts = [text for text, _ in documents]
+                if self.embedding_cache is not None:
+                    vectors = self.embedding_cache.embed(texts, self.embedder.encode)
+                else:
+                    vectors = self.embedder.encode(texts)
+            self._pending.append((documents, ids, vectors))
+        if not self._pending:
+            return 0
 
-    def query(self, question: str, top_k: int = 5, filter_source_type: Optional[str] = None, filter_date_after: Optional[str] = None):
-        if self.vectorstore is None:
+        index, params = self.index, self.index_params
+        if index is None:
+            collected = sum(len(p[0]) for p in self._pending)
+            if not final and collected < index_factory.training_size(self.index_type, params):
+                return 0
+            vectors = np.vstack([p[2] for p in self._pending])
+            if index_factory.needs_training(self.index_type):
+                index, params = index_factory.train_index(self.index_type, vectors, params,
+                                                          self.train_sample_size)
+            else:
+                index = index_factory.build_index(self.index_type, vectors.shape[1], params)
+
+        added = 0
+        with self._modifying():
+            self.index, self.index_params = index, params
+            for documents, ids, vectors in self._pending:
+                index.add(vectors)
+                self.chunks.append(ids, (text for text, _ in documents))
+                self.metadata_index.append(metadata for _, metadata in documents)
+                self.bm25.append(text for text, _ in documents)
+                added += len(documents)
+        self._pending = []
+        return added
+
+    def remove_documents(self, file_names: List[str]) -> int:
+        """
+        Drop every chunk of the given source files (e.g. files deleted from
+        the documents folder). Returns the number of chunks removed. Applied
+        under the write lock; one writer at a time, as for add_documents.
+        """
+        removed = {name for name in file_names if self.manifest.remove(name)}
+        before = len(self.metadata_index)
+        self._delete_sources(removed)
+        if removed:
+            with self._swap_lock.write():
+                self._index_changed(removed)
+        return before - len(self.metadata_index)
+
+    def detached_copy(self) -> "Retriever":
+        """
+        An empty Retriever with this one's settings, sharing its embedding
+        engine and chunk-embedding cache, for building a new version of the
+        index off to the side; ``swap`` then puts it in place.
+        """
+        copy = Retriever(
+            self.embed_model_name, device=self.device, query_cache_size=0, result_cache_size=0,
+            chunk_size=self.chunk_size, chunk_overlap=self.chunk_overlap, ingest_workers=self.ingest_workers,
+            index_type=self.index_type, index_params=self.index_params,
+            train_sample_size=self.train_sample_size, embedder=self.embedder,
+        )
+        copy.embedding_cache = self.embedding_cache
+        return copy
+
+    def swap(self, other: "Retriever", sources: Optional[set] = None):
+        """
+        Replace the index with ``other``'s (typically a ``detached_copy``
+        that was loaded and updated in the background). Running queries
+        finish on the old index and later ones see the new one; no query sees
+        a mix. ``sources`` is passed on to the index listeners.
+        """
+        with self._swap_lock.write():
+            self.index = other.index
+            self.chunks = other.chunks
+            self.metadata_index = other.metadata_index
+            self.manifest = other.manifest
+            self.bm25 = other.bm25
+            self.index_type, self.index_params = other.index_type, other.index_params
+            # Cached results hold positions in the old index, so they are
+            # dropped before any query can run against the new one
+            self._index_changed(sources)
+
+    def rebuild_index(self, index_type: Optional[str] = None, index_params: Optional[dict] = None,
+                      vectors: Optional[np.ndarray] = None):
+        """
+        Rebuild the FAISS index (optionally as another type) over the current
+        chunks, retraining on a fresh sample. Positions are preserved, so the
+        chunk store, metadata and BM25 indexes stay valid. Vectors are
+        reconstructed from the current index unless given; reconstruction from
+        quantised (ivf_pq / sq8) indexes is approximate. The new index is
+        built off to the side and put in place under the write lock.
+        """
+        if self.index is None:
             raise ValueError("No documents indexed yet.")
-        
-        retriever = self.vectorstore.as_retriever(search_kwargs={"k": top_k})
-        
-        results = retriever.get_relevant_documents(question)
-
-        filtered_results = []
-        for doc in results:
-            if filter_source_type and doc.metadata.get("source_type") != filter_source_type:
+        index_type = index_type or self.index_type
+        if index_params is None and index_type == self.index_type:
+            index_params = self.index_params
+        params = index_factory.resolve_params(index_type, index_params)
+        if vectors is None:
+            old = self.index
+            index_factory.ensure_direct_map(old)
+            vectors = old.reconstruct_n(0, old.ntotal)
+        if index_factory.needs_training(index_type):
+            index, params = index_factory.train_index(index_type, vectors, params, self.train_sample_size)
+        else:
+            index = index_factory.build_index(index_type, vectors.shape[1], params)
+        index.add(np.ascontiguousarray(vectors, dtype=np.float32))
+        with self._swap_lock.write():
+            self.index = index
+            self.index_type, self.index_params = index_type, params
+            self._index_changed(None)
+
+    def add_index_listener(self, callback: Callable[[Optional[set]], None]):
+        """
+        Register ``callback(sources)`` to run after the index changes. ``sources``
+        is the set of re-indexed/removed file names, or None when the whole
+        index was replaced (e.g. by load()).
+        """
+        self._index_listeners.append(callback)
+
+    def _index_changed(self, sources: Optional[set] = None):
+        self.index_version += 1
+        for callback in self._index_listeners:
+            callback(sources)
+
+    @contextmanager
+    def _modifying(self):
+        """
+        Write lock for changing the index in place. Cached results hold
+        positions, so they are dropped before any query sees the change.
+        """
+        with self._swap_lock.write():
+            try:
+                yield
+            finally:
+                self.result_cache.clear()
+
+    def _delete_sources(self, sources: set):
+        if not sources or self.index is None:
+            return
+        positions = np.concatenate([self.metadata_index.positions(name) for name in sources])
+        if not positions.size:
+            return
+        with self._modifying():
+            if index_factory.supports_remove(self.index):
+                self.index.remove_ids(positions.astype(np.int64))
+            else:
+                self._rebuild_without(positions)
+            self.chunks.remove(positions)
+            self.metadata_index.remove(positions)
+            self.bm25.remove(positions)
+
+    def _rebuild_without(self, positions: np.ndarray):
+        """
+        Delete for HNSW/IVF indexes, whose remove_ids is unsupported or does not
+        compact positions: re-add the surviving vectors to the emptied (still
+        trained) index. Costs O(corpus) per call.
+        """
+        index = self.index
+        keep = np.ones(index.ntotal, dtype=bool)
+        keep[positions] = False
+        keep = np.flatnonzero(keep).astype(np.int64)
+        index_factory.ensure_direct_map(index)
+        vectors = index.reconstruct_batch(keep) if keep.size else None
+        index.reset()
+        if vectors is not None:
+            index.add(vectors)
+
+    def query(self, question: str, top_k: int = 5, filter_source_type: Optional[str] = None,
+              filter_date_after: Optional[str] = None, filter_source: Optional[str] = None,
+              mode: str = "dense", fusion: str = "rrf", dense_weight: float = 1.0,
+              sparse_weight: float = 1.0, rrf_k: int = 60, candidate_k: Optional[int] = None,
+              nprobe: Optional[int] = None, ef_search: Optional[int] = None):
+        """
+        Retrieve the top_k chunks for a question.
+
+        mode is "dense" (FAISS, the default), "sparse" (BM25) or "hybrid".
+        Hybrid mode fetches candidate_k hits from each leg (default
+        max(4 * top_k, 20)) and fuses them with reciprocal-rank fusion
+        (fusion="rrf", rank constant rrf_k) or a min-max normalised weighted
+        sum of scores (fusion="weighted"), each leg scaled by dense_weight /
+        sparse_weight.
+
+        nprobe (IVF indexes) and ef_search (HNSW) override the index's search
+        breadth for this query, trading latency for recall.
+        """
+        return self.query_batch(
+            [question], top_k, filter_source_type, filter_date_after, filter_source, mode, fusion,
+            dense_weight, sparse_weight, rrf_k, candidate_k, nprobe, ef_search,
+        )[0]
+
+    def query_batch(self, questions: List[str], top_k: int = 5, filter_source_type: Optional[str] = None,
+                    filter_date_after: Optional[str] = None, filter_source: Optional[str] = None,
+                    mode: str = "dense", fusion: str = "rrf", dense_weight: float = 1.0,
+                    sparse_weight: float = 1.0, rrf_k: int = 60, candidate_k: Optional[int] = None,
+                    nprobe: Optional[int] = None, ef_search: Optional[int] = None) -> List[list]:
+        """
+        Like query() for many questions sharing the same options. Questions not
+        in the result cache are embedded in one batched encode and searched with
+        one multi-vector FAISS call. Returns one result list per question, in
+        input order.
+        """
+        with tracer.span("retriever.query"), self._swap_lock.read():
+            return self._query_batch(questions, top_k, filter_source_type, filter_date_after,
+                                     filter_source, mode, fusion, dense_weight, sparse_weight, rrf_k,
+                                     candidate_k, nprobe, ef_search)
+
+    def _query_batch(self, questions, top_k, filter_source_type, filter_date_after, filter_source,
+                     mode, fusion, dense_weight, sparse_weight, rrf_k, candidate_k, nprobe, ef_search):
+        if self.index is None:
+            raise ValueError("No documents indexed yet.")
+        if mode not in ("dense", "sparse", "hybrid"):
+            raise ValueError(f"Unknown retrieval mode '{mode}'.")
+        if mode == "hybrid" and fusion not in ("rrf", "weighted"):
+            raise ValueError(f"Unknown fusion method '{fusion}'.")
+
+        with tracer.span("retriever.filter"):
+            mask = self.metadata_index.mask(
+                source_type=filter_source_type,
+                date_after=filter_date_after,
+                source=filter_source,
+            )
+
+        options = (top_k, filter_source_type, filter_date_after, filter_source, mode, fusion,
+                   dense_weight, sparse_weight, rrf_k, candidate_k, nprobe, ef_search)
+        results: List[Optional[list]] = [None] * len(questions)
+        misses = []
+        for i, question in enumerate(questions):
+            cached = self.result_cache.get((normalize_query(question),) + options)
+            if cached is not None:
+                results[i] = self._chunk_results(cached)
+            else:
+                misses.append(i)
+        if not misses:
+            return results
+
+        fetch_k = top_k if mode != "hybrid" else (candidate_k or max(4 * top_k, 20))
+        dense = [[] for _ in misses]
+        if mode in ("dense", "hybrid"):
+            with tracer.span("retriever.embed"):
+                vectors = self.embed_queries([questions[i] for i in misses])
+            with tracer.span("retriever.dense_search"):
+                dense = self._dense_hits(vectors, fetch_k, mask, nprobe, ef_search)
+
+        for i, dense_hits in zip(misses, dense):
+            sparse_hits = []
+            if mode in ("sparse", "hybrid"):
+                with tracer.span("retriever.sparse_search"):
+                    sparse_hits = self.bm25.search(questions[i], fetch_k, mask)
+            if mode == "dense":
+                hits = dense_hits
+            elif mode == "sparse":
+                hits = sparse_hits
+            else:
+                with tracer.span("retriever.fuse"):
+                    if fusion == "rrf":
+                        hits = self._fuse_rrf([(dense_hits, dense_weight), (sparse_hits, sparse_weight)], rrf_k)
+                    else:
+                        hits = self._fuse_weighted([(dense_hits, dense_weight), (sparse_hits, sparse_weight)])
+
+            positions = [pos for pos, _ in hits[:top_k]]
+            self.result_cache.put((normalize_query(questions[i]),) + options, positions)
+            results[i] = self._chunk_results(positions)
+        return results
+
+    def search_vectors(self, vectors: np.ndarray, top_k: int = 5, filter_source_type: Optional[str] = None,
+                       filter_date_after: Optional[str] = None, filter_source: Optional[str] = None,
+                       nprobe: Optional[int] = None,
+                       ef_search: Optional[int] = None) -> List[List[Tuple[float, dict, str]]]:
+        """
+        Dense search for an (n, dim) matrix of query vectors embedded
+        elsewhere (ShardedRetriever embeds once and sends them to every
+        shard). Filters and search knobs are as in query(). Returns, per
+        query, up to top_k (score, metadata, text) hits, best first; higher
+        scores are better (negated distances for L2 indexes), so lists from
+        several indexes merge on score. Results are not cached, and an empty
+        retriever returns empty lists.
+        """
+        with tracer.span("retriever.dense_search"), self._swap_lock.read():
+            if self.index is None:
+                return [[] for _ in range(len(vectors))]
+            mask = self.metadata_index.mask(
+                source_type=filter_source_type,
+                date_after=filter_date_after,
+                source=filter_source,
+            )
+            results = []
+            for hits in self._dense_hits(vectors, top_k, mask, nprobe, ef_search):
+                chunks = self._chunk_results([pos for pos, _ in hits])
+                results.append([(score, meta, text) for (_, score), (meta, text) in zip(hits, chunks)])
+            return results
+
+    def _dense_hits(self, vectors: np.ndarray, k: int, mask: Optional[np.ndarray], nprobe: Optional[int],
+                    ef_search: Optional[int]) -> List[List[Tuple[int, float]]]:
+        """Per query, (position, score) pairs best first, with scores growing with similarity."""
+        hits = self._search_batch(vectors, k, mask, nprobe=nprobe, ef_search=ef_search)
+        if self.index.metric_type != faiss.METRIC_INNER_PRODUCT:
+            hits = [[(pos, -dist) for pos, dist in query_hits] for query_hits in hits]
+        return hits
+
+    def _chunk_results(self, positions: List[int]) -> List[Tuple[dict, str]]:
+        # Only the returned chunks are decoded from the chunk store
+        with tracer.span("retriever.fetch"):
+            return [(self.metadata_index.row(pos), self.chunks.text(pos)) for pos in positions]
+
+    def embed_query(self, question: str) -> np.ndarray:
+        """Return the (1, dim) float32 query vector, from the cache when possible."""
+        return self.embed_queries([question])
+
+    def embed_queries(self, questions: List[str]) -> np.ndarray:
+        """
+        Return an (n, dim) float32 matrix of query vectors. Cache misses are
+        encoded together in one batch.
+        """
+        vectors = [self.query_cache.get(q) for q in questions]
+        missing = [i for i, v in enumerate(vectors) if v is None]
+        if missing:
+            encoded = np.asarray(self.embedder.encode([questions[i] for i in missing]), dtype=np.float32)
+            for i, vector in zip(missing, encoded):
+                self.query_cache.put(questions[i], vector)
+                vectors[i] = vector
+        return np.array([np.asarray(v, dtype=np.float32).ravel() for v in vectors], dtype=np.float32)
+
+    @staticmethod
+    def _fuse_rrf(legs: List[Tuple[List[Tuple[int, float]], float]], rrf_k: int) -> List[Tuple[int, float]]:
+        scores = {}
+        for hits, weight in legs:
+            for rank, (pos, _) in enumerate(hits):
+                scores[pos] = scores.get(pos, 0.0) + weight / (rrf_k + rank + 1)
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+    @staticmethod
+    def _fuse_weighted(legs: List[Tuple[List[Tuple[int, float]], float]]) -> List[Tuple[int, float]]:
+        scores = {}
+        for hits, weight in legs:
+            if not hits:
                 continue
-            if filter_date_after:
-                date = doc.metadata.get("date")
-                if date == "unknown" or date < filter_date_after:
-                    continue
-            filtered_results.append(doc)
-        
-        return [(doc.metadata, doc.page_content) for doc in filtered_results[:top_k]]
+            values = np.array([score for _, score in hits], dtype=np.float64)
+            lo, span = values.min(), values.max() - values.min()
+            normed = (values - lo) / span if span > 0 else np.ones_like(values)
+            for (pos, _), value in zip(hits, normed):
+                scores[pos] = scores.get(pos, 0.0) + weight * float(value)
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+    def _search(self, vector: np.ndarray, k: int, mask: Optional[np.ndarray] = None,
+                nprobe: Optional[int] = None, ef_search: Optional[int] = None) -> List[Tuple[int, float]]:
+        """
+        Return up to k (position, distance) pairs for one query vector,
+        restricted to positions where ``mask`` is True.
+        """
+        return self._search_batch(vector, k, mask, nprobe=nprobe, ef_search=ef_search)[0]
+
+    def _search_batch(self, vectors: np.ndarray, k: int, mask: Optional[np.ndarray] = None,
+                      nprobe: Optional[int] = None,
+                      ef_search: Optional[int] = None) -> List[List[Tuple[int, float]]]:
+        """_search for an (n, dim) matrix of query vectors, in one FAISS call where possible."""
+        index = self.index
+        if mask is None:
+            params = index_factory.search_params(index, nprobe=nprobe, ef_search=ef_search)
+            distances, positions = index.search(vectors, k, params=params)
+            return self._hit_lists(distances, positions)
+
+        subset = np.flatnonzero(mask)
+        if subset.size == 0:
+            return [[] for _ in range(len(vectors))]
+        if subset.size <= self.exact_subset_max:
+            try:
+                return self._search_subset_exact(vectors, k, subset)
+            except RuntimeError:
+                pass  # index cannot reconstruct vectors (e.g. IVF without direct map)
+
+        # Search only inside the subset via an ID selector; the bitmap must
+        # stay alive for the duration of the call.
+        bitmap = np.packbits(mask, bitorder="little")
+        selector = faiss.IDSelectorBitmap(len(mask), faiss.swig_ptr(bitmap))
+        try:
+            params = index_factory.search_params(index, selector, nprobe=nprobe, ef_search=ef_search)
+            distances, positions = index.search(vectors, k, params=params)
+            return self._hit_lists(distances, positions)
+        except RuntimeError:
+            return [self._search_overfetch(vectors[i:i + 1], k, mask, nprobe=nprobe, ef_search=ef_search)
+                    for i in range(len(vectors))]
+
+    @staticmethod
+    def _hit_lists(distances: np.ndarray, positions: np.ndarray) -> List[List[Tuple[int, float]]]:
+        return [[(int(p), float(d)) for p, d in zip(row_pos, row_dist) if p != -1]
+                for row_pos, row_dist in zip(positions, distances)]
+
+    def _search_subset_exact(self, vectors: np.ndarray, k: int,
+                             subset: np.ndarray) -> List[List[Tuple[int, float]]]:
+        vecs = self.index.reconstruct_batch(subset)
+        inner_product = self.index.metric_type == faiss.METRIC_INNER_PRODUCT
+        if inner_product:
+            scores = -(vectors @ vecs.T)
+        else:
+            scores = ((vectors ** 2).sum(axis=1)[:, None] - 2 * (vectors @ vecs.T)
+                      + (vecs ** 2).sum(axis=1)[None, :])
+        k = min(k, subset.size)
+        top = np.argpartition(scores, k - 1, axis=1)[:, :k]
+        top = np.take_along_axis(top, np.argsort(np.take_along_axis(scores, top, axis=1), axis=1), axis=1)
+        sign = -1.0 if inner_product else 1.0
+        return [[(int(subset[j]), sign * float(row[j])) for j in row_top] for row, row_top in zip(scores, top)]
+
+    def _search_overfetch(self, vector: np.ndarray, k: int, mask: np.ndarray,
+                          nprobe: Optional[int] = None, ef_search: Optional[int] = None) -> List[Tuple[int, float]]:
+        """Fallback for indexes without selector support: widen the search until k hits survive."""
+        index = self.index
+        params = index_factory.search_params(index, nprobe=nprobe, ef_search=ef_search)
+        fetch_k = max(k * 4, 32)
+        while True:
+            fetch_k = min(fetch_k, index.ntotal)
+            distances, positions = index.search(vector, fetch_k, params=params)
+            hits = [(int(p), float(d)) for p, d in zip(positions[0], distances[0]) if p != -1 and mask[p]]
+            if len(hits) >= k or fetch_k >= index.ntotal:
+                return hits[:k]
+            fetch_k *= 4
 
     def save(self, path: str):
-        if self.vectorstore:
-            self.vectorstore.save_local(path)
+        """
+        Write the FAISS index, chunk store and side indexes to ``path``. Chunks
+        are no longer pickled, so a stale index.pkl from an older save is removed.
+        """
+        if self.index is not None:
+            os.makedirs(path, exist_ok=True)
+            faiss.write_index(self.index, os.path.join(path, "index.faiss"))
+            self.chunks.save(path)
+            self.manifest.save(path)
+            self.metadata_index.save(path)
+            self.bm25.save(path)
+            index_factory.save_config(path, self.index_type, self.index_params)
+            legacy = os.path.join(path, "index.pkl")
+            if os.path.exists(legacy):
+                os.remove(legacy)
+
+    @staticmethod
+    def exists(path: str) -> bool:
+        """True if ``path`` holds a saved index, in either storage format."""
+        return os.path.exists(os.path.join(path, "index.faiss")) and (
+            ChunkStore.exists(path) or os.path.exists(os.path.join(path, "index.pkl"))
+        )
 
     def load(self, path: str):
-        self.vectorstore = FAISS.load_local(path, self.embedder)
+        """
+        Load an index saved by ``save``. Chunk texts are memory-mapped rather
+        than read, so load time does not grow with the corpus. Indexes saved as
+        a pickled langchain docstore (index.pkl) are converted on load and
+        written in the new format by the next ``save``. Everything is read
+        first and put in place under the write lock, as in ``swap``.
+        """
+        index_type, index_params = index_factory.load_config(path)
+        index_params = index_factory.resolve_params(index_type, index_params)
+        index = faiss.read_index(os.path.join(path, "index.faiss"))
+        index_factory.ensure_direct_map(index)
+        chunks = ChunkStore.load(path)
+        legacy_docstore = None
+        if chunks is None:
+            # index.pkl is written by older versions of save(), so unpickling it is
+            # trusted; it holds langchain objects, which pickle imports on demand
+            with open(os.path.join(path, "index.pkl"), "rb") as f:
+                legacy_docstore, index_to_docstore_id = pickle.load(f)
+            chunks = ChunkStore.from_docstore(index_to_docstore_id, legacy_docstore)
+        id_map = ChunkIdMap(chunks)
+
+        metadata_index = MetadataIndex.load(path)
+        if metadata_index is None or len(metadata_index) != index.ntotal:
+            if legacy_docstore is None:
+                raise ValueError(f"{path} has no {MetadataIndex.FILE_NAME} matching its chunk store.")
+            metadata_index = MetadataIndex.from_docstore(id_map, legacy_docstore)
+        docstore = legacy_docstore if legacy_docstore is not None else ChunkDocstore(chunks, metadata_index)
+        manifest = IndexManifest.load(path)
+        if manifest is None:
+            manifest = IndexManifest.from_docstore(id_map, docstore)
+        bm25 = BM25Index.load(path)
+        if bm25 is None or len(bm25) != index.ntotal:
+            bm25 = BM25Index.from_docstore(id_map, docstore)
+
+        with self._swap_lock.write():
+            self.chunks = chunks
+            self.metadata_index = metadata_index
+            self.manifest = manifest
+            self.bm25 = bm25
+            self.index = index
+            self.index_type, self.index_params = index_type, index_params
+            self._index_changed(None)
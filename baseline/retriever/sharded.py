@@ -0,0 +1,314 @@
+import os
+import json
+import heapq
+import shutil
+import hashlib
+import itertools
+import threading
+import multiprocessing
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+from metrics.tracing import tracer
+from retriever.manifest import IndexManifest
+from retriever.cache import normalize_query
+from retriever.retreiver import Retriever
+
+
+def shard_for(file_name: str, num_shards: int) -> int:
+    """Shard of a source file: a stable hash of its name, so all its chunks live together."""
+    return int(hashlib.sha1(file_name.encode("utf-8")).hexdigest()[:8], 16) % num_shards
+
+
+def _serve_shard(conn, shard_dir: str):
+    """
+    Worker process loop: holds one shard's Retriever and answers requests
+    from the coordinator until told to stop. The shard never embeds text, so
+    its embedding model is never loaded.
+    """
+    def open_shard():
+        shard = Retriever(query_cache_size=0, result_cache_size=0)
+        if Retriever.exists(shard_dir):
+            shard.load(shard_dir)
+        return shard
+
+    shard = None
+    while True:
+        command, *args = conn.recv()
+        if command == "close":
+            conn.close()
+            return
+        try:
+            if command == "load" or shard is None:
+                shard = open_shard()
+            if command == "search":
+                vectors, options = args
+                reply = shard.search_vectors(vectors, **options)
+            elif command == "stats":
+                index = shard.index
+                reply = {"chunks": index.ntotal if index is not None else 0,
+                         "files": len(shard.manifest.files), "index_type": shard.index_type}
+            else:
+                reply = None
+            conn.send(("ok", reply))
+        except Exception as e:
+            conn.send(("error", f"{type(e).__name__}: {e}"))
+
+
+class ShardedRetriever:
+    """
+    Dense retrieval over an index partitioned into ``num_shards`` shards, each
+    served by its own worker process.
+
+    Source files are assigned to shards by ``shard_for`` and every shard is an
+    ordinary Retriever directory (``<path>/shard-000`` ...) written by
+    ``Retriever.save``, so a shard can be opened, inspected or rebuilt on its
+    own. No process holds the whole index: workers each load one shard, and
+    ``add_documents`` (re)builds one shard at a time in this process and then
+    tells its worker to reload.
+
+    A query is embedded once here, scattered to every worker, searched there
+    with ``Retriever.search_vectors`` (so filters apply against the shard's
+    own metadata index), and the per-shard top-k lists are merged with a
+    heap. Shards search in parallel, one core each.
+
+    Only dense retrieval is supported, and other modes raise ValueError: BM25
+    scores depend on per-shard term statistics and are not comparable across
+    shards.
+
+    Keyword arguments are Retriever's (model, caches, chunking, index type).
+    A Retriever built from them, which never holds an index, embeds queries
+    and owns the query, result and chunk-embedding caches and the index
+    listeners; each shard is built by a ``detached_copy`` of it.
+    """
+
+    CONFIG_FILE = "shards.json"
+
+    def __init__(self, path: str, num_shards: int = 2, **options):
+        if num_shards < 1:
+            raise ValueError("num_shards must be at least 1.")
+        self.path = path
+        self.num_shards = num_shards
+        self._coordinator = Retriever(**options)
+        self.embed_model_name = self._coordinator.embed_model_name
+        self.chunk_size = self._coordinator.chunk_size
+        self.chunk_overlap = self._coordinator.chunk_overlap
+        self.embedder = self._coordinator.embedder
+        self.embedding_cache = self._coordinator.embedding_cache
+        self.query_cache = self._coordinator.query_cache
+        self.result_cache = self._coordinator.result_cache
+        # Union of the shards' manifests, for pending() checks without a worker round trip
+        self.manifest = IndexManifest()
+        self._workers: List[Tuple[multiprocessing.Process, object]] = []
+        self._lock = threading.Lock()
+
+    def shard_dir(self, shard: int, path: Optional[str] = None) -> str:
+        return os.path.join(path or self.path, f"shard-{shard:03d}")
+
+    @classmethod
+    def exists(cls, path: str) -> bool:
+        """True if ``path`` holds a sharded index written by ``save``."""
+        return os.path.exists(os.path.join(path, cls.CONFIG_FILE))
+
+    def load(self, path: Optional[str] = None):
+        """
+        Open the shards under ``path`` (default: the constructor's path) and
+        start their workers. The shard count must match the saved one.
+        """
+        path = path or self.path
+        with open(os.path.join(path, self.CONFIG_FILE), "r", encoding="utf-8") as f:
+            config = json.load(f)
+        if config["num_shards"] != self.num_shards:
+            raise ValueError(f"{path} has {config['num_shards']} shards, not {self.num_shards}; "
+                             "re-index into an empty directory to change the shard count.")
+        if config.get("embed_model_name") not in (None, self.embed_model_name):
+            raise ValueError(f"{path} was built with {config['embed_model_name']}, not {self.embed_model_name}.")
+        self.close()
+        self.path = path
+        self.manifest = self._merged_manifest()
+        self._start_workers()
+        self._index_changed(None)
+
+    def save(self, path: Optional[str] = None):
+        """
+        Write ``shards.json``. Shards are saved as they are built, so saving
+        elsewhere than the working path copies the shard directories.
+        """
+        path = path or self.path
+        os.makedirs(path, exist_ok=True)
+        if os.path.abspath(path) != os.path.abspath(self.path):
+            for shard in range(self.num_shards):
+                if os.path.isdir(self.shard_dir(shard)):
+                    shutil.copytree(self.shard_dir(shard), self.shard_dir(shard, path), dirs_exist_ok=True)
+        tmp = os.path.join(path, self.CONFIG_FILE + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": 1, "num_shards": self.num_shards,
+                       "embed_model_name": self.embed_model_name}, f)
+        os.replace(tmp, os.path.join(path, self.CONFIG_FILE))
+
+    def _merged_manifest(self) -> IndexManifest:
+        manifest = IndexManifest()
+        for shard in range(self.num_shards):
+            shard_manifest = IndexManifest.load(self.shard_dir(shard))
+            if shard_manifest is not None:
+                manifest.files.update(shard_manifest.files)
+        return manifest
+
+    def add_documents(self, paths: List[str], force: bool = False, workers: Optional[int] = None,
+                      batch_size: int = 256, progress: Optional[Callable[[dict], None]] = None) -> int:
+        """
+        Route files to their shards and index them there, one shard at a
+        time, with ``Retriever.add_documents``. Workers keep serving the old
+        version of a shard until its rebuilt copy is saved. Returns the number
+        of chunks added.
+        """
+        routed = {}
+        for path in paths:
+            routed.setdefault(shard_for(os.path.basename(path), self.num_shards), []).append(path)
+
+        added = 0
+        changed = set()
+        for shard, shard_paths in sorted(routed.items()):
+            builder = self._coordinator.detached_copy()
+            shard_dir = self.shard_dir(shard)
+            if Retriever.exists(shard_dir):
+                builder.load(shard_dir)
+            shard_changed = set()
+            builder.add_index_listener(lambda sources: shard_changed.update(sources or ()))
+            count = builder.add_documents(shard_paths, force=force, workers=workers,
+                                          batch_size=batch_size, progress=progress)
+            changed |= shard_changed
+            if count or shard_changed:
+                builder.save(shard_dir)
+                self.manifest.files.update(builder.manifest.files)
+                if self._workers:
+                    self._call(shard, "load")
+            added += count
+        if not self._workers:
+            self._start_workers()
+        if added or changed:
+            self._index_changed(changed)
+        return added
+
+    def _start_workers(self):
+        context = multiprocessing.get_context("spawn")
+        for shard in range(self.num_shards):
+            parent, child = context.Pipe()
+            process = context.Process(target=_serve_shard, args=(child, self.shard_dir(shard)),
+                                      name=f"retriever-shard-{shard}", daemon=True)
+            process.start()
+            child.close()
+            self._workers.append((process, parent))
+        self._gather(self._scatter(range(self.num_shards), ("load",)))
+
+    def _scatter(self, shards, message: tuple) -> list:
+        for shard in shards:
+            self._workers[shard][1].send(message)
+        return list(shards)
+
+    def _gather(self, shards: list) -> list:
+        replies = []
+        for shard in shards:
+            status, reply = self._workers[shard][1].recv()
+            if status != "ok":
+                raise RuntimeError(f"Shard {shard} failed: {reply}")
+            replies.append(reply)
+        return replies
+
+    def _call(self, shard: int, *message):
+        with self._lock:
+            return self._gather(self._scatter([shard], message))[0]
+
+    def close(self):
+        """Stop the shard workers."""
+        with self._lock:
+            for process, conn in self._workers:
+                try:
+                    conn.send(("close",))
+                except (BrokenPipeError, OSError):
+                    pass
+                process.join(timeout=5)
+                if process.is_alive():
+                    process.terminate()
+                conn.close()
+            self._workers = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def index_version(self) -> int:
+        return self._coordinator.index_version
+
+    def add_index_listener(self, callback: Callable[[Optional[set]], None]):
+        """As ``Retriever.add_index_listener``."""
+        self._coordinator.add_index_listener(callback)
+
+    def _index_changed(self, sources: Optional[set] = None):
+        self._coordinator._index_changed(sources)
+
+    def query(self, question: str, top_k: int = 5, filter_source_type: Optional[str] = None,
+              filter_date_after: Optional[str] = None, filter_source: Optional[str] = None,
+              mode: str = "dense", nprobe: Optional[int] = None, ef_search: Optional[int] = None):
+        """Retrieve the top_k chunks for a question across all shards (dense only)."""
+        return self.query_batch([question], top_k, filter_source_type, filter_date_after, filter_source,
+                                mode, nprobe, ef_search)[0]
+
+    def query_batch(self, questions: List[str], top_k: int = 5, filter_source_type: Optional[str] = None,
+                    filter_date_after: Optional[str] = None, filter_source: Optional[str] = None,
+                    mode: str = "dense", nprobe: Optional[int] = None,
+                    ef_search: Optional[int] = None) -> List[list]:
+        """
+        Like query() for many questions: cache misses are embedded in one
+        batch and sent to every shard in one message. Returns one result list
+        per question, in input order.
+        """
+        if mode != "dense":
+            raise ValueError("Sharded retrieval supports mode='dense' only; "
+                             "BM25 scores are not comparable across shards.")
+        if not self._workers:
+            raise ValueError("No documents indexed yet.")
+        with tracer.span("retriever.query"):
+            options = (top_k, filter_source_type, filter_date_after, filter_source, nprobe, ef_search)
+            results: List[Optional[list]] = [None] * len(questions)
+            misses = []
+            for i, question in enumerate(questions):
+                cached = self.result_cache.get((normalize_query(question),) + options)
+                if cached is not None:
+                    results[i] = cached
+                else:
+                    misses.append(i)
+            if not misses:
+                return results
+
+            with tracer.span("retriever.embed"):
+                vectors = self.embed_queries([questions[i] for i in misses])
+            search = dict(top_k=top_k, filter_source_type=filter_source_type,
+                          filter_date_after=filter_date_after, filter_source=filter_source,
+                          nprobe=nprobe, ef_search=ef_search)
+            with tracer.span("retriever.dense_search"):
+                with self._lock:
+                    per_shard = self._gather(self._scatter(range(self.num_shards), ("search", vectors, search)))
+            for j, i in enumerate(misses):
+                # Each shard's list is sorted best first; k-way merge on score
+                merged = heapq.merge(*(shard_hits[j] for shard_hits in per_shard), key=lambda hit: -hit[0])
+                results[i] = [(meta, text) for _, meta, text in itertools.islice(merged, top_k)]
+                self.result_cache.put((normalize_query(questions[i]),) + options, results[i])
+            return results
+
+    def embed_query(self, question: str) -> np.ndarray:
+        """Return the (1, dim) float32 query vector, from the cache when possible."""
+        return self._coordinator.embed_query(question)
+
+    def embed_queries(self, questions: List[str]) -> np.ndarray:
+        """As ``Retriever.embed_queries``."""
+        return self._coordinator.embed_queries(questions)
+
+    def stats(self) -> List[dict]:
+        """Per shard: {"chunks", "files", "index_type"}."""
+        with self._lock:
+            return self._gather(self._scatter(range(len(self._workers)), ("stats",)))
@@ -0,0 +1,202 @@
+import os
+import time
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+from retriever.retreiver import Retriever
+
+
+class IndexWatcher:
+    """
+    Keeps a running Retriever in sync with a documents folder.
+
+    A daemon thread polls ``list_paths()`` every ``interval`` seconds and
+    compares file sizes and mtimes with the previous scan. New, changed and
+    deleted files are collected into one batch, which is applied once no
+    further change has been seen for ``debounce`` seconds (so files still
+    being copied are not indexed half-written).
+
+    Each batch is applied to a ``detached_copy`` of the retriever loaded from
+    ``index_dir``, saved back there, and swapped into the live retriever, so
+    queries keep running against the previous index meanwhile and never see
+    a partly updated one.
+
+    The first scan also picks up whatever changed while nothing was watching:
+    files missing from the manifest or whose content changed, and manifest
+    entries whose file is gone.
+
+    ``stats()`` reports the indexing lag: how long the changes in the last
+    batch took from reaching the folder (file mtime, or the scan before the
+    one that noticed a deletion) to being searchable, and how long the
+    oldest change still waiting has been pending.
+    """
+
+    def __init__(self, retriever: Retriever, list_paths: Callable[[], List[str]], index_dir: str,
+                 interval: float = 2.0, debounce: float = 1.0):
+        self.retriever = retriever
+        self.list_paths = list_paths
+        self.index_dir = index_dir
+        self.interval = interval
+        self.debounce = debounce
+
+        self.batches = 0
+        self.files_indexed = 0
+        self.files_removed = 0
+        self.chunks_added = 0
+        self.last_lag: Optional[float] = None
+        self.max_lag = 0.0
+        self.last_error: Optional[str] = None
+
+        self._seen: Optional[Dict[str, Tuple[int, int]]] = None  # path -> (size, mtime_ns)
+        self._last_scan = time.time()
+        # path -> wall-clock time of the earliest change not yet indexed
+        self._changed: Dict[str, float] = {}
+        self._deleted: Dict[str, float] = {}
+        self._in_flight: Dict[str, float] = {}  # the batch being applied
+        self._last_change = 0.0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "IndexWatcher":
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="index-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def poll_now(self):
+        """Scan at once (e.g. right after saving an upload) instead of at the next interval."""
+        self._wake.set()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.poll()
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"[WARN] Background indexing failed: {e}")
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        snapshot = {}
+        for path in self.list_paths():
+            try:
+                info = os.stat(path)
+            except OSError:
+                continue  # removed between listing and stat
+            snapshot[path] = (info.st_size, info.st_mtime_ns)
+        return snapshot
+
+    def poll(self) -> bool:
+        """
+        Scan once and apply the pending batch if it has settled. Returns
+        True if the index was updated.
+        """
+        now = time.time()
+        snapshot = self._scan()
+        with self._lock:
+            if self._seen is None:
+                self._catch_up(snapshot, now)
+            else:
+                for path, state in snapshot.items():
+                    if self._seen.get(path) != state:
+                        # The change happened after the previous scan, at the file's mtime if that is later
+                        changed_at = min(now, max(self._last_scan, state[1] / 1e9))
+                        self._changed.setdefault(path, changed_at)
+                        self._deleted.pop(path, None)
+                        self._last_change = now
+                for path in self._seen.keys() - snapshot.keys():
+                    self._deleted.setdefault(path, self._last_scan)
+                    self._changed.pop(path, None)
+                    self._last_change = now
+            self._seen = snapshot
+            self._last_scan = now
+            if not (self._changed or self._deleted) or now - self._last_change < self.debounce:
+                return False
+            changed, deleted = dict(self._changed), dict(self._deleted)
+            self._changed.clear()
+            self._deleted.clear()
+            self._in_flight = {**changed, **deleted}
+
+        try:
+            updated = self._apply(sorted(changed), sorted(deleted))
+        except Exception:
+            # Retry the batch on the next scan
+            with self._lock:
+                for path, at in changed.items():
+                    self._changed.setdefault(path, at)
+                for path, at in deleted.items():
+                    self._deleted.setdefault(path, at)
+            raise
+        finally:
+            with self._lock:
+                self._in_flight = {}
+        if not updated:
+            return False
+        lag = time.time() - min(list(changed.values()) + list(deleted.values()))
+        self.last_lag = lag
+        self.max_lag = max(self.max_lag, lag)
+        self.last_error = None
+        return True
+
+    def _catch_up(self, snapshot: Dict[str, Tuple[int, int]], now: float):
+        """Queue what changed in the folder since the index was last saved."""
+        for path in self.retriever.manifest.pending(list(snapshot)):
+            self._changed.setdefault(path, now)
+        on_disk = {os.path.basename(path) for path in snapshot}
+        for name in self.retriever.manifest.files.keys() - on_disk:
+            self._deleted.setdefault(name, now)
+        if self._changed or self._deleted:
+            self._last_change = now - self.debounce  # nothing is being written; apply right away
+
+    def _apply(self, changed: List[str], deleted: List[str]) -> bool:
+        # Touched-but-identical files and deletions of unindexed files need no new index
+        changed = self.retriever.manifest.pending([path for path in changed if os.path.exists(path)])
+        names = {os.path.basename(path) for path in deleted} & self.retriever.manifest.files.keys()
+        if not changed and not names:
+            return False
+        print(f"⚙️  Re-indexing {len(changed)} new/changed and {len(names)} deleted file(s) in the background...")
+        start = time.perf_counter()
+        staged = self.retriever.detached_copy()
+        if Retriever.exists(self.index_dir):
+            staged.load(self.index_dir)
+        removed = staged.remove_documents(sorted(names))
+        added = staged.add_documents(changed)
+        if staged.index is not None:
+            staged.save(self.index_dir)
+        self.retriever.swap(staged, names | {os.path.basename(path) for path in changed})
+
+        self.batches += 1
+        self.files_indexed += len(changed)
+        self.files_removed += len(names)
+        self.chunks_added += added
+        print(f"✅ Index updated in the background: +{added} / -{removed} chunks "
+              f"in {time.perf_counter() - start:.1f}s")
+        return True
+
+    def stats(self) -> dict:
+        now = time.time()
+        with self._lock:
+            waiting = [*self._changed.values(), *self._deleted.values(), *self._in_flight.values()]
+        return {
+            "running": self._thread is not None and self._thread.is_alive(),
+            "pending_files": len(waiting),
+            "pending_lag_s": now - min(waiting) if waiting else 0.0,
+            "last_lag_s": self.last_lag,
+            "max_lag_s": self.max_lag,
+            "batches": self.batches,
+            "files_indexed": self.files_indexed,
+            "files_removed": self.files_removed,
+            "chunks_added": self.chunks_added,
+            "index_version": self.retriever.index_version,
+            "last_error": self.last_error,
+        }
@@ -2,10 +2,10 @@ import os
 import json
 import pytest
 
-# Ensure single-threaded BLAS/OpenMP for consistency
-os.environ["OMP_NUM_THREADS"] = "1"
-os.environ["MKL_NUM_THREADS"] = "1"
-os.environ["OPENBLAS_NUM_THREADS"] = "1"
+# Single-threaded BLAS/OpenMP by default, as in pipeline.py; exported values win
+os.environ.setdefault("OMP_NUM_THREADS", "1")
+os.environ.setdefault("MKL_NUM_THREADS", "1")
+os.environ.setdefault("OPENBLAS_NUM_THREADS", "1")
 os.environ["OBJC_DISABLE_INITIALIZE_FORK_SAFETY"] = "YES"
 import multiprocessing
 multiprocessing.set_start_method("spawn", force=True)
@@ -13,15 +13,22 @@ multiprocessing.set_start_method("spawn", force=True)
 from pipeline import Pipeline
 
 # Load test cases from JSON file
-TEST_INPUTS_PATH = os.path.join(os.path.dirname(__file__), '..', 'test_inputs.json')
+TEST_INPUTS_PATH = os.path.join(os.path.dirname(__file__), '..', 'evaluation', 'test_inputs.json')
 with open(TEST_INPUTS_PATH, 'r', encoding='utf-8') as f:
     TEST_CASES = json.load(f)
 
 @pytest.fixture(scope='session')
 def pipeline():
-    """Initialize and return a Pipeline instance for testing."""
+    """
+    Initialize and return a Pipeline instance for testing. Set
+    GENERATOR_BACKEND=mock to run offline against the simulated LLM.
+    """
     return Pipeline()
 
+def _grounded(pipeline) -> bool:
+    # The mock backend answers with context words, not real answers
+    return pipeline.generator.backend.name != "mock"
+
 @pytest.mark.parametrize('case', TEST_CASES)
 def test_pipeline_non_empty_and_expected(case, pipeline):
     """
@@ -36,6 +43,8 @@ def test_pipeline_non_empty_and_expected(case, pipeline):
     assert isinstance(answer, str) and answer.strip(), \
         f"Empty answer for question: {question}"
     # Contains expected term (case-insensitive)
+    if not _grounded(pipeline):
+        pytest.skip("expected answers need a real LLM backend")
     assert expected.lower() in answer.lower(), \
         f"Answer '{answer}' does not contain expected '{expected}' for question: {question}"
 
@@ -51,3 +60,33 @@ def test_pipeline_consistency(case, pipeline):
 
     assert answer1 == answer2, \
         f"Inconsistent answers for '{question}': '{answer1}' vs '{answer2}'"
+
+def test_pipeline_run_batch(pipeline):
+    """
+    run_batch answers every question in input order, like run() does one at a time.
+    """
+    questions = [case['question'] for case in TEST_CASES]
+    results = pipeline.run_batch(questions)
+
+    assert [r['question'] for r in results] == questions
+    for case, result in zip(TEST_CASES, results):
+        assert result['error'] is None, f"Batch error for '{case['question']}': {result['error']}"
+        assert result['answer'].strip()
+        if _grounded(pipeline):
+            assert case['expected_answer'].lower() in result['answer'].lower(), \
+                f"Answer '{result['answer']}' does not contain expected '{case['expected_answer']}'"
+
+def test_pipeline_session_memory_isolated(pipeline):
+    """
+    A session's history only reaches its own prompts.
+    """
+    question = TEST_CASES[0]['question']
+    pipeline.memory.clear()
+    pipeline.run(question, session_id='user-a')
+
+    retrieved = pipeline.retrieve(question)
+    prompt_a, _, _ = pipeline._build_prompt(question, retrieved, session_id='user-a')
+    prompt_b, _, _ = pipeline._build_prompt(question, retrieved, session_id='user-b')
+
+    assert len(prompt_a) == 3, "session 'user-a' should see its previous turn"
+    assert len(prompt_b) == 1, "session 'user-b' must not see another session's history"
@@ -0,0 +1,100 @@
+import os
+import re
+import sys
+import zlib
+from typing import List
+
+import numpy as np
+import pytest
+
+# The baseline modules import each other as top-level packages (retriever.*,
+# generator.*), the way they do when run from baseline/
+BASELINE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASELINE_DIR not in sys.path:
+    sys.path.insert(0, BASELINE_DIR)
+
+# Token budgets in the tests are written against the ~4 characters per
+# token estimate, not a downloaded tokenizer
+os.environ["RAG_TOKENIZER"] = ""
+
+from retriever.embedding import EmbeddingEngine  # noqa: E402
+
+
+class StubEngine(EmbeddingEngine):
+    """
+    EmbeddingEngine that sums a fixed random vector per word, so retrieval
+    can be tested without torch or a model download. Texts sharing words get
+    close vectors, and distances practically never tie, which is enough to
+    check ranking and plumbing.
+    """
+
+    dim = 64
+
+    def __init__(self, model_name: str = "stub"):
+        super().__init__(model_name)
+
+    def load(self):
+        # Nothing to load; marks the engine loaded, as the model load does
+        if self._model is None:
+            self._model, self.load_seconds = self, 0.0
+        return self._model
+
+    def _word(self, word: str) -> np.ndarray:
+        rng = np.random.default_rng(zlib.crc32(word.encode("utf-8")))
+        return rng.standard_normal(self.dim).astype(np.float32)
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        self.load()
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in zip(vectors, texts):
+            for word in re.findall(r"\w+", text.lower()):
+                row += self._word(word)
+        self.texts_embedded += len(texts)
+        return vectors
+
+
+@pytest.fixture
+def engine() -> StubEngine:
+    return StubEngine()
+
+
+DOCS = {
+    "rivers.txt": "Rivers carry water from mountains to the sea. Deltas form where rivers meet the sea.",
+    "stones.txt": "Granite and basalt are common stones. Quartz is found in granite.",
+    "clouds.md": "Cumulus clouds are fluffy. Cirrus clouds are thin and high.",
+}
+
+
+@pytest.fixture
+def make_pipeline(tmp_path, monkeypatch, engine):
+    """
+    Factory for Pipelines working in tmp_path (./data holds DOCS, the index
+    goes to ./embeddings) that embed with ``engine`` and answer with a fast
+    mock LLM backend. Keyword arguments go to Pipeline.
+    """
+    import pipeline as pipeline_module
+    from generator.backends import MockBackend
+    from retriever.retreiver import Retriever
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(pipeline_module, "Retriever", lambda **options: Retriever(embedder=engine, **options))
+    os.makedirs("data", exist_ok=True)
+    for name, text in DOCS.items():
+        write_file("data", name, text)
+    created = []
+
+    def make(**kwargs):
+        kwargs.setdefault("generator_backend", MockBackend(ttft_ms=1, tokens_per_sec=100_000))
+        created.append(pipeline_module.Pipeline(**kwargs))
+        return created[-1]
+
+    yield make
+    for pipe in created:
+        pipe.logger.close()
+
+
+def write_file(dir_path, name: str, text: str) -> str:
+    path = os.path.join(str(dir_path), name)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    return path
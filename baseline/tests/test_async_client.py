@@ -0,0 +1,111 @@
+import asyncio
+import time
+
+import pytest
+
+from generator.async_client import AsyncLLMClient
+from generator.backends import MockBackend, TransientBackendError
+
+MESSAGES = [{"role": "user", "content": "Context:\nalpha beta gamma delta\n\nQuestion: what?"}]
+
+
+def _backend(ttft_ms: float = 1.0, **kwargs) -> MockBackend:
+    return MockBackend(ttft_ms=ttft_ms, ttft_sigma=0.0, tokens_per_sec=10_000, **kwargs)
+
+
+class FlakyBackend(MockBackend):
+    """Fails its first ``failures`` requests, then behaves like MockBackend."""
+
+    def __init__(self, failures: int, error: Exception = None):
+        super().__init__(ttft_ms=1.0, ttft_sigma=0.0, tokens_per_sec=10_000)
+        self.remaining_failures = failures
+        self.error = error or TransientBackendError("flaky")
+
+    def _start(self) -> float:
+        self.requests += 1
+        if self.remaining_failures:
+            self.remaining_failures -= 1
+            raise self.error
+        return self.ttft_ms / 1000
+
+
+def _client(backend, **kwargs) -> AsyncLLMClient:
+    kwargs.setdefault("backoff_base", 0.001)
+    return AsyncLLMClient(backend, **kwargs)
+
+
+def test_complete_returns_backend_answer():
+    client = _client(_backend())
+    assert client.run(client.complete("m", MESSAGES)) == "alpha beta gamma delta"
+
+
+def test_transient_errors_are_retried():
+    backend = FlakyBackend(failures=2)
+    client = _client(backend, max_retries=3)
+    assert client.run(client.complete("m", MESSAGES)) == "alpha beta gamma delta"
+    assert backend.requests == 3 and client.retries == 2
+
+
+def test_retries_give_up_after_max_retries():
+    backend = FlakyBackend(failures=5)
+    client = _client(backend, max_retries=1)
+    with pytest.raises(TransientBackendError):
+        client.run(client.complete("m", MESSAGES))
+    assert backend.requests == 2
+
+
+def test_other_errors_are_not_retried():
+    backend = FlakyBackend(failures=1, error=ValueError("bad request"))
+    client = _client(backend, max_retries=3)
+    with pytest.raises(ValueError):
+        client.run(client.complete("m", MESSAGES))
+    assert backend.requests == 1
+
+
+def test_deadline_bounds_slow_requests():
+    client = _client(_backend(ttft_ms=2000))
+    start = time.monotonic()
+    with pytest.raises(TimeoutError):
+        client.run(client.complete("m", MESSAGES, timeout=0.1))
+    assert time.monotonic() - start < 1.0
+
+
+def test_identical_requests_are_coalesced():
+    backend = _backend(ttft_ms=50)
+    client = _client(backend)
+
+    async def both():
+        return await asyncio.gather(client.complete("m", MESSAGES), client.complete("m", MESSAGES),
+                                    client.complete("m", MESSAGES, max_tokens=2))
+
+    first, second, short = client.run(both())
+    assert first == second == "alpha beta gamma delta"
+    assert short == "alpha beta"
+    assert backend.requests == 2 and client.coalesced == 1
+    assert client.stats()["in_flight"] == 0
+
+
+def test_iter_stream_yields_deltas():
+    client = _client(_backend())
+    assert "".join(client.iter_stream("m", MESSAGES)) == "alpha beta gamma delta"
+
+
+def test_stalled_stream_times_out():
+    backend = _backend()
+    backend.tokens_per_sec = 1.0  # one word per second after the first
+    client = _client(backend)
+    deltas = client.iter_stream("m", MESSAGES, timeout=0.2)
+    assert next(deltas) == "alpha"
+    with pytest.raises(TimeoutError):
+        next(deltas)
+
+
+def test_closing_a_stream_frees_its_slot():
+    backend = _backend()
+    backend.tokens_per_sec = 1.0
+    client = _client(backend, max_in_flight=1)
+    deltas = client.iter_stream("m", MESSAGES)
+    assert next(deltas) == "alpha"
+    deltas.close()
+    backend.tokens_per_sec = 10_000
+    assert client.run(client.complete("m", MESSAGES, timeout=2.0)) == "alpha beta gamma delta"
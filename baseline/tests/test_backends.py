@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+
+from generator.backends import MockBackend, TransientBackendError, make_backend
+
+MESSAGES = [{"role": "system", "content": "Be brief."},
+            {"role": "user", "content": "Context:\nalpha beta gamma delta epsilon\n\nQuestion: what?"}]
+
+
+def _replay(backend: MockBackend, requests: int) -> list:
+    """Time to first token of each request, or None where it failed."""
+    outcomes = []
+    for _ in range(requests):
+        try:
+            outcomes.append(backend._start())
+        except TransientBackendError:
+            outcomes.append(None)
+    return outcomes
+
+
+def test_same_seed_replays_latency_and_failures():
+    first = _replay(MockBackend(failure_rate=0.3, seed=7), 200)
+    assert _replay(MockBackend(failure_rate=0.3, seed=7), 200) == first
+    assert _replay(MockBackend(failure_rate=0.3, seed=8), 200) != first
+
+
+def test_failure_rate_with_fixed_seed():
+    backend = MockBackend(failure_rate=0.3, seed=0)
+    outcomes = _replay(backend, 2000)
+    assert backend.stats() == {"requests": 2000, "failures": outcomes.count(None)}
+    assert backend.failures / backend.requests == pytest.approx(0.3, abs=0.03)
+    assert None not in _replay(MockBackend(seed=0), 500)
+
+
+def test_ttft_median_tracks_ttft_ms():
+    ttfts = sorted(_replay(MockBackend(ttft_ms=200, ttft_sigma=0.5, seed=0), 1001))
+    assert ttfts[500] == pytest.approx(0.2, rel=0.1)
+    assert set(_replay(MockBackend(ttft_ms=200, ttft_sigma=0.0), 10)) == {0.2}
+
+
+def test_answer_depends_only_on_the_prompt():
+    backend = MockBackend(answer_tokens=3, seed=1)
+    assert backend.answer(MESSAGES, max_tokens=64) == "alpha beta gamma"
+    assert MockBackend(answer_tokens=3, seed=2).answer(MESSAGES, max_tokens=64) == "alpha beta gamma"
+    assert backend.answer(MESSAGES, max_tokens=2) == "alpha beta"
+    no_context = [{"role": "user", "content": "   "}]
+    assert backend.answer(no_context, 64) == backend.answer(no_context, 64) != ""
+
+
+def test_stream_and_complete_return_the_same_text():
+    async def run():
+        backend = MockBackend(ttft_ms=1, tokens_per_sec=100_000)
+        complete = await backend.complete("m", MESSAGES, 64)
+        stream = await backend.open_stream("m", MESSAGES, 64)
+        return complete, [delta async for delta in stream]
+
+    complete, deltas = asyncio.run(run())
+    assert complete == "".join(deltas) == "alpha beta gamma delta epsilon"
+    assert len(deltas) == 5
+
+
+def test_make_backend(monkeypatch):
+    backend = MockBackend()
+    assert make_backend(backend) is backend
+    assert make_backend("mock", seed=3).name == "mock"
+    monkeypatch.setenv("GENERATOR_BACKEND", "mock")
+    assert isinstance(make_backend(), MockBackend)
+    with pytest.raises(ValueError, match="Unknown generator backend"):
+        make_backend("nope")
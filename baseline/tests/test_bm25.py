@@ -0,0 +1,83 @@
+import math
+
+import numpy as np
+import pytest
+
+from retriever.bm25 import BM25Index, tokenize
+
+DOCS = [
+    "the quick brown fox",
+    "the lazy dog sleeps",
+    "quick quick fox jumps over the dog",
+    "an unrelated sentence",
+]
+
+
+def _reference_scores(docs, query, k1=1.5, b=0.75):
+    tokenized = [tokenize(d) for d in docs]
+    avgdl = sum(len(t) for t in tokenized) / len(tokenized)
+    scores = [0.0] * len(docs)
+    for term in set(tokenize(query)):
+        df = sum(term in t for t in tokenized)
+        if not df:
+            continue
+        idf = math.log1p((len(docs) - df + 0.5) / (df + 0.5))
+        for i, tokens in enumerate(tokenized):
+            tf = tokens.count(term)
+            scores[i] += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * len(tokens) / avgdl))
+    return scores
+
+
+def _index(docs=DOCS) -> BM25Index:
+    index = BM25Index()
+    index.append(docs)
+    return index
+
+
+def test_scores_match_bm25_formula():
+    expected = _reference_scores(DOCS, "quick fox")
+    hits = _index().search("quick fox", k=10)
+    ranked = sorted((pos for pos, score in enumerate(expected) if score > 0), key=lambda p: -expected[p])
+    assert [pos for pos, _ in hits] == ranked == [0, 2]
+    for pos, score in hits:
+        assert score == pytest.approx(expected[pos], rel=1e-5)
+
+
+def test_search_respects_k_mask_and_unknown_terms():
+    index = _index()
+    assert len(index.search("the", k=1)) == 1
+    mask = np.array([True, True, False, True])
+    assert [pos for pos, _ in index.search("quick fox", k=10, mask=mask)] == [0]
+    assert index.search("zebra", k=10) == []
+    assert BM25Index().search("fox", k=10) == []
+
+
+def test_remove_matches_index_built_without_the_documents():
+    index = _index()
+    index.remove([0, 3])
+    rebuilt = _index([DOCS[1], DOCS[2]])
+    assert len(index) == 2
+    assert index.search("quick dog", k=10) == rebuilt.search("quick dog", k=10)
+
+
+def test_save_load_round_trip(tmp_path):
+    index = _index()
+    index.save(str(tmp_path))
+    loaded = BM25Index.load(str(tmp_path))
+    assert len(loaded) == len(index)
+    for query in ("quick fox", "the dog", "unrelated"):
+        assert loaded.search(query, k=10) == index.search(query, k=10)
+
+    # Changes after a load rebuild the doc-major view from the mapped postings
+    loaded.remove([1])
+    loaded.append(["a brown dog"])
+    index.remove([1])
+    index.append(["a brown dog"])
+    assert loaded.search("brown dog", k=10) == index.search("brown dog", k=10)
+
+    loaded.save(str(tmp_path))
+    assert BM25Index.load(str(tmp_path)).search("brown dog", k=10) == index.search("brown dog", k=10)
+
+
+def test_load_missing_returns_none(tmp_path):
+    assert BM25Index.load(str(tmp_path)) is None
@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+
+from conftest import write_file
+
+from retriever import cache
+from retriever.cache import LRUCache, QueryEmbeddingCache, normalize_query
+from retriever.retreiver import Retriever
+
+
+class FakeClock:
+    """Stands in for the ``time`` module inside retriever.cache."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> FakeClock:
+    clock = FakeClock()
+    monkeypatch.setattr(cache, "time", clock)
+    return clock
+
+
+def test_normalize_query():
+    assert normalize_query("  What IS\tRAG? ") == normalize_query("what is rag?")
+
+
+def test_lru_evicts_least_recently_used():
+    lru = LRUCache(capacity=2)
+    lru.put("a", 1)
+    lru.put("b", 2)
+    assert lru.get("a") == 1
+    lru.put("c", 3)
+    assert lru.get("b") is None
+    assert (lru.get("a"), lru.get("c")) == (1, 3)
+    assert lru.stats()["hits"] == 3 and lru.stats()["misses"] == 1
+
+
+def test_lru_ttl_expires_entries(clock):
+    lru = LRUCache(capacity=4, ttl=10)
+    lru.put("a", 1)
+    clock.now += 10
+    assert lru.get("a") == 1
+    clock.now += 0.5
+    assert lru.get("a") is None
+    assert len(lru) == 0
+
+
+def test_query_cache_memory_ttl(clock):
+    queries = QueryEmbeddingCache("model", ttl=5)
+    queries.put("What is RAG?", np.ones(4))
+    assert np.array_equal(queries.get("what is  rag?"), np.ones(4, dtype=np.float32))
+    clock.now += 6
+    assert queries.get("What is RAG?") is None
+
+
+def test_query_cache_disk_tier_survives_restart(tmp_path, clock):
+    QueryEmbeddingCache("model", cache_dir=str(tmp_path)).put("question", np.arange(4))
+
+    reopened = QueryEmbeddingCache("model", ttl=60, cache_dir=str(tmp_path))
+    assert np.array_equal(reopened.get("question"), np.arange(4, dtype=np.float32))
+    assert reopened.stats()["disk_hits"] == 1
+    # Another model key never sees these vectors
+    assert QueryEmbeddingCache("other-model", cache_dir=str(tmp_path)).get("question") is None
+
+    clock.now += 61
+    assert QueryEmbeddingCache("model", ttl=60, cache_dir=str(tmp_path)).get("question") is None
+
+
+def test_retriever_caches_query_vectors_and_drops_results_on_change(tmp_path, engine):
+    retriever = Retriever(embedder=engine)
+    retriever.add_documents([write_file(tmp_path, "a.txt", "green apples")])
+    retriever.query("apples", top_k=1)
+    encoded = engine.texts_embedded
+    retriever.query("apples", top_k=1)
+    retriever.query("apples", top_k=1, mode="hybrid")
+    assert engine.texts_embedded == encoded
+    assert len(retriever.result_cache) == 2
+
+    retriever.add_documents([write_file(tmp_path, "b.txt", "red apples")])
+    assert len(retriever.result_cache) == 0
+    assert len(retriever.query("apples", top_k=2)) == 2
@@ -0,0 +1,69 @@
+from conftest import write_file
+
+from retriever.chunk_store import ChunkDocstore, ChunkIdMap, ChunkStore
+from retriever.metadata_index import MetadataIndex
+from retriever.retreiver import Retriever
+
+
+def _contents(store: ChunkStore):
+    return [(store.id_at(pos), store.text(pos)) for pos in range(len(store))]
+
+
+def test_append_remove_and_lookup():
+    store = ChunkStore()
+    store.append(["a", "b", "c"], ["alpha", "béta ✓", ""])
+    assert _contents(store) == [("a", "alpha"), ("b", "béta ✓"), ("c", "")]
+    assert store.position("c") == 2
+
+    store.remove([0])
+    assert _contents(store) == [("b", "béta ✓"), ("c", "")]
+    assert store.position("c") == 1
+    assert store.position("a") is None
+
+
+def test_save_load_round_trip(tmp_path):
+    store = ChunkStore()
+    store.append(["a", "b", "c"], ["alpha", "béta ✓", ""])
+    store.save(str(tmp_path))
+    loaded = ChunkStore.load(str(tmp_path))
+    assert _contents(loaded) == _contents(store)
+
+    # Rows appended or removed after loading are kept until the next save
+    loaded.remove([0])
+    loaded.append(["d"], ["delta"])
+    assert _contents(loaded) == [("b", "béta ✓"), ("c", ""), ("d", "delta")]
+    loaded.save(str(tmp_path))
+    assert _contents(ChunkStore.load(str(tmp_path))) == [("b", "béta ✓"), ("c", ""), ("d", "delta")]
+
+
+def test_load_missing_returns_none(tmp_path):
+    assert not ChunkStore.exists(str(tmp_path))
+    assert ChunkStore.load(str(tmp_path)) is None
+
+
+def test_docstore_views():
+    store = ChunkStore()
+    store.append(["a", "b"], ["alpha", "beta"])
+    metadata = MetadataIndex()
+    metadata.append([{"source": "x.txt", "source_type": "txt", "date": "2024-01-01", "chunk_id": i}
+                     for i in range(2)])
+    assert dict(ChunkIdMap(store)) == {0: "a", 1: "b"}
+    chunk = ChunkDocstore(store, metadata).search("b")
+    assert chunk.page_content == "beta"
+    assert chunk.metadata["chunk_id"] == 1
+    assert ChunkDocstore(store, metadata).search("z") == "ID z not found."
+
+
+def test_retriever_save_load_keeps_results(tmp_path, engine):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    paths = [write_file(docs, "a.txt", "rivers flow to the sea"),
+             write_file(docs, "b.txt", "mountains are tall and cold")]
+    retriever = Retriever(embedder=engine)
+    retriever.add_documents(paths)
+    index_dir = str(tmp_path / "index")
+    retriever.save(index_dir)
+
+    loaded = Retriever(embedder=engine)
+    loaded.load(index_dir)
+    assert loaded.query("cold mountains", top_k=2) == retriever.query("cold mountains", top_k=2)
@@ -0,0 +1,57 @@
+from generator.context_packer import ContextPacker, overlap_length
+
+TEXT = " ".join(f"word{i:03d}" for i in range(200))  # 8 characters per word
+
+
+def _meta(source, chunk_id, **extra):
+    return dict({"source": source, "source_type": "txt", "date": "2024-01-01", "chunk_id": chunk_id}, **extra)
+
+
+def test_overlap_length():
+    assert overlap_length("abcdefghijklmnopqrstuvwxyz", "qrstuvwxyz0123456789", 300, min_overlap=4) == 10
+    assert overlap_length("abcdefghijklmnopqrstuvwxyz", "qrstuvwxyz0123456789", 5, min_overlap=4) == 0
+    assert overlap_length("abc", "xyz", 300, min_overlap=2) == 0
+
+
+def test_merges_overlapping_chunks_of_one_source():
+    first, second = TEXT[:400], TEXT[300:800]
+    texts, headers, stats = ContextPacker(token_budget=10_000).pack([(_meta("a.txt", 0), first),
+                                                                     (_meta("a.txt", 1), second)])
+    assert texts == [f"[1] {TEXT[:800]}"]
+    assert headers == ["[1] a.txt (txt, 2024-01-01), chunks 0-1"]
+    assert stats["overlap_chars"] == 100
+    assert stats["passages"] == 1 and stats["chunks"] == 2
+    assert stats["tokens_after"] < stats["tokens_before"]
+
+
+def test_keeps_rank_order_and_drops_duplicates():
+    retrieved = [
+        (_meta("b.txt", 7), "beta passage"),
+        (_meta("a.txt", 2), "third chunk"),
+        (_meta("a.txt", 0), "first chunk"),
+        (_meta("b.txt", 7), "beta passage"),
+    ]
+    texts, headers, stats = ContextPacker(token_budget=10_000).pack(retrieved)
+    # a.txt chunks 0 and 2 are neither adjacent nor overlapping, so each keeps its own rank
+    assert texts == ["[1] beta passage", "[2] third chunk", "[3] first chunk"]
+    assert [h.split(" (")[0] for h in headers] == ["[1] b.txt", "[2] a.txt", "[3] a.txt"]
+    assert stats["passages"] == 3
+
+
+def test_adjacent_chunks_without_overlap_are_joined():
+    texts, headers, _ = ContextPacker().pack([(_meta("a.txt", 4), "row one"), (_meta("a.txt", 3), "row zero")])
+    assert texts == ["[1] row zero\nrow one"]
+    assert headers[0].endswith("chunks 3-4")
+
+
+def test_budget_truncates_then_drops_passages():
+    retrieved = [(_meta(f"{name}.txt", 0), TEXT[:400]) for name in "abc"]
+    packer = ContextPacker(token_budget=180, min_passage_tokens=32)
+    texts, headers, stats = packer.pack(retrieved)
+    used = sum(packer.count_tokens(t) + packer.count_tokens(h) for t, h in zip(texts, headers))
+    assert used <= 180
+    assert len(texts) == 2
+    assert texts[0] == f"[1] {TEXT[:400]}"
+    assert texts[1].startswith("[2] word000") and len(texts[1]) < len(texts[0])
+    assert (stats["truncated"], stats["dropped"]) == (1, 1)
+    assert packer.stats() == {"requests": 1, "tokens_saved": stats["tokens_saved"]}
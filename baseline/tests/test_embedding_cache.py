@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from retriever.embedding_cache import EmbeddingCache
+
+DIM = 4
+ROW_BYTES = DIM * 4
+
+
+class Encoder:
+    """Deterministic encoder that records what it was asked to encode."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts):
+        self.calls.append(list(texts))
+        return np.array([[len(t), t.count("a"), t.count("b"), 1.0] for t in texts], dtype=np.float32)
+
+
+def test_embeds_each_distinct_text_once(tmp_path):
+    encode = Encoder()
+    cache = EmbeddingCache("model", str(tmp_path))
+    first = cache.embed(["aa", "b", "aa"], encode)
+    assert encode.calls == [["aa", "b"]]
+    assert np.array_equal(first, encode(["aa", "b", "aa"]))
+
+    again = cache.embed(["b", "a\nb", "a b"], encode)
+    # "a\nb" is encoded as "a b", so they share one entry
+    assert encode.calls[-1] == ["a\nb"]
+    assert np.array_equal(again[1], again[2])
+    assert (cache.hits, cache.misses) == (3, 3)
+
+
+def test_flush_persists_and_unflushed_rows_are_dropped(tmp_path):
+    encode = Encoder()
+    cache = EmbeddingCache("model", str(tmp_path))
+    cache.embed(["one", "two"], encode)
+    cache.flush()
+    cache.embed(["three"], encode)  # never flushed
+
+    reopened = EmbeddingCache("model", str(tmp_path))
+    assert len(reopened) == 2
+    assert "one" in reopened and "three" not in reopened
+    assert np.array_equal(reopened.embed(["two"], encode), encode(["two"]))
+    assert "one" not in EmbeddingCache("other-model", str(tmp_path))
+
+
+def test_evicts_least_recently_used_rows(tmp_path):
+    encode = Encoder()
+    cache = EmbeddingCache("model", str(tmp_path), max_bytes=4 * ROW_BYTES)
+    for text in ["t1", "t2", "t3", "t4"]:
+        cache.embed([text], encode)
+    cache.embed(["t1"], encode)  # t2 is now the least recently used
+    out = cache.embed(["t5"], encode)
+
+    assert np.array_equal(out, encode(["t5"]))
+    # Compacted down to 90% of max_bytes: three rows
+    assert len(cache) == 3 and cache.evictions == 2
+    assert "t1" in cache and "t5" in cache and "t4" in cache
+    assert "t2" not in cache and "t3" not in cache
+
+    reopened = EmbeddingCache("model", str(tmp_path), max_bytes=4 * ROW_BYTES)
+    for text in ["t1", "t4", "t5"]:
+        assert np.array_equal(reopened.embed([text], encode), encode([text]))
+
+
+def test_rejects_vectors_of_another_dimension(tmp_path):
+    cache = EmbeddingCache("model", str(tmp_path))
+    cache.embed(["a"], Encoder())
+    with pytest.raises(ValueError):
+        cache.embed(["b"], lambda texts: np.zeros((len(texts), DIM + 1), dtype=np.float32))
@@ -0,0 +1,87 @@
+import csv
+import os
+import sys
+
+import pytest
+
+from conftest import BASELINE_DIR, DOCS, StubEngine, write_file
+
+sys.path.insert(0, os.path.join(os.path.dirname(BASELINE_DIR), "evaluation"))
+
+import evaluation  # noqa: E402
+
+BENCHMARK = [
+    ("Where do rivers meet the sea?", ["rivers_chunk0"]),
+    ("Which stones contain quartz?", ["stones_chunk0"]),
+    ("What do cirrus clouds look like?", ["clouds_chunk0"]),
+]
+TIMINGS = ("build_s", "search_ms_per_query")
+
+
+@pytest.fixture
+def docs_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr("retriever.embedding.EmbeddingEngine", StubEngine)
+    (tmp_path / "docs").mkdir()
+    for name, text in DOCS.items():
+        write_file(tmp_path / "docs", name, text)
+    write_file(tmp_path / "docs", "notes.json", '{"skipped": true}')
+    write_file(tmp_path / "docs", "empty.txt", "  \n")
+    return str(tmp_path / "docs")
+
+
+def _scores(rows):
+    return [{key: value for key, value in row.items() if key not in TIMINGS} for row in rows]
+
+
+def test_load_and_chunk_corpus(docs_dir):
+    corpus = evaluation.load_corpus(docs_dir)
+    assert [stem for stem, _ in corpus] == ["clouds", "rivers", "stones"]
+    texts, ids = evaluation.chunk_corpus(corpus, chunk_size=40, chunk_overlap=0)
+    assert len(texts) == len(ids) > 3
+    assert ids[:2] == ["clouds_chunk0", "clouds_chunk1"] and all(len(t) <= 40 for t in texts)
+
+
+def test_sweep_covers_every_configuration(docs_dir, capsys):
+    rows = evaluation.run_sweep(docs_dir, BENCHMARK, chunk_sizes=(40, 200), chunk_overlaps=(0, 50),
+                                models=("stub",), index_types=("flat", "hnsw"), ks=(1, 3), level="doc",
+                                query_batch=2)
+    # (40, 50) is skipped: the overlap is not smaller than the chunk size
+    assert "Skipping chunk_size=40, chunk_overlap=50" in capsys.readouterr().out
+    configs = {(r["chunk_size"], r["chunk_overlap"], r["index_type"]) for r in rows}
+    assert configs == {(size, overlap, index) for size, overlap in ((40, 0), (200, 0), (200, 50))
+                       for index in ("flat", "hnsw")}
+    assert len(rows) == len(configs) * 2
+    for row in rows:
+        assert all(0.0 <= row[metric] <= 1.0 for metric in evaluation.METRICS)
+    # Each whole document is one chunk at size 200, and each question names its document
+    assert all(r["hit_rate"] == 1.0 and r["chunks"] == 3 for r in rows if r["chunk_size"] == 200 and r["k"] == 3)
+    assert len(evaluation.format_table(rows).splitlines()) == len(rows) + 2
+
+
+def test_cache_reuses_chunk_vectors_across_runs(docs_dir, tmp_path, capsys):
+    options = dict(chunk_sizes=(40, 200), chunk_overlaps=(0,), models=("stub",), ks=(1, 3),
+                   cache_dir=str(tmp_path / "cache"))
+    first = evaluation.run_sweep(docs_dir, BENCHMARK, **options)
+    assert "reused 0" in capsys.readouterr().out
+    second = evaluation.run_sweep(docs_dir, BENCHMARK, **options)
+    assert "embedded 0 new chunk(s)" in capsys.readouterr().out
+    assert _scores(second) == _scores(first)
+
+
+def test_worker_processes_match_serial_results(docs_dir):
+    options = dict(chunk_sizes=(60,), chunk_overlaps=(0, 20), models=("stub",), index_types=("flat",),
+                   ks=(1, 3), level="chunk")
+    serial = evaluation.run_sweep(docs_dir, BENCHMARK, workers=1, **options)
+    parallel = evaluation.run_sweep(docs_dir, BENCHMARK, workers=2, **options)
+    assert _scores(parallel) == _scores(serial)
+
+
+def test_write_results(tmp_path):
+    rows = [{"model": "stub", "k": 1, "ndcg": 0.5}, {"model": "stub", "k": 3, "ndcg": 0.75}]
+    csv_path = str(tmp_path / "out" / "results.csv")
+    evaluation.write_results(rows, csv_path)
+    with open(csv_path, encoding="utf-8", newline="") as f:
+        assert [row["ndcg"] for row in csv.DictReader(f)] == ["0.5", "0.75"]
+    json_path = str(tmp_path / "results.json")
+    evaluation.write_results(rows, json_path)
+    assert os.path.getsize(json_path) > 0
@@ -0,0 +1,51 @@
+import pytest
+
+from conftest import write_file
+
+from retriever import index_factory
+from retriever.retreiver import Retriever
+
+WORDS = ["river", "stone", "cloud", "maple", "ember", "frost", "delta", "orbit"]
+
+
+@pytest.fixture
+def paths(tmp_path):
+    return [write_file(tmp_path, f"doc{i:02d}.txt", f"{WORDS[i % 8]} {WORDS[(i * 3) % 8]} doc{i}")
+            for i in range(40)]
+
+
+def test_fit_params_shrinks_to_the_training_set():
+    params = index_factory.fit_params("ivf_pq", index_factory.resolve_params("ivf_pq"), 200)
+    assert params["nlist"] == 200 // 39 and params["nprobe"] == params["nlist"]
+    assert params["pq_nbits"] == 7
+    assert index_factory.fit_params("flat", {}, 10) == {}
+
+
+# Few PQ sub-quantizers keep training fast
+PQ = {"pq_m": 8}
+
+
+@pytest.mark.parametrize("index_type, rebuilt_type", [("ivf_flat", "ivf_pq"), ("ivf_pq", "flat")])
+def test_fitted_params_are_stored_saved_and_passed_on(tmp_path, paths, engine, index_type, rebuilt_type):
+    retriever = Retriever(embedder=engine, index_type=index_type,
+                          index_params=PQ if index_type == "ivf_pq" else None)
+    retriever.add_documents(paths)
+    params = retriever.index_params
+    ivf = index_factory.faiss.extract_index_ivf(retriever.index)
+    assert params["nlist"] == ivf.nlist == 1 and params["nprobe"] == ivf.nprobe
+    assert retriever.detached_copy().index_params == params
+
+    assert retriever.remove_documents(["doc00.txt"]) == 1
+    retriever.save(str(tmp_path / "first"))
+    assert index_factory.load_config(str(tmp_path / "first")) == (index_type, params)
+
+    retriever.rebuild_index(rebuilt_type, PQ if rebuilt_type == "ivf_pq" else None)
+    assert retriever.index_type == rebuilt_type and retriever.index.ntotal == 39
+    retriever.save(str(tmp_path / "second"))
+    reloaded = Retriever(embedder=engine)
+    reloaded.load(str(tmp_path / "second"))
+    assert (reloaded.index_type, reloaded.index_params) == (rebuilt_type, retriever.index_params)
+    if rebuilt_type == "ivf_pq":
+        assert retriever.index_params["pq_nbits"] == 5  # log2(39 training vectors)
+    assert reloaded.query("river stone", top_k=3, mode="dense") == \
+        retriever.query("river stone", top_k=3, mode="dense")
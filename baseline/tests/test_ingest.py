@@ -0,0 +1,109 @@
+import csv
+
+from conftest import write_file
+
+from retriever.ingest import iter_chunked_files, iter_csv_chunks, iter_csv_parts
+from retriever.manifest import IndexManifest
+from retriever.retreiver import Retriever
+
+HEADER = ["id", "city", "note"]
+ROWS = [[str(i), f"city{i}", "x" * (i % 7)] for i in range(50)]
+
+
+def _write_csv(dir_path, name="table.csv", rows=ROWS) -> str:
+    path = str(dir_path / name)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADER)
+        writer.writerows(rows)
+    return path
+
+
+def test_chunks_cover_every_row_once_with_header(tmp_path):
+    path = _write_csv(tmp_path)
+    chunks = list(iter_csv_chunks(path, chunk_size=120))
+    assert len(chunks) > 1
+    expected_start = 0
+    for text, row_start, row_end in chunks:
+        assert len(text) <= 120
+        lines = text.split("\n")
+        assert lines[0] == ", ".join(HEADER)
+        assert row_start == expected_start
+        assert lines[1:] == [", ".join(row) for row in ROWS[row_start:row_end + 1]]
+        expected_start = row_end + 1
+    assert expected_start == len(ROWS)
+
+
+def test_long_row_is_split_with_one_row_range(tmp_path):
+    rows = [["0", "short", ""], ["1", "long", "y" * 250], ["2", "short", ""]]
+    chunks = list(iter_csv_chunks(_write_csv(tmp_path, rows=rows), chunk_size=100))
+    ranges = [(start, end) for _, start, end in chunks]
+    assert ranges[0] == (0, 0) and ranges[-1] == (2, 2)
+    assert len(ranges) > 3 and set(ranges[1:-1]) == {(1, 1)}
+    assert all(len(text) <= 100 for text, _, _ in chunks)
+
+
+def test_parts_number_chunks_across_the_file(tmp_path):
+    path = _write_csv(tmp_path)
+    chunks = list(iter_csv_chunks(path, chunk_size=120))
+    parts = list(iter_csv_parts(path, "d" * 64, chunk_size=120, part_size=3))
+    assert [p["final"] for p in parts] == [False] * (len(parts) - 1) + [True]
+    assert [p["first_chunk"] for p in parts] == list(range(0, 3 * len(parts), 3))
+    assert [c for p in parts for c in p["chunks"]] == [c[0] for c in chunks]
+    assert [(m["row_start"], m["row_end"]) for p in parts for m in p["chunk_metadata"]] == \
+        [(c[1], c[2]) for c in chunks]
+    ids = [i for p in parts for i in p["ids"]]
+    assert len(set(ids)) == len(chunks)
+    assert parts[0]["metadata"]["source_type"] == "csv"
+
+
+def test_retriever_indexes_row_ranges(tmp_path, engine):
+    path = _write_csv(tmp_path)
+    retriever = Retriever(embedder=engine, chunk_size=120, chunk_overlap=20)
+    added = retriever.add_documents([path, write_file(tmp_path, "notes.txt", "unrelated notes")])
+    assert added == len(list(iter_csv_chunks(path, 120))) + 1
+
+    meta, text = retriever.query("city42", top_k=1, mode="hybrid", filter_source_type="csv")[0]
+    assert meta["row_start"] <= 42 <= meta["row_end"]
+    assert "city42" in text
+    assert meta["chunk_id"] == [c[1] <= 42 <= c[2] for c in iter_csv_chunks(path, 120)].index(True)
+
+
+def _mixed_files(dir_path):
+    paths = [write_file(dir_path, f"doc{i}.txt", " ".join(f"word{i}{j}" for j in range(60 + 25 * i)))
+             for i in range(4)]
+    paths.append(write_file(dir_path, "empty.md", "  "))
+    paths.append(write_file(dir_path, "broken.pdf", "not a pdf"))
+    paths.append(_write_csv(dir_path))
+    return paths
+
+
+def test_parallel_chunking_matches_serial(tmp_path):
+    jobs = [(path, IndexManifest.hash_file(path)) for path in _mixed_files(tmp_path)]
+    serial = list(iter_chunked_files(jobs, 120, 20, workers=1))
+    parallel = list(iter_chunked_files(jobs, 120, 20, workers=3))
+
+    def by_file(results):
+        return sorted(results, key=lambda r: (r["path"], r.get("first_chunk", 0)))
+
+    # Workers finish in any order; the results themselves are identical
+    assert by_file(parallel) == by_file(serial)
+    # Unreadable and blank files yield no chunks either way
+    assert [r["chunks"] for r in serial if r["file_name"] in ("empty.md", "broken.pdf")] == [[], []]
+
+
+def test_parallel_ingest_builds_the_same_index(tmp_path, engine):
+    paths = _mixed_files(tmp_path)
+    serial = Retriever(embedder=engine, chunk_size=120, chunk_overlap=20)
+    parallel = Retriever(embedder=engine, chunk_size=120, chunk_overlap=20, ingest_workers=3)
+    assert parallel.add_documents(paths) == serial.add_documents(paths)
+    assert parallel.manifest.files == serial.manifest.files
+
+    def chunks(retriever):
+        return sorted((retriever.metadata_index.row(i)["source"], retriever.metadata_index.row(i)["chunk_id"],
+                       retriever.chunks.text(i)) for i in range(retriever.index.ntotal))
+
+    assert chunks(parallel) == chunks(serial)
+    for question in ("word12 word13", "city7", "word35"):
+        assert sorted(parallel.query(question, top_k=4), key=str) == \
+            sorted(serial.query(question, top_k=4), key=str)
@@ -0,0 +1,75 @@
+import json
+
+import pytest
+
+from conftest import write_file
+
+from metrics import load_benchmark
+from metrics.tracing import tracer
+
+
+def test_load_logged_questions(make_pipeline, tmp_path):
+    pipe = make_pipeline()
+    for question in ("Where do rivers meet the sea?", "What are clouds made of?"):
+        pipe.run(question)
+    assert pipe.logger.flush(timeout=5)
+    assert load_benchmark.load_logged_questions(pipe.logger.log_dir) == [
+        "Where do rivers meet the sea?", "What are clouds made of?"]
+
+    csv_path = write_file(tmp_path, "queries.csv", "question,answer\nfirst,a\n  ,b\nsecond,c\n")
+    assert load_benchmark.load_logged_questions(csv_path) == ["first", "second"]
+    json_path = write_file(tmp_path, "queries.json", json.dumps([{"question": "q1"}, {"question": "q2"}]))
+    assert load_benchmark.load_logged_questions(json_path, limit=1) == ["q1"]
+
+
+def test_synthetic_questions_are_seeded(make_pipeline):
+    retriever = make_pipeline().retriever
+    questions = load_benchmark.synthetic_questions(retriever, n=5, seed=1)
+    assert len(questions) == 5 and all(q.startswith("What does the document say about") for q in questions)
+    assert load_benchmark.synthetic_questions(retriever, n=5, seed=1) == questions
+
+
+@pytest.mark.parametrize("load", [{"concurrency": 3}, {"qps": 200.0}])
+def test_run_load_counts_every_request(make_pipeline, load):
+    pipe = make_pipeline()
+    questions = load_benchmark.synthetic_questions(pipe.retriever, n=4)
+    row = load_benchmark.run_load(pipe, questions, requests=10, **load)
+    assert (row["requests"], row["errors"], row["sample_errors"]) == (10, 0, [])
+    assert 0 < row["p50_ms"] <= row["p95_ms"] <= row["p99_ms"] <= row["max_ms"]
+    assert row["throughput_qps"] > 0 and row["rss_mb"] > 0
+
+
+def test_run_load_reports_errors(make_pipeline, monkeypatch):
+    pipe = make_pipeline()
+    monkeypatch.setattr(pipe, "run", lambda question: 1 / 0)
+    row = load_benchmark.run_load(pipe, ["q"], concurrency=2, requests=4)
+    assert row["errors"] == 4 and row["sample_errors"][0].startswith("ZeroDivisionError")
+    with pytest.raises(ValueError):
+        load_benchmark.run_load(pipe, [])
+
+
+def test_run_suite_sweeps_and_restores_the_pipeline(make_pipeline):
+    pipe = make_pipeline()
+    retriever, top_k, was_enabled = pipe.retriever, pipe.top_k, tracer.enabled
+    questions = load_benchmark.synthetic_questions(retriever, n=3)
+    rows = load_benchmark.run_suite(pipe, questions, concurrency=[1, 2], top_k=[1, 2],
+                                    corpus_sizes=[1, None], requests=3)
+    assert len(rows) == 2 * 2 * 2 * 2
+    assert [r["phase"] for r in rows[:2]] == ["cold", "warm"]
+    assert {(r["corpus_files"], r["top_k"], r["concurrency"]) for r in rows} == {
+        (files, k, c) for files in (1, 3) for k in (1, 2) for c in (1, 2)}
+    assert all(r["errors"] == 0 and "pipeline.run" in r["stages"] for r in rows)
+    # The one-file corpus has fewer chunks than the full index
+    assert rows[0]["corpus_chunks"] < rows[-1]["corpus_chunks"] == len(retriever.chunks)
+    assert (pipe.retriever, pipe.top_k, tracer.enabled) == (retriever, top_k, was_enabled)
+
+
+def test_compare_reports_relative_change():
+    old = [{"corpus_files": 3, "top_k": 5, "concurrency": 1, "phase": "cold",
+            "p95_ms": 100.0, "throughput_qps": 10.0}]
+    new = [dict(old[0], p95_ms=80.0, throughput_qps=12.5),
+           dict(old[0], phase="warm", p95_ms=5.0, throughput_qps=50.0)]
+    lines = load_benchmark.compare(old, new).splitlines()
+    assert len(lines) == 2  # header plus the one matching scenario
+    assert lines[1].startswith("files=3 k=5 c=1 cold")
+    assert "-20.0%" in lines[1] and "+25.0%" in lines[1]
@@ -0,0 +1,61 @@
+import os
+
+import pytest
+
+from logger import log_reader
+from logger.logger import Logger, rotated_segments
+
+
+def _log(logger: Logger, questions):
+    for question in questions:
+        logger.log(question, [], "prompt", "answer")
+        assert logger.flush(timeout=5)
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_rotation_keeps_backup_count_segments(tmp_path, compress):
+    logger = Logger(str(tmp_path), flush_interval=0.01, batch_size=1, max_bytes=1, backup_count=3,
+                    compress=compress)
+    try:
+        _log(logger, [f"q{i}" for i in range(5)])
+    finally:
+        logger.close()
+
+    segments = rotated_segments(str(tmp_path))
+    assert len(segments) == 3
+    assert all(s.endswith(".jsonl.gz" if compress else ".jsonl") for s in segments)
+    assert not os.path.exists(logger.jsonl_file)
+    # The two oldest segments were pruned
+    assert [e["question"] for e in log_reader.iter_entries(str(tmp_path))] == ["q2", "q3", "q4"]
+
+
+def test_compact_merges_segments_in_order(tmp_path):
+    logger = Logger(str(tmp_path), flush_interval=0.01, batch_size=1, max_bytes=1, backup_count=10)
+    try:
+        _log(logger, ["q0", "q1", "q2"])
+        logger.max_bytes = 1 << 20
+        _log(logger, ["q3"])
+    finally:
+        logger.close()
+    with open(rotated_segments(str(tmp_path))[1], "a", encoding="utf-8") as f:
+        f.write('{"torn": ')
+
+    assert log_reader.compact(str(tmp_path)) == 3
+    segments = rotated_segments(str(tmp_path))
+    assert len(segments) == 1 and segments[0].endswith("-compact.jsonl.gz")
+    # The active file is left alone and read after the segments
+    assert [e["question"] for e in log_reader.iter_entries(str(tmp_path))] == ["q0", "q1", "q2", "q3"]
+    assert log_reader.compact(str(tmp_path)) == 0
+
+
+def test_export_csv_and_json(tmp_path):
+    logger = Logger(str(tmp_path / "logs"), flush_interval=0.01)
+    try:
+        _log(logger, ["first", "second"])
+    finally:
+        logger.close()
+    log_dir = str(tmp_path / "logs")
+    assert log_reader.export_json(str(tmp_path / "out.json"), log_dir) == 2
+    assert log_reader.export_csv(str(tmp_path / "out.csv"), log_dir) == 2
+    with open(tmp_path / "out.csv", encoding="utf-8") as f:
+        assert f.readline().strip().split(",") == log_reader.CSV_COLUMNS
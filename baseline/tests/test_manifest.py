@@ -0,0 +1,57 @@
+from conftest import write_file
+
+from retriever.manifest import IndexManifest
+from retriever.retreiver import Retriever
+
+
+def test_status_new_changed_unchanged():
+    manifest = IndexManifest()
+    assert manifest.status("a.txt", "h1") == "new"
+    manifest.record("a.txt", "h1", ["a-0", "a-1"])
+    assert manifest.status("a.txt", "h1") == "unchanged"
+    assert manifest.status("a.txt", "h2") == "changed"
+
+
+def test_status_adopts_entries_without_hash():
+    manifest = IndexManifest()
+    manifest.files["a.txt"] = {"sha256": None, "ids": ["a-0"]}
+    assert manifest.status("a.txt", "h1") == "unchanged"
+    assert manifest.status("a.txt", "h2") == "changed"
+
+
+def test_remove_returns_ids_of_deleted_file():
+    manifest = IndexManifest()
+    manifest.record("a.txt", "h1", ["a-0", "a-1"])
+    assert manifest.remove("a.txt") == ["a-0", "a-1"]
+    assert manifest.remove("a.txt") == []
+    assert manifest.status("a.txt", "h1") == "new"
+
+
+def test_pending_and_save_load(tmp_path):
+    a = write_file(tmp_path, "a.txt", "alpha")
+    b = write_file(tmp_path, "b.txt", "beta")
+    manifest = IndexManifest()
+    manifest.record("a.txt", IndexManifest.hash_file(a), ["a-0"])
+    assert manifest.pending([a, b]) == [b]
+
+    manifest.save(str(tmp_path))
+    loaded = IndexManifest.load(str(tmp_path))
+    assert loaded.files == manifest.files
+    assert IndexManifest.load(str(tmp_path / "missing")) is None
+
+
+def test_add_documents_skips_unchanged_and_replaces_changed(tmp_path, engine):
+    a = write_file(tmp_path, "a.txt", "apples grow on trees")
+    b = write_file(tmp_path, "b.txt", "bananas are yellow")
+    retriever = Retriever(embedder=engine)
+    assert retriever.add_documents([a, b]) == 2
+    assert retriever.add_documents([a, b]) == 0
+
+    write_file(tmp_path, "b.txt", "bananas are yellow and curved")
+    assert retriever.add_documents([a, b]) == 1
+    assert retriever.index.ntotal == 2
+    assert retriever.query("curved bananas", top_k=1)[0][1] == "bananas are yellow and curved"
+
+    assert retriever.remove_documents(["b.txt"]) == 1
+    assert retriever.index.ntotal == 1
+    assert set(retriever.manifest.files) == {"a.txt"}
@@ -0,0 +1,66 @@
+import numpy as np
+
+from conftest import write_file
+
+from retriever.metadata_index import MetadataIndex
+from retriever.retreiver import Retriever
+
+ROWS = [
+    {"source": "a.pdf", "source_type": "pdf", "date": "2024-01-10", "chunk_id": 0},
+    {"source": "a.pdf", "source_type": "pdf", "date": "2024-01-10", "chunk_id": 1},
+    {"source": "b.csv", "source_type": "csv", "date": "2024-03-01", "chunk_id": 0, "row_start": 1, "row_end": 5},
+    {"source": "c.txt", "source_type": "txt", "date": "unknown", "chunk_id": 0},
+]
+
+
+def _index() -> MetadataIndex:
+    index = MetadataIndex()
+    index.append(ROWS)
+    return index
+
+
+def test_mask_without_filters_is_none():
+    assert _index().mask() is None
+
+
+def test_mask_by_source_type_and_source():
+    index = _index()
+    assert index.mask(source_type="pdf").tolist() == [True, True, False, False]
+    assert index.mask(source="b.csv").tolist() == [False, False, True, False]
+    assert not index.mask(source_type="docx").any()
+
+
+def test_mask_by_date_skips_unknown_dates():
+    index = _index()
+    assert index.mask(date_after="2024-02-01").tolist() == [False, False, True, False]
+    assert index.mask(date_after="2024-01-10").tolist() == [True, True, True, False]
+    assert index.mask(source_type="pdf", date_after="2024-02-01").tolist() == [False] * 4
+
+
+def test_mask_ignores_invalid_date(capsys):
+    mask = _index().mask(date_after="last week")
+    assert mask.all()
+    assert "invalid date filter" in capsys.readouterr().out
+
+
+def test_rows_survive_remove_and_save_load(tmp_path):
+    index = _index()
+    index.remove([1])
+    assert [index.row(i) for i in range(len(index))] == [ROWS[0], ROWS[2], ROWS[3]]
+    assert index.positions("b.csv").tolist() == [1]
+
+    index.save(str(tmp_path))
+    loaded = MetadataIndex.load(str(tmp_path))
+    assert [loaded.row(i) for i in range(len(loaded))] == [ROWS[0], ROWS[2], ROWS[3]]
+    assert np.array_equal(loaded.mask(source_type="csv"), index.mask(source_type="csv"))
+
+
+def test_filtered_query_returns_only_matching_chunks(tmp_path, engine):
+    paths = [
+        write_file(tmp_path, "notes.txt", "solar panels convert sunlight"),
+        write_file(tmp_path, "readme.md", "solar panels and sunlight and more sunlight"),
+    ]
+    retriever = Retriever(embedder=engine)
+    retriever.add_documents(paths)
+    results = retriever.query("solar sunlight", top_k=5, filter_source_type="txt")
+    assert [meta["source"] for meta, _ in results] == ["notes.txt"]
@@ -0,0 +1,110 @@
+import pytest
+
+from conftest import StubEngine
+
+import pipeline
+from generator.semantic_cache import SemanticAnswerCache
+from logger import log_reader
+from metrics.tracing import tracer
+from retriever.reranker import CrossEncoderReranker
+from retriever.retreiver import Retriever
+
+QUESTION = "Where do rivers meet the sea?"
+
+
+@pytest.fixture
+def traced(monkeypatch):
+    monkeypatch.setattr(tracer, "enabled", True)
+    return tracer
+
+
+class StubReranker(CrossEncoderReranker):
+    """Loads a scorer that counts shared words instead of a cross-encoder."""
+
+    def __init__(self, fail: bool = False):
+        super().__init__(time_budget=None)
+        self.fail = fail
+
+    def load(self):
+        if self.fail:
+            raise OSError("no model")
+        if self.model is None:
+            self.model = self
+        return self.model
+
+    def predict(self, pairs, **kwargs):
+        return [len(set(query.lower().split()) & set(text.lower().split())) for query, text in pairs]
+
+
+@pytest.fixture
+def cold_start(make_pipeline, monkeypatch):
+    """Factory for Pipelines that load the saved index with a not yet loaded embedder."""
+    make_pipeline()  # builds and saves the index
+
+    def make(**kwargs):
+        engine = StubEngine()
+        monkeypatch.setattr(pipeline, "Retriever", lambda **options: Retriever(embedder=engine, **options))
+        return make_pipeline(**kwargs)
+
+    return make
+
+
+def _logged(pipe) -> list:
+    assert pipe.logger.flush(timeout=5)
+    return [(e["question"], e["generated_answer"]) for e in log_reader.iter_entries(pipe.logger.log_dir)]
+
+
+def test_stream_yields_the_answer_then_records_it(make_pipeline, traced):
+    pipe = make_pipeline()
+    deltas = list(pipe.run_stream(QUESTION))
+    answer = "".join(deltas)
+    assert len(deltas) > 1 and answer
+    assert pipe.memory.history("default")[1] == [(QUESTION, answer)]
+    assert _logged(pipe) == [(QUESTION, answer)]
+    trace = traced.last_trace()
+    assert trace["name"] == "pipeline.run_stream" and trace["attrs"]["stream_completed"]
+
+
+def test_closing_the_stream_early_records_the_partial_answer(make_pipeline, traced):
+    pipe = make_pipeline(answer_cache=SemanticAnswerCache())
+    stream = pipe.run_stream(QUESTION, session_id="s")
+    first = next(stream)
+    stream.close()
+    assert pipe.memory.history("s")[1] == [(QUESTION, first)]
+    assert _logged(pipe) == [(QUESTION, first)]
+    assert not traced.last_trace()["attrs"]["stream_completed"]
+    # Only complete answers are cached
+    assert len(pipe.answer_cache) == 0
+
+
+def test_cached_answer_streams_in_one_piece(make_pipeline):
+    pipe = make_pipeline(answer_cache=SemanticAnswerCache())
+    answer = "".join(pipe.run_stream(QUESTION))
+    requests = pipe.generator.backend.requests
+    assert list(pipe.run_stream(QUESTION)) == [answer]
+    assert pipe.generator.backend.requests == requests
+    assert _logged(pipe) == [(QUESTION, answer)] * 2
+
+
+def test_warm_up_loads_models_before_the_first_request(cold_start):
+    pipe = cold_start(reranker=StubReranker())
+    assert not pipe.ready
+    assert pipe.wait_until_ready(0) is False  # no background warm-up to wait for
+    pipe.warm_up()
+    assert pipe.ready and pipe.reranker.loaded
+    assert {"index", "warm_up", "model_load", "total"} <= set(pipe.startup)
+    assert pipe.run(QUESTION)
+
+
+def test_background_warm_up(cold_start):
+    pipe = cold_start(reranker=StubReranker(), warm_up=True)
+    assert pipe.wait_until_ready(5)
+    assert "warm_up" in pipe.startup
+
+
+def test_failed_warm_up_leaves_the_pipeline_not_ready(cold_start, capsys):
+    pipe = cold_start(reranker=StubReranker(fail=True), warm_up=True)
+    assert pipe.wait_until_ready(5) is False
+    assert "[WARN] Warm-up failed: OSError: no model" in capsys.readouterr().out
+    # The embedder loaded before the reranker failed
+    assert pipe.retriever.embedder.loaded
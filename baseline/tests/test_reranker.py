@@ -0,0 +1,78 @@
+from retriever import reranker
+from retriever.reranker import CrossEncoderReranker
+
+
+class FakeClock:
+    """Stands in for the ``time`` module inside retriever.reranker."""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def perf_counter(self) -> float:
+        return self.now
+
+
+class StubScorer:
+    """CrossEncoder stand-in: a pair scores the number of query words in the chunk."""
+
+    def __init__(self, clock=None, seconds_per_batch=0.0):
+        self.clock = clock
+        self.seconds_per_batch = seconds_per_batch
+        self.batches = []
+
+    def predict(self, pairs, batch_size=32, convert_to_numpy=True, show_progress_bar=False):
+        self.batches.append(len(pairs))
+        if self.clock is not None:
+            self.clock.now += self.seconds_per_batch
+        return [sum(word in text.split() for word in query.lower().split()) for query, text in pairs]
+
+
+def _retrieved(*texts):
+    return [({"source": f"{i}.txt"}, text) for i, text in enumerate(texts)]
+
+
+RETRIEVED = _retrieved("cats", "green apples", "red apples and pears", "pears", "apples")
+
+
+def test_reorders_by_cross_encoder_score():
+    scorer = StubScorer()
+    ranker = CrossEncoderReranker(model=scorer, top_k=2, batch_size=2, time_budget=None)
+    ranked, info = ranker.rerank("Apples pears", RETRIEVED)
+    assert [text for _, text in ranked] == ["red apples and pears", "green apples"]
+    assert info["reranked"] and (info["scored"], info["cached"]) == (5, 0)
+    # Length-sorted batches of batch_size
+    assert scorer.batches == [2, 2, 1]
+
+
+def test_falls_back_to_ann_order_when_the_budget_runs_out(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(reranker, "time", clock)
+    scorer = StubScorer(clock, seconds_per_batch=0.3)
+    ranker = CrossEncoderReranker(model=scorer, top_k=3, batch_size=2, time_budget=0.5)
+
+    ranked, info = ranker.rerank("apples pears", RETRIEVED)
+    assert ranked == RETRIEVED[:3]
+    assert not info["reranked"] and info["scored"] == 4
+    assert scorer.batches == [2, 2]
+    assert ranker.stats()["fallbacks"] == 1
+
+    # Pairs scored before the budget ran out stay cached, so the retry finishes
+    ranked, info = ranker.rerank("apples pears", RETRIEVED)
+    assert info["reranked"] and (info["scored"], info["cached"]) == (1, 4)
+    assert [text for _, text in ranked][0] == "red apples and pears"
+
+
+def test_score_cache_hits_skip_the_model():
+    scorer = StubScorer()
+    ranker = CrossEncoderReranker(model=scorer, top_k=3, time_budget=None, cache_size=100)
+    first, _ = ranker.rerank("apples pears", RETRIEVED)
+    # Cache keys use the normalised query, so case and spacing do not matter
+    second, info = ranker.rerank("  Apples   PEARS ", RETRIEVED)
+    assert second == first
+    assert (info["scored"], info["cached"]) == (0, 5)
+    assert len(scorer.batches) == 1
+
+    _, info = ranker.rerank("apples pears", RETRIEVED + _retrieved("apples pears"))
+    assert (info["scored"], info["cached"]) == (1, 5)
+    stats = ranker.stats()
+    assert (stats["requests"], stats["pairs_scored"]) == (3, 6)
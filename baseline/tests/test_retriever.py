@@ -0,0 +1,70 @@
+import threading
+
+import pytest
+
+from conftest import write_file
+
+from retriever.retreiver import Retriever
+
+
+def _paths(dir_path, count):
+    return [write_file(dir_path, f"doc{i:02d}.txt", f"doc{i:02d} shared words about topic {i % 3}")
+            for i in range(count)]
+
+
+def test_queries_never_see_a_half_applied_change(tmp_path, engine):
+    paths = _paths(tmp_path, 12)
+    retriever = Retriever(embedder=engine)
+    retriever.add_documents(paths[:6])
+    errors, stop = [], threading.Event()
+
+    def query_loop():
+        while not stop.is_set():
+            try:
+                for meta, text in retriever.query("shared words topic", top_k=6):
+                    # Chunk text and metadata come from the same position
+                    assert text.startswith(meta["source"][:-4])
+            except Exception as e:  # surfaced in the main thread
+                errors.append(e)
+                return
+
+    threads = [threading.Thread(target=query_loop) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    try:
+        for _ in range(5):
+            retriever.add_documents(paths[6:], batch_size=2)
+            retriever.remove_documents([f"doc{i:02d}.txt" for i in range(6, 12)])
+        retriever.rebuild_index("hnsw")
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+    assert not errors
+    assert retriever.index.ntotal == 6
+
+
+@pytest.mark.parametrize("options", [
+    {},
+    {"mode": "sparse"},
+    {"mode": "hybrid"},
+    {"mode": "hybrid", "fusion": "weighted", "sparse_weight": 0.5},
+    {"filter_source_type": "txt", "filter_source": "doc03.txt"},
+])
+def test_query_batch_matches_per_query_results(tmp_path, engine, options):
+    paths = _paths(tmp_path, 12)
+    batch_retriever = Retriever(embedder=engine)
+    batch_retriever.add_documents(paths)
+    single_retriever = Retriever(embedder=engine)
+    single_retriever.add_documents(paths)
+
+    questions = ["shared words", "topic 1", "doc03 words", "topic 2 about", "shared words"]
+    expected = [single_retriever.query(q, top_k=4, **options) for q in questions]
+    encoded = engine.texts_embedded
+    assert batch_retriever.query_batch(questions, top_k=4, **options) == expected
+    # Dense modes embed every cache miss; sparse never touches the encoder
+    misses = 0 if options.get("mode") == "sparse" else len(questions)
+    assert engine.texts_embedded - encoded == misses
+    # Cached results come back the same without re-encoding
+    assert batch_retriever.query_batch(questions, top_k=4, **options) == expected
+    assert engine.texts_embedded - encoded == misses
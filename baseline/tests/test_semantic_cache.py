@@ -0,0 +1,78 @@
+import numpy as np
+
+from generator import semantic_cache
+from generator.semantic_cache import SemanticAnswerCache
+
+CHUNKS = ["c1", "c2", "c3", "c4"]
+
+
+class FakeClock:
+    """Stands in for the ``time`` module inside generator.semantic_cache."""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+def _vector(angle: float) -> np.ndarray:
+    """Unit vector whose cosine similarity with _vector(0) is cos(angle)."""
+    return np.array([np.cos(angle), np.sin(angle), 0.0], dtype=np.float32)
+
+
+def _cache(**kwargs) -> SemanticAnswerCache:
+    cache = SemanticAnswerCache(similarity_threshold=0.9, min_chunk_overlap=0.6, **kwargs)
+    cache.store("What is X?", _vector(0.0) * 3, CHUNKS, ["a.txt"], "X is x.")
+    return cache
+
+
+def test_near_duplicate_hits():
+    cache = _cache()
+    assert cache.lookup(_vector(0.3), CHUNKS) == "X is x."  # cos 0.955
+    assert cache.lookup(_vector(0.0), CHUNKS[:3]) == "X is x."  # Jaccard 3/4
+    assert cache.stats()["hits"] == 2
+
+
+def test_below_threshold_or_low_overlap_misses():
+    cache = _cache()
+    assert cache.lookup(_vector(0.5), CHUNKS) is None  # cos 0.878
+    assert cache.lookup(_vector(0.0), CHUNKS[:2]) is None  # Jaccard 2/4
+    assert cache.lookup(_vector(0.0), ["c1", "c2", "other"]) is None  # Jaccard 2/5
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (0, 3, 0.0)
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(semantic_cache, "time", clock)
+    cache = _cache(ttl=60)
+    clock.now += 59
+    assert cache.lookup(_vector(0.0), CHUNKS) == "X is x."
+    clock.now += 2
+    assert cache.lookup(_vector(0.0), CHUNKS) is None
+    assert len(cache) == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = _cache(capacity=2)
+    cache.store("What is Y?", _vector(1.5), ["y"], ["b.txt"], "Y is y.")
+    assert cache.lookup(_vector(0.0), CHUNKS) == "X is x."  # X is now the most recent
+    cache.store("What is Z?", _vector(-1.5), ["z"], ["c.txt"], "Z is z.")
+    assert len(cache) == 2
+    assert cache.lookup(_vector(1.5), ["y"]) is None
+    assert cache.lookup(_vector(0.0), CHUNKS) == "X is x."
+    assert cache.lookup(_vector(-1.5), ["z"]) == "Z is z."
+
+
+def test_invalidate_sources():
+    cache = _cache()
+    cache.store("What is Y?", _vector(1.5), ["y"], ["b.txt", "a.txt"], "Y is y.")
+    cache.store("What is Z?", _vector(-1.5), ["z"], ["c.txt"], "Z is z.")
+    cache.invalidate_sources({"a.txt"})
+    assert len(cache) == 1
+    assert cache.lookup(_vector(0.0), CHUNKS) is None
+    assert cache.lookup(_vector(-1.5), ["z"]) == "Z is z."
+
+    cache.invalidate_sources(None)
+    assert len(cache) == 0
@@ -0,0 +1,99 @@
+from generator import session_memory
+from generator.session_memory import SessionMemoryStore
+from generator.tokens import count_tokens
+
+# 40 characters each, so every turn is 20 estimated tokens
+Q = "q" * 40
+A = "a" * 40
+
+
+def _turns(store, session_id):
+    return store.history(session_id)[1]
+
+
+def test_keeps_at_most_max_turns():
+    store = SessionMemoryStore(max_turns=2, token_budget=10_000)
+    for i in range(4):
+        store.append("s", f"q{i}", f"a{i}")
+    assert _turns(store, "s") == [("q2", "a2"), ("q3", "a3")]
+
+
+def test_trims_oldest_turns_to_token_budget():
+    store = SessionMemoryStore(max_turns=10, token_budget=50)
+    for _ in range(4):
+        store.append("s", Q, A)
+    assert len(_turns(store, "s")) == 2
+
+    # A single turn over budget is dropped too, so history never exceeds it
+    store.append("s", Q * 3, A * 3)
+    assert _turns(store, "s") == []
+
+
+def test_summary_counts_toward_budget():
+    calls = []
+
+    def summarizer(previous, turns):
+        calls.append((previous, turns))
+        return "s" * 200  # 50 tokens, cut to summary_tokens
+
+    store = SessionMemoryStore(max_turns=10, token_budget=50, summarizer=summarizer, summary_tokens=10)
+    store.append("s", Q, A)
+    store.append("s", Q, A)
+    store.append("s", "x" * 40, "y" * 40)
+    summary, turns = store.history("s")
+    assert calls == [("", [(Q, A)])]
+    assert count_tokens(summary) == 10
+    assert len(turns) == 2
+
+    # The next trim also has to make room for the summary
+    store.append("s", Q, A)
+    summary, turns = store.history("s")
+    assert calls[-1][0] == "s" * 40
+    assert count_tokens(summary) + sum(count_tokens(q) + count_tokens(a) for q, a in turns) <= 50
+    assert store.stats()["summaries"] == 2
+
+
+def test_failed_summary_keeps_previous(capsys):
+    def summarizer(previous, turns):
+        raise RuntimeError("LLM down")
+
+    store = SessionMemoryStore(max_turns=1, summarizer=summarizer)
+    store.append("s", "q0", "a0")
+    store.append("s", "q1", "a1")
+    assert store.history("s") == ("", [("q1", "a1")])
+    assert "Failed to summarize" in capsys.readouterr().out
+
+
+def test_sessions_are_isolated_and_bounded():
+    store = SessionMemoryStore(max_sessions=2)
+    store.append("a", "qa", "aa")
+    store.append("b", "qb", "ab")
+    store.history("a")  # a is now the most recently used
+    store.append("c", "qc", "ac")
+    assert _turns(store, "a") == [("qa", "aa")]
+    assert _turns(store, "b") == []
+    assert _turns(store, "c") == [("qc", "ac")]
+    assert store.stats()["evictions"] == 1
+
+
+class FakeClock:
+    """Stands in for the ``time`` module inside generator.session_memory."""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+def test_idle_sessions_expire(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(session_memory, "time", clock)
+    store = SessionMemoryStore(idle_ttl=60)
+    store.append("old", "q", "a")
+    clock.now += 30
+    store.append("new", "q", "a")
+    clock.now += 31
+    assert _turns(store, "old") == []
+    assert _turns(store, "new") == [("q", "a")]
+    assert len(store) == 1
@@ -0,0 +1,74 @@
+import pytest
+
+from conftest import write_file
+
+from retriever.retreiver import Retriever
+from retriever.sharded import ShardedRetriever, shard_for
+
+WORDS = ["river", "stone", "cloud", "maple", "ember", "frost", "delta", "orbit", "quartz", "lumen"]
+QUESTIONS = ["river stone", "cloud maple ember", "frost orbit", "quartz lumen river", "delta"]
+
+
+@pytest.fixture
+def paths(tmp_path):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    # Distinct word mixes, so no two files tie on distance
+    return [
+        write_file(docs, f"doc{i:02d}.txt",
+                   " ".join(WORDS[(i + j) % len(WORDS)] for j in range(1 + i % 4)) + f" doc{i}")
+        for i in range(12)
+    ]
+
+
+def test_shard_for_is_stable_and_in_range():
+    assert shard_for("a.txt", 4) == shard_for("a.txt", 4)
+    assert {shard_for(f"doc{i}.txt", 3) for i in range(50)} == {0, 1, 2}
+
+
+def test_merged_results_match_single_retriever(tmp_path, paths, engine):
+    single = Retriever(embedder=engine)
+    single.add_documents(paths)
+
+    with ShardedRetriever(str(tmp_path / "shards"), num_shards=3, embedder=engine) as sharded:
+        assert sharded.add_documents(paths) == len(paths)
+        assert sum(s["chunks"] for s in sharded.stats()) == len(paths)
+        assert sum(1 for s in sharded.stats() if s["chunks"]) > 1
+
+        for question in QUESTIONS:
+            assert sharded.query(question, top_k=5) == single.query(question, top_k=5, mode="dense")
+        assert sharded.query_batch(QUESTIONS, top_k=3) == \
+            single.query_batch(QUESTIONS, top_k=3, mode="dense")
+        assert sharded.query("river", top_k=5, filter_source="doc03.txt") == \
+            single.query("river", top_k=5, mode="dense", filter_source="doc03.txt")
+
+        with pytest.raises(ValueError):
+            sharded.query("river", mode="hybrid")
+
+
+def test_search_vectors_matches_dense_query(paths, engine):
+    retriever = Retriever(embedder=engine)
+    assert retriever.search_vectors(engine.encode(QUESTIONS), top_k=3) == [[] for _ in QUESTIONS]
+    retriever.add_documents(paths)
+    hits = retriever.search_vectors(retriever.embed_queries(QUESTIONS), top_k=3, filter_source_type="txt")
+    for question, question_hits in zip(QUESTIONS, hits):
+        scores = [score for score, _, _ in question_hits]
+        assert scores == sorted(scores, reverse=True)
+        assert [(meta, text) for _, meta, text in question_hits] == retriever.query(question, top_k=3)
+
+
+def test_reopened_index_serves_the_same_results(tmp_path, paths, engine):
+    path = str(tmp_path / "shards")
+    with ShardedRetriever(path, num_shards=2, embedder=engine) as sharded:
+        sharded.add_documents(paths)
+        sharded.save()
+        expected = sharded.query_batch(QUESTIONS, top_k=4)
+
+    assert ShardedRetriever.exists(path)
+    with ShardedRetriever(path, num_shards=2, embedder=engine) as reopened:
+        reopened.load()
+        assert reopened.query_batch(QUESTIONS, top_k=4) == expected
+        assert set(reopened.manifest.files) == {f"doc{i:02d}.txt" for i in range(12)}
+
+    with pytest.raises(ValueError):
+        ShardedRetriever(path, num_shards=3, embedder=engine).load()
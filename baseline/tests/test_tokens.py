@@ -0,0 +1,45 @@
+import re
+
+import pytest
+
+from generator import tokens
+from generator.tokens import count_tokens, default_tokenizer, truncate_to_tokens
+
+
+class WordTokenizer:
+    """Fast-tokenizer stand-in: one token per word or punctuation mark."""
+
+    def __call__(self, text, add_special_tokens=False, return_offsets_mapping=False):
+        matches = list(re.finditer(r"\w+|[^\w\s]", text))
+        out = {"input_ids": list(range(len(matches)))}
+        if return_offsets_mapping:
+            out["offset_mapping"] = [m.span() for m in matches]
+        return out
+
+
+@pytest.fixture
+def word_tokenizer(monkeypatch):
+    monkeypatch.setattr(tokens, "_tokenizer", WordTokenizer())
+
+
+def test_estimate_when_no_tokenizer_is_configured():
+    # conftest sets RAG_TOKENIZER="", so nothing is loaded
+    assert default_tokenizer() is None
+    assert count_tokens("a" * 41) == 11
+    assert truncate_to_tokens("word " * 20, 5) == "word word word word"
+
+
+def test_counts_and_truncates_with_the_tokenizer(word_tokenizer):
+    text = "Cats sleep, dogs bark loudly."
+    assert count_tokens(text) == 7
+    assert truncate_to_tokens(text, 4) == "Cats sleep, dogs"
+    assert truncate_to_tokens(text, 7) == text
+    assert truncate_to_tokens(text, 0) == ""
+
+
+def test_unavailable_tokenizer_falls_back_to_the_estimate(monkeypatch):
+    monkeypatch.setattr(tokens, "_tokenizer", None)
+    monkeypatch.setenv("RAG_TOKENIZER", "no-such/tokenizer")
+    monkeypatch.setattr(tokens, "_load_tokenizer", lambda name: False)
+    assert default_tokenizer() is None
+    assert count_tokens("a" * 8) == 2
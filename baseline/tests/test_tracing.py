@@ -0,0 +1,85 @@
+import asyncio
+import json
+
+import pytest
+
+from metrics.tracing import Histogram, Tracer
+
+
+def test_histogram_quantiles_are_within_one_bucket():
+    hist = Histogram()
+    for us in range(1, 1001):
+        hist.add(us * 1000)
+    assert (hist.count, hist.min_ns, hist.max_ns) == (1000, 1000, 1_000_000)
+    # Buckets are 2**(1/4) (~19%) wide
+    for q in (0.5, 0.95, 0.99):
+        assert hist.quantile(q) == pytest.approx(q * 1_000_000, rel=0.19)
+    assert hist.quantile(1.0) == 1_000_000
+    assert Histogram().quantile(0.5) == 0.0
+
+
+def test_summary_and_prometheus_text():
+    tracer = Tracer(enabled=True)
+    for ms in (1, 2, 3, 100):
+        tracer.record("retriever.query", ms * 1_000_000)
+    tracer.record('odd "name"', 5000)
+
+    summary = tracer.summary()["retriever.query"]
+    assert summary["count"] == 4 and summary["mean_ms"] == pytest.approx(26.5)
+    assert summary["max_ms"] == 100
+
+    lines = tracer.prometheus_text().splitlines()
+    assert lines[:2] == ["# HELP rag_span_duration_seconds Time spent in each instrumented stage.",
+                         "# TYPE rag_span_duration_seconds histogram"]
+    buckets = [line for line in lines if line.startswith('rag_span_duration_seconds_bucket{span="retriever')]
+    counts = [int(line.rsplit(" ", 1)[1]) for line in buckets]
+    assert counts == sorted(counts) and counts[-1] == 4
+    assert buckets[-1].startswith('rag_span_duration_seconds_bucket{span="retriever.query",le="+Inf"}')
+    assert 'rag_span_duration_seconds_sum{span="retriever.query"} 0.106000000' in lines
+    assert 'rag_span_duration_seconds_count{span="retriever.query"} 4' in lines
+    assert 'rag_span_duration_seconds_count{span="odd \\"name\\""} 1' in lines
+
+
+def test_export_traces_appends_jsonl_and_clears_the_buffer(tmp_path):
+    tracer = Tracer(enabled=True)
+    for i in range(2):
+        with tracer.trace("pipeline.run", question=f"q{i}"):
+            with tracer.span("retriever.query"):
+                pass
+    path = str(tmp_path / "out" / "traces.jsonl")
+    assert tracer.export_traces(path) == 2
+    assert tracer.export_traces(path) == 0
+    with open(path, encoding="utf-8") as f:
+        traces = [json.loads(line) for line in f]
+    assert [t["attrs"]["question"] for t in traces] == ["q0", "q1"]
+    assert [s["name"] for s in traces[0]["spans"]] == ["retriever.query"]
+
+
+def test_disabled_tracer_records_nothing():
+    tracer = Tracer()
+    with tracer.trace("pipeline.run"), tracer.span("retriever.query"):
+        pass
+    assert tracer.summary() == {} and tracer.last_trace() is None
+
+
+def test_concurrent_coroutines_keep_their_own_span_depth():
+    tracer = Tracer(enabled=True)
+
+    async def stage(name):
+        with tracer.span(name):
+            await asyncio.sleep(0)
+            with tracer.span(f"{name}.inner"):
+                await asyncio.sleep(0.01)
+            await asyncio.sleep(0)
+
+    async def request():
+        with tracer.trace("pipeline.run"):
+            with tracer.span("pipeline.generate"):
+                await asyncio.gather(stage("a"), stage("b"))
+            with tracer.span("pipeline.after"):
+                pass
+
+    asyncio.run(request())
+    depths = {span["name"]: span["depth"] for span in tracer.last_trace()["spans"]}
+    assert depths == {"pipeline.generate": 0, "a": 1, "b": 1, "a.inner": 2, "b.inner": 2,
+                      "pipeline.after": 0}
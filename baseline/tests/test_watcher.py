@@ -0,0 +1,108 @@
+import os
+import time
+
+import pytest
+
+from conftest import write_file
+
+from retriever.retreiver import Retriever
+from retriever.watcher import IndexWatcher
+
+
+@pytest.fixture
+def docs(tmp_path):
+    path = tmp_path / "docs"
+    path.mkdir()
+    return path
+
+
+def _list(docs):
+    return lambda: sorted(os.path.join(str(docs), name) for name in os.listdir(str(docs)))
+
+
+def _sources(retriever: Retriever, question: str):
+    return [meta["source"] for meta, _ in retriever.query(question, top_k=10, mode="hybrid")]
+
+
+def _watcher(docs, tmp_path, engine, **kwargs):
+    retriever = Retriever(embedder=engine)
+    retriever.add_documents(_list(docs)())
+    index_dir = str(tmp_path / "index")
+    retriever.save(index_dir)
+    return IndexWatcher(retriever, _list(docs), index_dir, debounce=0.0, **kwargs)
+
+
+def test_picks_up_added_changed_and_deleted_files(docs, tmp_path, engine):
+    write_file(docs, "a.txt", "apples and pears")
+    watcher = _watcher(docs, tmp_path, engine)
+    assert not watcher.poll()  # first scan: the index is up to date
+
+    write_file(docs, "b.txt", "bananas and kiwis")
+    assert watcher.poll()
+    assert set(_sources(watcher.retriever, "bananas")) == {"a.txt", "b.txt"}
+
+    write_file(docs, "b.txt", "blueberries only, a longer file now")
+    assert watcher.poll()
+    assert watcher.retriever.index.ntotal == 2
+    assert "blueberries" in watcher.retriever.query("blueberries", top_k=1, mode="hybrid")[0][1]
+
+    os.remove(os.path.join(str(docs), "a.txt"))
+    assert watcher.poll()
+    assert _sources(watcher.retriever, "apples") == ["b.txt"]
+
+    stats = watcher.stats()
+    assert (stats["batches"], stats["files_indexed"], stats["files_removed"]) == (3, 2, 1)
+    assert stats["pending_files"] == 0 and stats["last_lag_s"] is not None
+
+    # Every batch was saved back to the index directory
+    reloaded = Retriever(embedder=engine)
+    reloaded.load(watcher.index_dir)
+    assert set(reloaded.manifest.files) == {"b.txt"}
+
+
+def test_touched_but_identical_file_is_not_reindexed(docs, tmp_path, engine):
+    path = write_file(docs, "a.txt", "apples")
+    watcher = _watcher(docs, tmp_path, engine)
+    watcher.poll()
+    version = watcher.retriever.index_version
+    later = time.time() + 5
+    os.utime(path, (later, later))
+    assert not watcher.poll()
+    assert watcher.retriever.index_version == version
+
+
+def test_first_scan_catches_up_on_offline_changes(docs, tmp_path, engine):
+    write_file(docs, "a.txt", "apples")
+    write_file(docs, "b.txt", "bananas")
+    watcher = _watcher(docs, tmp_path, engine)
+    os.remove(os.path.join(str(docs), "a.txt"))
+    write_file(docs, "c.txt", "cherries")
+
+    assert watcher.poll()
+    assert set(watcher.retriever.manifest.files) == {"b.txt", "c.txt"}
+
+
+def test_debounce_waits_for_the_folder_to_settle(docs, tmp_path, engine):
+    watcher = _watcher(docs, tmp_path, engine)
+    watcher.debounce = 60.0
+    watcher.poll()
+    write_file(docs, "a.txt", "apples")
+    assert not watcher.poll()
+    assert watcher.stats()["pending_files"] == 1
+    watcher.debounce = 0.0
+    assert watcher.poll()
+
+
+def test_background_thread_indexes_new_files(docs, tmp_path, engine):
+    watcher = _watcher(docs, tmp_path, engine, interval=0.05).start()
+    try:
+        write_file(docs, "a.txt", "apples")
+        watcher.poll_now()
+        deadline = time.monotonic() + 10
+        while watcher.stats()["batches"] < 1 and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert watcher.stats()["running"]
+        assert _sources(watcher.retriever, "apples") == ["a.txt"]
+    finally:
+        watcher.stop(timeout=5)
+    assert not watcher.stats()["running"]
@@ -1 +1,266 @@
-#implement your evaluation code here
\ No newline at end of file
+"""
+Retrieval parameter sweeps for the baseline RAG pipeline.
+
+One run evaluates every combination of chunk_size, chunk_overlap, embedding
+model and FAISS index type at several k, and writes a comparison table:
+
+- documents are extracted once; each (chunk_size, chunk_overlap) split is
+  embedded through the content-addressed cache in retriever/embedding_cache.py
+  (evaluation/.cache/embeddings by default), so chunks shared between
+  configurations and runs are embedded once. The cache has a single writer,
+  so only point ``--cache-dir`` at the one Pipeline uses while no Pipeline
+  is running
+- questions are embedded once per model in a single batch
+- each (chunking, index type) configuration builds its index and searches
+  the question set in batches in a worker process (``--workers``)
+- Recall/Precision/F1/hit rate/MRR/nDCG come from metrics/ranking_metrics.py
+  (vectorised NumPy)
+
+Gold ids follow metrics/recall_evaluator.py: ``<file stem>_chunk<i>`` with
+``--level chunk`` (default), or just ``<file stem>`` with ``--level doc``.
+Chunk ids depend on the chunking, so document-level gold is the fairer
+comparison across chunk sizes.
+
+Usage (from the repository root):
+    python evaluation/evaluation.py --chunk-sizes 500,1000,1500 --overlaps 100,300 \\
+        --index-types flat,hnsw --k 1,3,5,10 --level doc --workers 4
+"""
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+import itertools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+EVALUATION_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_DIR = os.path.normpath(os.path.join(EVALUATION_DIR, "..", "baseline"))
+if BASELINE_DIR not in sys.path:
+    sys.path.insert(0, BASELINE_DIR)
+
+from retriever import index_factory  # noqa: E402
+from retriever.ingest import extract_text  # noqa: E402
+from retriever.embedding_cache import EmbeddingCache  # noqa: E402
+from metrics.ranking_metrics import evaluate_rankings  # noqa: E402
+
+METRICS = ("hit_rate", "precision", "recall", "f1", "mrr", "ndcg")
+
+
+def load_corpus(docs_dir: str) -> List[Tuple[str, str]]:
+    """(file stem, text) for every supported document, extracted once per sweep."""
+    corpus = []
+    for name in sorted(os.listdir(docs_dir)):
+        if os.path.splitext(name)[1].lower() not in (".txt", ".md", ".pdf", ".csv"):
+            continue
+        text = extract_text(os.path.join(docs_dir, name))
+        if text.strip():
+            corpus.append((os.path.splitext(name)[0], text))
+    return corpus
+
+
+def chunk_corpus(corpus: List[Tuple[str, str]], chunk_size: int, chunk_overlap: int) -> Tuple[List[str], List[str]]:
+    """Split like the Retriever does; returns (chunk texts, ``<stem>_chunk<i>`` ids)."""
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+    splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    texts, ids = [], []
+    for stem, text in corpus:
+        for i, chunk in enumerate(splitter.split_text(text)):
+            texts.append(chunk)
+            ids.append(f"{stem}_chunk{i}")
+    return texts, ids
+
+
+def _ranked_ids(positions: np.ndarray, chunk_ids: List[str], level: str, depth: int) -> List[str]:
+    ids = [chunk_ids[p] for p in positions if p != -1]
+    if level == "doc":
+        ids = list(dict.fromkeys(doc_id.rsplit("_chunk", 1)[0] for doc_id in ids))
+    return ids[:depth]
+
+
+def evaluate_config(job: dict) -> List[dict]:
+    """
+    Build one index, search every question in batches of ``query_batch`` and
+    score the rankings at each k. Runs in a worker process.
+    """
+    vectors, queries = job["vectors"], job["query_vectors"]
+    ks, level = job["ks"], job["level"]
+    depth = max(ks)
+    params = index_factory.resolve_params(job["index_type"], job["index_params"])
+    start = time.perf_counter()
+    if index_factory.needs_training(job["index_type"]):
+        index, _ = index_factory.train_index(job["index_type"], vectors, params)
+    else:
+        index = index_factory.build_index(job["index_type"], vectors.shape[1], params)
+    index.add(vectors)
+    build_s = time.perf_counter() - start
+
+    # Document-level ranking collapses chunks of one file, so fetch deeper
+    fetch = min(index.ntotal, depth * 4 if level == "doc" else depth)
+    retrieved = []
+    search_s = 0.0
+    for begin in range(0, len(queries), job["query_batch"]):
+        batch = queries[begin:begin + job["query_batch"]]
+        start = time.perf_counter()
+        _, positions = index.search(batch, fetch, params=index_factory.search_params(index))
+        search_s += time.perf_counter() - start
+        retrieved += [_ranked_ids(row, job["chunk_ids"], level, depth) for row in positions]
+
+    rows = []
+    for k, scores in evaluate_rankings(retrieved, job["gold"], ks).items():
+        rows.append(dict(
+            job["config"],
+            k=k,
+            **scores,
+            chunks=int(index.ntotal),
+            build_s=build_s,
+            search_ms_per_query=search_s / max(len(queries), 1) * 1000,
+        ))
+    return rows
+
+
+def run_sweep(
+    docs_dir: str,
+    benchmark: Sequence[Tuple[str, List[str]]],
+    chunk_sizes: Sequence[int] = (1500,),
+    chunk_overlaps: Sequence[int] = (300,),
+    models: Sequence[str] = ("BAAI/bge-large-en",),
+    index_types: Sequence[str] = ("flat",),
+    ks: Sequence[int] = (1, 3, 5, 10),
+    level: str = "chunk",
+    workers: int = 1,
+    query_batch: int = 256,
+    cache_dir: Optional[str] = None,
+    index_params: Optional[Dict[str, dict]] = None,
+) -> List[dict]:
+    """Evaluate every configuration; returns one row per (configuration, k)."""
+    from retriever.embedding import EmbeddingEngine
+
+    questions = [q for q, _ in benchmark]
+    gold = [list(g) for _, g in benchmark]
+    if level == "doc":
+        gold = [list(dict.fromkeys(g_id.rsplit("_chunk", 1)[0] for g_id in g)) for g in gold]
+    corpus = load_corpus(docs_dir)
+    if not corpus:
+        raise ValueError(f"No documents with text found in '{docs_dir}'.")
+
+    jobs = []
+    for model in models:
+        engine = EmbeddingEngine(model)
+        cache = EmbeddingCache(engine.cache_key, cache_dir) if cache_dir else None
+        query_vectors = engine.encode(questions)
+        for chunk_size, chunk_overlap in itertools.product(chunk_sizes, chunk_overlaps):
+            if chunk_overlap >= chunk_size:
+                print(f"[WARN] Skipping chunk_size={chunk_size}, chunk_overlap={chunk_overlap}: overlap must be smaller")
+                continue
+            texts, chunk_ids = chunk_corpus(corpus, chunk_size, chunk_overlap)
+            vectors = cache.embed(texts, engine.encode) if cache is not None else engine.encode(texts)
+            for index_type in index_types:
+                jobs.append({
+                    "config": {"model": model, "chunk_size": chunk_size, "chunk_overlap": chunk_overlap,
+                               "index_type": index_type},
+                    "index_type": index_type,
+                    "index_params": (index_params or {}).get(index_type),
+                    "vectors": vectors,
+                    "query_vectors": query_vectors,
+                    "chunk_ids": chunk_ids,
+                    "gold": gold,
+                    "ks": list(ks),
+                    "level": level,
+                    "query_batch": query_batch,
+                })
+        if cache is not None:
+            cache.flush()
+            print(f"✅ {model}: embedded {cache.misses} new chunk(s), reused {cache.hits}")
+        del engine
+
+    rows = []
+    if workers <= 1 or len(jobs) <= 1:
+        for job in jobs:
+            rows += evaluate_config(job)
+    else:
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs)), mp_context=ctx) as pool:
+            for result in pool.map(evaluate_config, jobs):
+                rows += result
+    return rows
+
+
+def format_table(rows: List[dict], sort_by: str = "ndcg") -> str:
+    header = (f"{'model':<24} {'chunk':>6} {'overlap':>7} {'index':<9} {'k':>3} "
+              + " ".join(f"{m:>9}" for m in METRICS) + f" {'chunks':>7} {'ms/q':>7}")
+    lines = [header, "-" * len(header)]
+    for row in sorted(rows, key=lambda r: (r["k"], -r[sort_by])):
+        lines.append(
+            f"{row['model'][-24:]:<24} {row['chunk_size']:>6} {row['chunk_overlap']:>7} {row['index_type']:<9} "
+            f"{row['k']:>3} " + " ".join(f"{row[m]:>9.3f}" for m in METRICS)
+            + f" {row['chunks']:>7} {row['search_ms_per_query']:>7.3f}"
+        )
+    return "\n".join(lines)
+
+
+def write_results(rows: List[dict], path: str):
+    """CSV, or JSON when ``path`` ends in .json."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    if path.endswith(".json"):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+        return
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def _load_benchmark(path: Optional[str]) -> List[Tuple[str, List[str]]]:
+    if path is None:
+        from metrics.recall_evaluator import BENCHMARK_DATA
+        return BENCHMARK_DATA
+    with open(path, "r", encoding="utf-8") as f:
+        return [(item["question"], item["gold_ids"]) for item in json.load(f)]
+
+
+def _list(cast):
+    return lambda value: [cast(v) for v in value.split(",") if v]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sweep retrieval parameters and compare Recall/Precision/F1/MRR/nDCG")
+    parser.add_argument("--docs-dir", default=os.path.join(BASELINE_DIR, "data"))
+    parser.add_argument("--benchmark", default=None,
+                        help='JSON list of {"question", "gold_ids"} (default: recall_evaluator.BENCHMARK_DATA)')
+    parser.add_argument("--chunk-sizes", type=_list(int), default=[1500])
+    parser.add_argument("--overlaps", type=_list(int), default=[300])
+    parser.add_argument("--models", type=_list(str), default=["BAAI/bge-large-en"])
+    parser.add_argument("--index-types", type=_list(str), default=["flat"])
+    parser.add_argument("--k", type=_list(int), default=[1, 3, 5, 10])
+    parser.add_argument("--level", choices=("chunk", "doc"), default="chunk")
+    parser.add_argument("--workers", type=int, default=1, help="processes evaluating configurations")
+    parser.add_argument("--query-batch", type=int, default=256)
+    parser.add_argument("--cache-dir", default=os.path.join(EVALUATION_DIR, ".cache", "embeddings"))
+    parser.add_argument("--sort-by", choices=METRICS, default="ndcg")
+    parser.add_argument("--out", default=os.path.join(EVALUATION_DIR, "sweep_results.csv"))
+    args = parser.parse_args()
+
+    results = run_sweep(
+        args.docs_dir,
+        _load_benchmark(args.benchmark),
+        chunk_sizes=args.chunk_sizes,
+        chunk_overlaps=args.overlaps,
+        models=args.models,
+        index_types=args.index_types,
+        ks=args.k,
+        level=args.level,
+        workers=args.workers,
+        query_batch=args.query_batch,
+        cache_dir=args.cache_dir,
+    )
+    print(format_table(results, sort_by=args.sort_by))
+    if results:
+        write_results(results, args.out)
+        print(f"✅ Wrote {len(results)} rows to {args.out}")
@@ -16,8 +16,8 @@ for text, distance in results:
     print(f"{distance:.4f}\t{text}")
 
 # 4) Save / Load
-ret.save("my_index.faiss", "my_chunks.pkl")
+ret.save("my_index.faiss", "my_chunks.bin")
 
 # later...
 new_ret = Retriever()
-new_ret.load("my_index.faiss", "my_chunks.pkl")
+new_ret.load("my_index.faiss", "my_chunks.bin")
@@ -1,11 +1,78 @@
 import os
 import pickle
-from typing import List, Tuple, Union
+import importlib.util
+from typing import Iterable, List, Optional, Tuple, Union
 
 import faiss
+import numpy as np
 from sentence_transformers import SentenceTransformer
 from PyPDF2 import PdfReader
 
+# The baseline embedding cache, loaded from its file because this module's
+# name shadows the baseline ``retriever`` package
+EMBEDDING_CACHE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "..", "baseline", "retriever", "embedding_cache.py"
+)
+
+
+def _load_embedding_cache():
+    spec = importlib.util.spec_from_file_location("baseline_embedding_cache", EMBEDDING_CACHE_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class MappedTexts:
+    """
+    List-like chunk texts backed by a memory-mapped UTF-8 blob.
+
+    The blob holds every text back to back and ``<blob>.offsets.npy`` the
+    int64 start of each one (plus the end), so loading costs the same for any
+    corpus size and a text is decoded only when indexed. Appended texts stay in
+    memory until the next save.
+    """
+
+    def __init__(self, blob=None, offsets=None):
+        self._blob = blob
+        self._offsets = offsets if offsets is not None else np.zeros(1, dtype=np.int64)
+        self._extra: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1 + len(self._extra)
+
+    def __getitem__(self, i: int) -> str:
+        n = len(self._offsets) - 1
+        if i < 0:
+            i += len(self)
+        if i >= n:
+            return self._extra[i - n]
+        return self._blob[self._offsets[i]:self._offsets[i + 1]].tobytes().decode("utf-8")
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def append(self, text: str) -> None:
+        self._extra.append(text)
+
+    @staticmethod
+    def write(texts: Iterable[str], path: str) -> None:
+        offsets = [0]
+        with open(path + ".tmp", "wb") as f:
+            for text in texts:
+                data = text.encode("utf-8")
+                f.write(data)
+                offsets.append(offsets[-1] + len(data))
+        with open(path + ".offsets.npy.tmp", "wb") as f:
+            np.save(f, np.asarray(offsets, dtype=np.int64))
+        os.replace(path + ".tmp", path)
+        os.replace(path + ".offsets.npy.tmp", path + ".offsets.npy")
+
+    @classmethod
+    def open(cls, path: str) -> "MappedTexts":
+        offsets = np.load(path + ".offsets.npy", mmap_mode="r")
+        blob = np.memmap(path, dtype=np.uint8, mode="r") if os.path.getsize(path) else None
+        return cls(blob, offsets)
+
 
 class Retriever:
     """
@@ -19,9 +86,17 @@ class Retriever:
     query(q, top_k=5)
         Embed a query string and return the top_k most similar chunks.
     save(index_path, texts_path)
-        Persist the FAISS index and the list of chunks to disk.
+        Persist the FAISS index and the chunks (a UTF-8 blob at texts_path
+        plus texts_path + ".offsets.npy") to disk.
     load(index_path, texts_path)
-        Reload a saved FAISS index and chunk list.
+        Reload a saved FAISS index and memory-map the chunks; chunk lists
+        pickled by older versions are still read.
+
+    With ``cache_dir`` set, chunk embeddings are kept in the baseline on-disk
+    cache keyed by model and chunk text, so re-adding the same documents (or
+    re-chunking them with overlapping windows) only encodes new text. Chunks
+    are then encoded with newlines as spaces, like the baseline engine does,
+    so both retrievers can share one cache directory.
     """
 
     def __init__(
@@ -30,13 +105,22 @@ class Retriever:
         embedding_dim: int = 384,
         chunk_size: int = 500,
         chunk_overlap: int = 50,
+        cache_dir: Optional[str] = None,
+        cache_max_bytes: int = 1024 ** 3,
     ):
         self.model = SentenceTransformer(model_name)
+        self.embedding_cache = None
+        if cache_dir:
+            cache_module = _load_embedding_cache()
+            self._normalize_chunk = cache_module.normalize_chunk
+            self.embedding_cache = cache_module.EmbeddingCache(
+                cache_module.model_cache_key(model_name, self.model.max_seq_length), cache_dir, cache_max_bytes
+            )
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
 
         # texts[i] is the original text for vector index position i
-        self.texts: List[str] = []
+        self.texts: Union[List[str], MappedTexts] = []
 
         # FAISS flat L2 index
         self.index = faiss.IndexFlatL2(embedding_dim)
@@ -69,9 +153,18 @@ class Retriever:
                 self.texts.append(chunk)
 
         if new_chunks:
-            embeddings = self.model.encode(new_chunks, convert_to_numpy=True)
+            if self.embedding_cache is not None:
+                embeddings = self.embedding_cache.embed(
+                    new_chunks, lambda texts: self._encode([self._normalize_chunk(t) for t in texts])
+                )
+                self.embedding_cache.flush()
+            else:
+                embeddings = self._encode(new_chunks)
             self.index.add(embeddings)
 
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        return self.model.encode(texts, convert_to_numpy=True)
+
     def query(self, q: str, top_k: int = 5) -> List[Tuple[str, float]]:
         """
         Return the top_k most similar chunks to the query string.
@@ -90,19 +183,22 @@ class Retriever:
 
     def save(self, index_path: str, texts_path: str) -> None:
         """
-        Write FAISS index to `index_path` and chunk list to `texts_path`.
+        Write FAISS index to `index_path` and chunk texts to `texts_path`.
         """
         faiss.write_index(self.index, index_path)
-        with open(texts_path, "wb") as f:
-            pickle.dump(self.texts, f)
+        MappedTexts.write(self.texts, texts_path)
+        self.texts = MappedTexts.open(texts_path)
 
     def load(self, index_path: str, texts_path: str) -> None:
         """
-        Load FAISS index from `index_path` and chunk list from `texts_path`.
+        Load FAISS index from `index_path` and chunk texts from `texts_path`.
         """
         self.index = faiss.read_index(index_path)
-        with open(texts_path, "rb") as f:
-            self.texts = pickle.load(f)
+        if os.path.exists(texts_path + ".offsets.npy"):
+            self.texts = MappedTexts.open(texts_path)
+        else:
+            with open(texts_path, "rb") as f:
+                self.texts = pickle.load(f)
 
 
 if __name__ == "__main__":